@@ -0,0 +1,157 @@
+"""
+Throughput benchmark: asyncio pipeline vs. thread pool against moto.
+
+Uploads N transcripts to a moto server running in a separate process, then
+processes them with ``app.async_handler.process_locations_async`` at
+increasing concurrency and, for reference, with the thread-pool
+``app.handler.process_locations``. Reports objects per second for each run.
+Gains only show when the server has spare CPU, so run it on a host with
+more than one core.
+
+Usage:
+    python -m benchmarks.bench_async [--objects 300] [--concurrency 1 4 16 64]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, List
+
+from app.utils.parse_event import S3ObjectRef
+
+BUCKET = "bench-async"
+
+
+def start_moto(port: int) -> tuple:
+    """
+    Starts a moto server in a separate process and points the application
+    at it.
+
+    Running the server out of process keeps its request handling from
+    competing with the benchmarked pipeline for the GIL.
+
+    Returns:
+        tuple: The server process and boto3 S3 and SQS clients.
+    """
+    import boto3
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    endpoint = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError("moto server did not start")
+            time.sleep(0.1)
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    os.environ["AWS_ENDPOINT_URL"] = endpoint
+    os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+
+    s3 = boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1")
+    sqs = boto3.client("sqs", endpoint_url=endpoint, region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    return server, s3, sqs
+
+
+def upload(s3, count: int) -> List[S3ObjectRef]:
+    """
+    Uploads ``count`` transcripts and returns their locations.
+    """
+    locations = []
+    for i in range(count):
+        key = f"transcripts/{i:06d}.json"
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=key,
+            Body=json.dumps({
+                "interaction_id": f"CHAT-{i}",
+                "customer_id": f"CUST-{i % 50}",
+                "transcript": "Hola, tengo un problema con mi pedido " * 20,
+            }),
+        )
+        locations.append(S3ObjectRef(BUCKET, key))
+    return locations
+
+
+def timed(run: Callable[[], tuple], sqs, name: str, count: int) -> None:
+    """
+    Runs one configuration on a fresh queue and prints its throughput.
+    """
+    queue_url = sqs.create_queue(QueueName=f"bench-{time.monotonic_ns()}")[
+        "QueueUrl"
+    ]
+    os.environ["SQS_QUEUE_URL"] = queue_url
+
+    start = time.perf_counter()
+    results, errors = run()
+    elapsed = time.perf_counter() - start
+
+    assert not errors, next(iter(errors.values()))
+    print(f"{name:>24} {elapsed:>9.2f}s {count / elapsed:>10.1f} obj/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=300)
+    parser.add_argument("--port", type=int, default=5123)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 16, 64]
+    )
+    args = parser.parse_args()
+
+    server, s3, sqs = start_moto(args.port)
+    try:
+        from app import handler as sync_handler
+        from app.async_handler import (
+            close_async_clients,
+            process_locations_async,
+            run_async,
+        )
+
+        def run(concurrency):
+            # Fresh clients per level, so each gets a pool of its size.
+            try:
+                return run_async(
+                    process_locations_async(locations, concurrency)
+                )
+            finally:
+                run_async(close_async_clients())
+
+        locations = upload(s3, args.objects)
+        print(f"{'pipeline':>24} {'elapsed':>10} {'throughput':>14}")
+        for concurrency in args.concurrency:
+            timed(
+                lambda: run(concurrency),
+                sqs,
+                f"asyncio x{concurrency}",
+                len(locations),
+            )
+        for workers in args.concurrency:
+            sync_handler.MAX_WORKERS = workers
+            timed(
+                lambda: sync_handler.process_locations(locations),
+                sqs,
+                f"threads x{workers}",
+                len(locations),
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Cold-start benchmark: handler import time and time to first invocation.
+
+Each sample runs in a fresh interpreter, like a new Lambda container:
+
+* import time is the cumulative ``app.handler`` entry reported by
+  ``python -X importtime``;
+* time to first invocation is measured inside the child process, from
+  before ``import app.handler`` to the return of a first ``handler`` call
+  against a local moto server.
+
+The run fails with exit code 1 when a median exceeds its threshold, so it
+can gate regressions in CI.
+
+Usage:
+    python -m benchmarks.bench_cold_start [--samples 5] [--max-import-ms 400]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+BUCKET = "cold-start-bucket"
+QUEUE = "cold-start-queue"
+
+FIRST_INVOCATION = """
+import json, time
+start = time.perf_counter()
+from app.handler import handler
+imported = time.perf_counter()
+handler({event}, {context})
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_invocation_ms": (done - start) * 1000,
+}}))
+"""
+
+CONTEXT = (
+    "type('Context', (), dict(function_name='lynza', function_version='1', "
+    "invoked_function_arn='arn', memory_limit_in_mb=128, "
+    "aws_request_id='cold-start', log_group_name='g', log_stream_name='s'))()"
+)
+
+
+def importtime_ms(env: Dict[str, str]) -> float:
+    """
+    Returns the cumulative ``app.handler`` import time reported by
+    ``-X importtime``, in milliseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.handler"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == "app.handler":
+            return int(fields[1]) / 1000
+    raise RuntimeError("app.handler not found in -X importtime output")
+
+
+def first_invocation(env: Dict[str, str], event: Dict) -> Dict[str, float]:
+    """
+    Runs one cold process that imports the handler and invokes it once.
+    """
+    script = FIRST_INVOCATION.format(event=repr(event), context=CONTEXT)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def start_moto() -> tuple:
+    """
+    Starts a moto server with a bucket, an object and a queue.
+
+    Returns:
+        tuple: The server and the environment for child processes.
+    """
+    import logging
+
+    import boto3
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint = f"http://{host}:{port}"
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    env = dict(os.environ)
+    env.update(
+        AWS_ENDPOINT_URL=endpoint,
+        AWS_DEFAULT_REGION="us-east-1",
+        AWS_LAMBDA_FUNCTION_NAME="lynza",
+        POWERTOOLS_LOG_LEVEL="WARNING",
+    )
+
+    s3 = boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="sample.json",
+        Body=json.dumps({
+            "interaction_id": "CHAT-1",
+            "customer_id": "CUST-1",
+            "transcript": "Hola, tengo un problema con mi pedido",
+        }),
+    )
+    sqs = boto3.client("sqs", endpoint_url=endpoint, region_name="us-east-1")
+    env["SQS_QUEUE_URL"] = sqs.create_queue(QueueName=QUEUE)["QueueUrl"]
+    return server, env
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=400.0)
+    parser.add_argument("--max-first-invocation-ms", type=float, default=1500.0)
+    parser.add_argument("--output", help="Write the results as JSON here")
+    args = parser.parse_args()
+
+    server, env = start_moto()
+    event = {
+        "Records": [
+            {"s3": {"bucket": {"name": BUCKET}, "object": {"key": "sample.json"}}}
+        ]
+    }
+    try:
+        imports: List[float] = []
+        invocations: List[float] = []
+        for _ in range(args.samples):
+            imports.append(importtime_ms(env))
+            invocations.append(
+                first_invocation(env, event)["first_invocation_ms"]
+            )
+    finally:
+        server.stop()
+
+    results = {
+        "import_ms_median": statistics.median(imports),
+        "import_ms_max": max(imports),
+        "first_invocation_ms_median": statistics.median(invocations),
+        "first_invocation_ms_max": max(invocations),
+    }
+    for name, value in results.items():
+        print(f"{name:>28}: {value:8.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if results["import_ms_median"] > args.max_import_ms:
+        print(f"FAIL: import time above {args.max_import_ms} ms")
+        failed = True
+    if results["first_invocation_ms_median"] > args.max_first_invocation_ms:
+        print(
+            "FAIL: time to first invocation above "
+            f"{args.max_first_invocation_ms} ms"
+        )
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
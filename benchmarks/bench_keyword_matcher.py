@@ -0,0 +1,107 @@
+"""
+Micro-benchmark: Aho-Corasick matcher vs. per-keyword substring search.
+
+Compares the previous classifier strategy (``keyword in transcript`` once per
+keyword) with the Aho-Corasick scan (``KeywordMatcher.iter_matches``) and with
+``KeywordMatcher.find_all``, which picks the faster of the two by lexicon
+size, across lexicons of 10, 1k and 50k keywords.
+
+Usage:
+    python -m benchmarks.bench_keyword_matcher [--transcript-bytes 2000]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Set
+
+from app.domain.keyword_matcher import KeywordMatcher
+
+SYLLABLES = [
+    "ca", "da", "de", "el", "en", "es", "la", "lo", "ma", "me", "mi", "na",
+    "no", "pa", "pe", "po", "que", "ra", "re", "sa", "se", "si", "ta", "te",
+    "ti", "to", "un", "va", "ve", "ya",
+]
+
+
+def make_lexicon(size: int, rng: random.Random) -> Set[str]:
+    """
+    Builds a lexicon of pseudo-Spanish keywords, a fifth of them two words.
+    """
+    lexicon: Set[str] = set()
+    while len(lexicon) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5)))
+        if rng.random() < 0.2:
+            word += " " + "".join(rng.choice(SYLLABLES) for _ in range(2))
+        lexicon.add(word)
+    return lexicon
+
+
+def make_transcript(size: int, rng: random.Random) -> str:
+    """
+    Builds a lowercase transcript of roughly ``size`` characters.
+    """
+    words: List[str] = []
+    length = 0
+    while length < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def best_of(func: Callable[[], object], repeat: int, number: int) -> float:
+    """
+    Returns the best per-call time in seconds over ``repeat`` rounds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcript-bytes", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    transcript = make_transcript(args.transcript_bytes, rng)
+
+    print(
+        f"transcript: {len(transcript)} chars\n"
+        f"{'keywords':>9} {'compile ms':>11} {'naive µs':>11} "
+        f"{'automaton µs':>13} {'find_all µs':>12} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        lexicon = make_lexicon(size, rng)
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(lexicon)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        naive = {k for k in lexicon if k in transcript}
+        assert matcher.find_all(transcript) == naive
+
+        number = max(1, 20000 // size)
+        naive_s = best_of(
+            lambda: [k for k in lexicon if k in transcript], 5, number
+        )
+        automaton_s = best_of(
+            lambda: set(matcher.iter_matches(transcript)), 5, 20
+        )
+        find_all_s = best_of(lambda: matcher.find_all(transcript), 5, 20)
+
+        print(
+            f"{size:>9} {compile_ms:>11.1f} {naive_s * 1e6:>11.1f} "
+            f"{automaton_s * 1e6:>13.1f} {find_all_s * 1e6:>12.1f} "
+            f"{naive_s / find_all_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
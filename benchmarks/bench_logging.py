@@ -0,0 +1,135 @@
+"""
+Micro-benchmark: per-invocation cost of payload logging.
+
+Compares the previous pattern, ``logger.debug(..., extra={"data": ...})``
+on every call plus ``log_event=True``, with
+:func:`app.utils.payload_logging.log_payload` at INFO level, at DEBUG level
+with 1-in-N sampling, and at DEBUG level with redaction. Records are
+formatted by the powertools JSON formatter and written to ``/dev/null``, so
+serialization is included but terminal I/O is not.
+
+Usage:
+    python -m benchmarks.bench_logging [--sizes 1 10 100] [--sample-rate 100]
+"""
+import argparse
+import itertools
+import logging
+import os
+import random
+from types import SimpleNamespace
+from typing import Any, Callable, Dict
+
+from aws_lambda_powertools import Logger
+
+from app.utils import payload_logging
+from app.utils.payload_logging import log_payload
+from benchmarks.bench_codec import best_of, make_payload
+
+CONTEXT = SimpleNamespace(
+    function_name="lynza-bench",
+    function_version="$LATEST",
+    invoked_function_arn="arn:aws:lambda:us-east-1:000000000000:function:b",
+    memory_limit_in_mb=128,
+    aws_request_id="bench",
+    log_group_name="/aws/lambda/lynza-bench",
+    log_stream_name="bench",
+)
+
+_logger_ids = itertools.count()
+
+EVENT = {
+    "Records": [
+        {"s3": {"bucket": {"name": "bucket"}, "object": {"key": "a.json"}}}
+    ]
+}
+
+
+def make_logger(level: int) -> Any:
+    """
+    Builds a powertools logger that writes formatted records to /dev/null.
+
+    Every logger gets its own service name, since powertools shares the
+    configuration of loggers with the same name.
+    """
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    logger = Logger(
+        service=f"lynza-bench-{next(_logger_ids)}",
+        logger_handler=handler
+    )
+    logger.setLevel(level)
+    return logger
+
+
+def make_invocation(
+    logger: Any,
+    payload: Dict[str, Any],
+    log_event: bool,
+    log: Callable[[Any, Dict[str, Any]], None]
+) -> Callable[[], object]:
+    """
+    Wraps a handler that logs the raw and transformed payload once each.
+    """
+    @logger.inject_lambda_context(log_event=log_event)
+    def handler(event: Dict[str, Any], context: Any) -> None:
+        log(logger, payload)
+        log(logger, payload)
+
+    return lambda: handler(EVENT, CONTEXT)
+
+
+def eager(logger: Any, payload: Dict[str, Any]) -> None:
+    logger.debug("Raw JSON data retrieved", extra={"data": payload})
+
+
+def lazy(logger: Any, payload: Dict[str, Any]) -> None:
+    log_payload(logger, "Raw JSON data retrieved", payload)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--sample-rate", type=int, default=100)
+    args = parser.parse_args()
+
+    payload_logging.LOG_PAYLOAD_SAMPLE_RATE = args.sample_rate
+    scenarios = [
+        ("no logging", logging.INFO, False, lambda logger, payload: None),
+        ("eager, INFO, log_event", logging.INFO, True, eager),
+        ("eager, DEBUG, log_event", logging.DEBUG, True, eager),
+        ("lazy, INFO", logging.INFO, False, lazy),
+        (f"lazy, DEBUG, 1/{args.sample_rate}", logging.DEBUG, False, lazy),
+    ]
+
+    print(f"{'size':>7} {'scenario':>28} {'µs/invocation':>14} {'overhead':>9}")
+    rng = random.Random(5)
+    for size_kb in args.sizes:
+        payload = make_payload(size_kb, rng)
+        baseline = None
+        for name, level, log_event, log in scenarios:
+            invoke = make_invocation(make_logger(level), payload, log_event, log)
+            seconds = best_of(invoke)
+            baseline = baseline if baseline is not None else seconds
+            print(
+                f"{size_kb:>5}KB {name:>28} {seconds * 1e6:>14.1f} "
+                f"{(seconds - baseline) * 1e6:>8.1f}µs"
+            )
+
+        payload_logging.LOG_PAYLOAD_REDACT = True
+        invoke = make_invocation(
+            make_logger(logging.DEBUG),
+            payload,
+            False,
+            lambda logger, data: log_payload(
+                logger, "Raw JSON data retrieved", data, sample_rate=1
+            )
+        )
+        seconds = best_of(invoke)
+        print(
+            f"{size_kb:>5}KB {'lazy, DEBUG, every, redacted':>28} "
+            f"{seconds * 1e6:>14.1f} {(seconds - baseline) * 1e6:>8.1f}µs"
+        )
+        payload_logging.LOG_PAYLOAD_REDACT = False
+
+
+if __name__ == "__main__":
+    main()
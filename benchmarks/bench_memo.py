@@ -0,0 +1,123 @@
+"""
+Micro-benchmark: classification with and without the classification memo.
+
+Classifies a stream of transcripts in which a given share repeats one of a
+few hundred popular transcripts (templated bot conversations, resent
+uploads), with the built-in lexicon and with a 50k-keyword lexicon. Each row
+compares classifying without a memo, with a local LRU, and with a local LRU
+backed by a ``multiprocessing`` manager dict, as shared by backfill workers.
+
+Usage:
+    python -m benchmarks.bench_memo [--transcripts 2000] \\
+        [--duplication 0 0.3 0.6 0.9] [--transcript-bytes 2000]
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app.domain import classification_memo
+from app.domain.classification_memo import ClassificationMemo
+from app.domain.lexicon import Lexicon
+from app.domain.sentiment_analysis import (
+    classify_sentiment,
+    get_builtin_lexicon,
+)
+from benchmarks.bench_keyword_matcher import make_lexicon, make_transcript
+
+POPULAR_TRANSCRIPTS = 200
+
+
+def make_stream(
+    count: int,
+    duplication: float,
+    size: int,
+    rng: random.Random
+) -> List[str]:
+    """
+    Builds ``count`` transcripts, a ``duplication`` share of which repeat
+    one of ``POPULAR_TRANSCRIPTS`` transcripts.
+    """
+    popular = [make_transcript(size, rng) for _ in range(POPULAR_TRANSCRIPTS)]
+    return [
+        rng.choice(popular) if rng.random() < duplication
+        else make_transcript(size, rng)
+        for _ in range(count)
+    ]
+
+
+def run(
+    stream: List[str],
+    lexicon: Lexicon,
+    make_memo: Callable[[], Optional[ClassificationMemo]],
+    repeat: int = 3
+) -> Tuple[float, Optional[ClassificationMemo]]:
+    """
+    Returns the best mean time per transcript in seconds over ``repeat``
+    runs, each with a fresh memo, and the memo of the last run.
+    """
+    best = float("inf")
+    memo = None
+    for _ in range(repeat):
+        memo = make_memo()
+        classification_memo.set_classification_memo(memo)
+        start = time.perf_counter()
+        for transcript in stream:
+            classify_sentiment(transcript, lexicon=lexicon)
+        best = min(best, (time.perf_counter() - start) / len(stream))
+    return best, memo
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcripts", type=int, default=2000)
+    parser.add_argument("--duplication", type=float, nargs="+",
+                        default=[0.0, 0.3, 0.6, 0.9])
+    parser.add_argument("--transcript-bytes", type=int, default=2000)
+    parser.add_argument("--memo-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lexicons = {
+        "builtin": get_builtin_lexicon(),
+        "50k": Lexicon(make_lexicon(50000, rng), [], version="50k"),
+    }
+
+    print(
+        f"{args.transcripts} transcripts of {args.transcript_bytes} chars\n"
+        f"{'lexicon':>8} {'dup':>5} {'hit rate':>9} {'none µs':>9} "
+        f"{'local µs':>9} {'shared µs':>10} {'speedup':>8}"
+    )
+    with multiprocessing.Manager() as manager:
+        for name, lexicon in lexicons.items():
+            for duplication in args.duplication:
+                stream = make_stream(
+                    args.transcripts,
+                    duplication,
+                    args.transcript_bytes,
+                    rng
+                )
+                baseline, _ = run(stream, lexicon, lambda: None)
+                local, memo = run(
+                    stream, lexicon, lambda: ClassificationMemo(args.memo_size)
+                )
+                shared, _ = run(
+                    stream,
+                    lexicon,
+                    lambda: ClassificationMemo(
+                        args.memo_size, shared=manager.dict()
+                    )
+                )
+                print(
+                    f"{name:>8} {duplication:>5.0%} "
+                    f"{memo.stats()['hit_rate']:>9.0%} "  # type: ignore
+                    f"{baseline * 1e6:>9.1f} {local * 1e6:>9.1f} "
+                    f"{shared * 1e6:>10.1f} {baseline / local:>7.1f}x"
+                )
+    classification_memo.set_classification_memo(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Micro-benchmark: bytes saved and CPU spent by SQS body compression.
+
+Encodes output messages of 1 KB to 200 KB with every ``SQS_COMPRESSION``
+setting and reports the body size as sent (base64 included), the 64 KB
+chunks SQS bills for it, how many such messages fit in one batch,
+and the time to compress and to decode one message.
+
+Transcripts alternate agent and customer turns of Zipf-distributed
+pseudo-Spanish words, order numbers and amounts, which compresses about as
+well as real conversations; repeating a handful of phrases would overstate
+the savings several times.
+
+Usage:
+    python -m benchmarks.bench_sqs_compression [--sizes 1024 16384 204800]
+"""
+import argparse
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.adapters.message_bus import (
+    SQS_MAX_BATCH_BYTES,
+    SQS_MAX_BATCH_ENTRIES,
+)
+from app.adapters.message_compression import compress_body, decompress_body
+from app.utils import codec
+from benchmarks.bench_codec import best_of
+from benchmarks.bench_keyword_matcher import SYLLABLES
+
+SIZES = [1024, 4 * 1024, 16 * 1024, 64 * 1024, 200 * 1024]
+SETTINGS: List[Tuple[str, Optional[str], Optional[int]]] = [
+    ("none", None, None),
+    ("gzip-1", "gzip", 1),
+    ("gzip-6", "gzip", 6),
+    ("zstd-1", "zstd", 1),
+    ("zstd-3", "zstd", 3),
+    ("zstd-9", "zstd", 9),
+]
+SQS_BILLING_CHUNK = 64 * 1024
+VOCABULARY_SIZE = 3000
+
+
+def make_vocabulary(rng: random.Random) -> List[str]:
+    """
+    Builds ``VOCABULARY_SIZE`` pseudo-Spanish words, some accented.
+    """
+    words = []
+    for _ in range(VOCABULARY_SIZE):
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.1:
+            word = word.replace("a", "á", 1).replace("o", "ó", 1)
+        words.append(word)
+    return words
+
+
+def make_transcript(
+    size: int,
+    vocabulary: List[str],
+    rng: random.Random
+) -> str:
+    """
+    Builds a conversation of roughly ``size`` UTF-8 bytes.
+    """
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    turns: List[str] = []
+    length = 0
+    while length < size:
+        speaker = "Agente" if len(turns) % 2 == 0 else "Cliente"
+        words = rng.choices(vocabulary, weights, k=rng.randint(6, 30))
+        if rng.random() < 0.3:
+            words.append(f"pedido {rng.randint(100000, 999999)}")
+        if rng.random() < 0.1:
+            words.append(f"${rng.randint(1, 5000)}.{rng.randint(0, 99):02d}")
+        turn = f"{speaker}: {' '.join(words).capitalize()}."
+        turns.append(turn)
+        length += len(turn.encode("utf-8")) + 1
+    return "\n".join(turns)
+
+
+def make_message(
+    size: int,
+    vocabulary: List[str],
+    rng: random.Random
+) -> Dict[str, Any]:
+    """
+    Builds an output message whose transcript is roughly ``size`` bytes.
+    """
+    return {
+        "interaction_id": f"CHAT-{rng.randint(0, 10 ** 9)}",
+        "customer_id": f"CUST-{rng.randint(0, 10 ** 6)}",
+        "transcript": make_transcript(size, vocabulary, rng),
+        "analysis": {"sentiment": "NEGATIVE"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng)
+
+    print(
+        f"{'size':>7} {'setting':>8} {'bytes':>8} {'ratio':>6} "
+        f"{'chunks':>6} {'/batch':>6} {'encode µs':>10} {'decode µs':>10}"
+    )
+    for size in args.sizes:
+        body = codec.dumps(make_message(size, vocabulary, rng))
+        for name, encoding, level in SETTINGS:
+            if encoding is None:
+                os.environ.pop("SQS_COMPRESSION", None)
+            else:
+                os.environ["SQS_COMPRESSION"] = encoding
+                os.environ["SQS_COMPRESSION_LEVEL"] = str(level)
+            os.environ["SQS_COMPRESSION_THRESHOLD_BYTES"] = "0"
+
+            encoded, content_encoding = compress_body(body)
+            assert codec.loads(
+                decompress_body(encoded, content_encoding)
+            ) == codec.loads(body)
+            encode_s = best_of(lambda: compress_body(body))
+            decode_s = best_of(
+                lambda: decompress_body(encoded, content_encoding)
+            )
+            per_batch = min(
+                SQS_MAX_BATCH_ENTRIES, SQS_MAX_BATCH_BYTES // len(encoded)
+            )
+            print(
+                f"{size // 1024:>5}KB {name:>8} {len(encoded):>8} "
+                f"{len(body) / len(encoded):>5.1f}x "
+                f"{-(-len(encoded) // SQS_BILLING_CHUNK):>6} {per_batch:>6} "
+                f"{encode_s * 1e6:>10.1f} {decode_s * 1e6:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Load generator: drive ``handler`` with synthetic or replayed S3 events.
+
+Uploads N synthetic transcripts and builds one S3 event per
+``--records-per-event`` objects, or replays the events of a file, then calls
+``app.handler.handler`` from a worker pool:
+
+* closed loop (default): ``--concurrency`` workers invoke back to back;
+* open loop: with ``--rate``, events are started at that many per second,
+  on up to ``--concurrency`` workers, the way S3 notifications arrive.
+
+Targets are in-process moto (default, no Docker needed), LocalStack and
+any other endpoint given with ``--endpoint``, or the in-memory fakes of
+:mod:`app.adapters.fake_aws` with ``--target fake``, whose per-call
+latency, capacity and error rates are set with the ``--fake-*`` options
+to model throughput under realistic or degraded service behaviour.
+Reports throughput, p50/p95/p99 latency and error rate; an invocation that
+raises or returns a 207 counts as an error.
+
+Usage:
+    python -m benchmarks.load_generator [--events 500] [--concurrency 8]
+    python -m benchmarks.load_generator --rate 50 --duration 30
+    python -m benchmarks.load_generator --replay events.jsonl --target localstack
+    python -m benchmarks.load_generator --target fake \\
+        --fake-s3-latency lognormal:20:0.5 --fake-s3-max-rps 300
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.suite import make_document
+
+BUCKET = "lynza-load"
+QUEUE = "lynza-load"
+LOCALSTACK_ENDPOINT = "http://localhost:4566"
+
+
+def make_context(request_id: str) -> SimpleNamespace:
+    """
+    Builds the Lambda context attributes read by the powertools logger.
+    """
+    return SimpleNamespace(
+        function_name="lynza-load",
+        function_version="$LATEST",
+        invoked_function_arn=(
+            "arn:aws:lambda:us-east-1:000000000000:function:lynza-load"
+        ),
+        memory_limit_in_mb=128,
+        aws_request_id=request_id,
+        log_group_name="/aws/lambda/lynza-load",
+        log_stream_name="load",
+    )
+
+
+def s3_event(bucket: str, keys: List[str]) -> Dict[str, Any]:
+    return {
+        "Records": [
+            {"s3": {"bucket": {"name": bucket}, "object": {"key": key}}}
+            for key in keys
+        ]
+    }
+
+
+def generate_events(
+    s3: Any,
+    count: int,
+    records_per_event: int,
+    transcript_bytes: int,
+    seed: int
+) -> List[Dict[str, Any]]:
+    """
+    Uploads synthetic transcripts and returns the events that reference
+    them.
+    """
+    from app.utils import codec
+
+    rng = random.Random(seed)
+    events = []
+    for event_index in range(count):
+        keys = []
+        for record in range(records_per_event):
+            key = f"load/{event_index:06d}-{record}.json"
+            document = make_document(transcript_bytes, rng)
+            document["interaction_id"] = f"LOAD-{event_index}-{record}"
+            s3.put_object(Bucket=BUCKET, Key=key, Body=codec.dumps(document))
+            keys.append(key)
+        events.append(s3_event(BUCKET, keys))
+    return events
+
+
+def load_events(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads the events to replay.
+
+    Args:
+        path (str): A JSON file holding one event, or a JSON Lines file with
+            one event per line.
+
+    Returns:
+        List[Dict[str, Any]]: The events, in file order.
+    """
+    with open(path) as f:
+        content = f.read()
+    try:
+        return [json.loads(content)]
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in content.splitlines() if line]
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of an ascending list.
+    """
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LoadRun:
+    """
+    Invokes a handler for every event and records latency and outcome.
+
+    Args:
+        handler (Callable[[Dict[str, Any], Any], Dict[str, Any]]): The
+            Lambda handler to drive.
+        concurrency (int): Worker threads.
+        rate (Optional[float]): Events started per second; None invokes
+            back to back.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+        concurrency: int,
+        rate: Optional[float] = None
+    ) -> None:
+        self.handler = handler
+        self.concurrency = concurrency
+        self.rate = rate
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.error_samples: List[str] = []
+        self._lock = threading.Lock()
+
+    def invoke(self, index: int, event: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            response = self.handler(event, make_context(f"load-{index}"))
+            if response.get("statusCode") == 207:
+                error = "partial failure"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.latencies.append(elapsed)
+            if error is not None:
+                self.errors += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(error)
+
+    def run(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Sends every event and returns the summary of the run.
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for index, event in enumerate(events):
+                if self.rate:
+                    delay = start + index / self.rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                executor.submit(self.invoke, index, event)
+        elapsed = time.perf_counter() - start
+        return self.summary(elapsed)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "invocations": count,
+            "concurrency": self.concurrency,
+            "target_rate": self.rate,
+            "elapsed_s": elapsed,
+            "throughput_per_s": count / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            "error_rate": self.errors / count if count else 0.0,
+            "error_samples": self.error_samples,
+        }
+
+
+def configure_target(target: str, endpoint: Optional[str]) -> Any:
+    """
+    Points the application at the target and returns a mock to stop, if
+    any. The fakes of ``--target fake`` are installed by :func:`main`.
+    """
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("METRICS_ENABLED", "false")
+
+    if target == "moto":
+        from moto import mock_aws
+
+        os.environ["AWS_ENDPOINT_URL"] = ""
+        mock = mock_aws()
+        mock.start()
+        return mock
+
+    if target == "fake":
+        return None
+
+    os.environ["AWS_ENDPOINT_URL"] = endpoint or LOCALSTACK_ENDPOINT
+    return None
+
+
+def inject_faults(s3: Any, sqs: Any, args: argparse.Namespace) -> None:
+    """
+    Gives the fakes the latency, capacity and error rates of the options.
+
+    Called once the events are uploaded, so the setup is not slowed down.
+    """
+    from app.adapters.fake_aws import FaultInjector, Latency
+
+    for index, (client, service) in enumerate([(s3, "s3"), (sqs, "sqs")]):
+        client.injector = FaultInjector(
+            Latency.parse(getattr(args, f"fake_{service}_latency")),
+            error_rate=args.fake_error_rate,
+            throttle_rate=args.fake_throttle_rate,
+            max_rps=getattr(args, f"fake_{service}_max_rps"),
+            seed=args.seed + index
+        )
+    sqs.entry_failure_rate = args.fake_entry_failure_rate
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", choices=["moto", "localstack", "fake"],
+                        default="moto")
+    parser.add_argument("--endpoint", help="Endpoint for --target localstack")
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--records-per-event", type=int, default=1)
+    parser.add_argument("--transcript-bytes", type=int, default=2048)
+    parser.add_argument("--replay", help="JSON or JSON Lines file of events")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float,
+                        help="Events per second; closed loop when omitted")
+    parser.add_argument("--duration", type=float,
+                        help="With --rate, send rate x duration events")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="Write the summary as JSON here")
+    fake = parser.add_argument_group("--target fake")
+    fake.add_argument("--fake-s3-latency", default="none",
+                      help="Per-call latency in ms: none, fixed:<ms>, "
+                      "uniform:<min>:<max> or lognormal:<median>:<sigma>")
+    fake.add_argument("--fake-sqs-latency", default="none")
+    fake.add_argument("--fake-s3-max-rps", type=float, default=0,
+                      help="Calls per second before S3 throttles; 0 is "
+                      "unlimited")
+    fake.add_argument("--fake-sqs-max-rps", type=float, default=0)
+    fake.add_argument("--fake-error-rate", type=float, default=0,
+                      help="Share of calls failing with a 500")
+    fake.add_argument("--fake-throttle-rate", type=float, default=0,
+                      help="Share of calls throttled at random")
+    fake.add_argument("--fake-entry-failure-rate", type=float, default=0,
+                      help="Share of SendMessageBatch entries failed")
+    args = parser.parse_args()
+
+    mock = configure_target(args.target, args.endpoint)
+    try:
+        if args.target == "fake":
+            from app.adapters.fake_aws import install_fake_aws
+
+            s3, sqs = install_fake_aws()
+        else:
+            import boto3
+
+            endpoint = os.environ["AWS_ENDPOINT_URL"] or None
+            s3 = boto3.client("s3", endpoint_url=endpoint)
+            sqs = boto3.client("sqs", endpoint_url=endpoint)
+        os.environ.setdefault(
+            "SQS_QUEUE_URL",
+            sqs.create_queue(QueueName=QUEUE)["QueueUrl"]
+        )
+
+        if args.replay:
+            events = load_events(args.replay)
+        else:
+            count = args.events
+            if args.rate and args.duration:
+                count = int(args.rate * args.duration)
+            try:
+                s3.create_bucket(Bucket=BUCKET)
+            except s3.exceptions.BucketAlreadyOwnedByYou:
+                pass
+            events = generate_events(
+                s3,
+                count,
+                args.records_per_event,
+                args.transcript_bytes,
+                args.seed
+            )
+
+        from app.handler import handler
+
+        if args.target == "fake":
+            inject_faults(s3, sqs, args)
+        summary = LoadRun(handler, args.concurrency, args.rate).run(events)
+        if args.target == "fake":
+            summary["fake_s3"] = s3.injector.stats()
+            summary["fake_sqs"] = sqs.injector.stats()
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    for name, value in summary.items():
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        print(f"{name:>18}: {value}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
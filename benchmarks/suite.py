@@ -0,0 +1,353 @@
+"""
+Benchmark suite: every pipeline stage, saved as JSON and compared for
+regressions.
+
+Runs on synthetic Spanish transcripts from 100 B to 500 KB and lexicons from
+10 to 50k keywords, with fixed seeds so that two runs measure the same work:
+
+* ``classify``: ``classify_sentiment`` per transcript size, and
+  ``KeywordMatcher.find_all`` per lexicon size on a 10 KB transcript;
+* ``parse``: ``codec.loads`` and ``parse_json_object`` of the raw object;
+* ``transform``: ``process_transcript`` on the parsed dict and
+  ``process_transcript_json`` on the raw bytes;
+* ``encode``: ``encode_message``, the body sent by ``send_message_to_queue``;
+* ``handler``: end-to-end ``handler`` latency (p50 and p95) against
+  in-process moto S3 and SQS, so no LocalStack is needed.
+
+Every result is a time per operation in seconds, so lower is better.
+``compare`` exits with code 1 when a result of the current run is slower
+than the baseline by more than the threshold.
+
+Usage:
+    python -m benchmarks.suite run [--output bench.json] [--quick]
+    python -m benchmarks.suite compare baseline.json bench.json [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from benchmarks.bench_codec import PHRASES, best_of
+from benchmarks.bench_keyword_matcher import make_lexicon
+
+TRANSCRIPT_SIZES = [100, 1024, 10 * 1024, 100 * 1024, 500 * 1024]
+LEXICON_SIZES = [10, 1000, 10000, 50000]
+QUICK_TRANSCRIPT_SIZES = [100, 10 * 1024]
+QUICK_LEXICON_SIZES = [10, 1000]
+LEXICON_TRANSCRIPT_BYTES = 10 * 1024
+DEFAULT_THRESHOLD = 0.2
+
+BUCKET = "bench-suite"
+
+CONTEXT = SimpleNamespace(
+    function_name="lynza-bench",
+    function_version="$LATEST",
+    invoked_function_arn="arn:aws:lambda:us-east-1:000000000000:function:b",
+    memory_limit_in_mb=128,
+    aws_request_id="bench",
+    log_group_name="/aws/lambda/lynza-bench",
+    log_stream_name="bench",
+)
+
+
+def make_transcript(size: int, rng: random.Random) -> str:
+    """
+    Builds a Spanish transcript of roughly ``size`` UTF-8 bytes.
+    """
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        phrase = rng.choice(PHRASES)
+        parts.append(phrase)
+        length += len(phrase.encode("utf-8")) + 1
+    return " ".join(parts).encode("utf-8")[:size].decode("utf-8", "ignore")
+
+
+def make_document(size: int, rng: random.Random) -> Dict[str, Any]:
+    """
+    Builds an input document whose transcript is roughly ``size`` bytes.
+    """
+    return {
+        "interaction_id": f"CHAT-{size}",
+        "customer_id": "CUST-999",
+        "transcript": make_transcript(size, rng),
+    }
+
+
+def size_label(size: int) -> str:
+    return f"{size // 1024}KB" if size >= 1024 else f"{size}B"
+
+
+def bench_classify(
+    sizes: List[int],
+    lexicon_sizes: List[int],
+    rng: random.Random
+) -> Dict[str, float]:
+    """
+    Measures the classifier per transcript size and per lexicon size.
+    """
+    from app.domain.keyword_matcher import KeywordMatcher
+    from app.domain.sentiment_analysis import classify_sentiment
+
+    results = {}
+    for size in sizes:
+        transcript = make_transcript(size, rng)
+        results[f"classify/transcript={size_label(size)}"] = best_of(
+            lambda: classify_sentiment(transcript)
+        )
+
+    transcript = make_transcript(LEXICON_TRANSCRIPT_BYTES, rng).lower()
+    for lexicon_size in lexicon_sizes:
+        matcher = KeywordMatcher(make_lexicon(lexicon_size, rng))
+        results[f"classify/lexicon={lexicon_size}"] = best_of(
+            lambda: matcher.find_all(transcript)
+        )
+    return results
+
+
+def bench_payload_stages(
+    sizes: List[int],
+    rng: random.Random
+) -> Dict[str, float]:
+    """
+    Measures parsing, validation and message encoding per transcript size.
+    """
+    from app.adapters.message_bus import encode_message
+    from app.adapters.storage import parse_json_object
+    from app.domain.sentiment_analysis import (
+        process_transcript,
+        process_transcript_json,
+    )
+    from app.utils import codec
+
+    results = {}
+    for size in sizes:
+        label = size_label(size)
+        document = make_document(size, rng)
+        raw = codec.dumps(document)
+        transformed = process_transcript(document)
+
+        results[f"parse/loads/{label}"] = best_of(lambda: codec.loads(raw))
+        results[f"parse/object/{label}"] = best_of(
+            lambda: parse_json_object(raw, BUCKET, "bench.json")
+        )
+        results[f"transform/dict/{label}"] = best_of(
+            lambda: process_transcript(document)
+        )
+        results[f"transform/bytes/{label}"] = best_of(
+            lambda: process_transcript_json(raw)
+        )
+        results[f"encode/message/{label}"] = best_of(
+            lambda: encode_message(transformed)
+        )
+    return results
+
+
+def bench_handler(
+    sizes: List[int],
+    invocations: int,
+    rng: random.Random
+) -> Dict[str, float]:
+    """
+    Measures end-to-end handler latency against in-process moto.
+
+    The application is pointed at moto's default endpoints with fake
+    credentials, as in the ``moto_aws`` test fixture, and its cached clients
+    are reset so that they are created inside the mock. Metrics are turned
+    off, so the timings exclude EMF serialization and stdout stays readable.
+    """
+    os.environ.update(
+        AWS_ENDPOINT_URL="",
+        AWS_DEFAULT_REGION="us-east-1",
+        AWS_ACCESS_KEY_ID="testing",
+        AWS_SECRET_ACCESS_KEY="testing",
+    )
+    os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+
+    import boto3
+    from moto import mock_aws
+
+    from app.adapters import aws_clients, message_bus, storage
+    from app.handler import handler
+    from app.utils import codec, instrumentation
+
+    metrics_enabled = instrumentation.METRICS_ENABLED
+    instrumentation.METRICS_ENABLED = False
+    results = {}
+    with mock_aws():
+        aws_clients._session = None
+        storage.s3 = None
+        message_bus.sqs = None
+
+        s3 = boto3.client("s3", region_name="us-east-1")
+        sqs = boto3.client("sqs", region_name="us-east-1")
+        s3.create_bucket(Bucket=BUCKET)
+        os.environ["SQS_QUEUE_URL"] = sqs.create_queue(QueueName=BUCKET)[
+            "QueueUrl"
+        ]
+
+        for size in sizes:
+            label = size_label(size)
+            key = f"transcripts/{label}.json"
+            s3.put_object(
+                Bucket=BUCKET,
+                Key=key,
+                Body=codec.dumps(make_document(size, rng))
+            )
+            event = {
+                "Records": [
+                    {"s3": {"bucket": {"name": BUCKET}, "object": {"key": key}}}
+                ]
+            }
+
+            handler(event, CONTEXT)
+            latencies = []
+            for _ in range(invocations):
+                start = time.perf_counter()
+                handler(event, CONTEXT)
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            results[f"handler/p50/{label}"] = statistics.median(latencies)
+            results[f"handler/p95/{label}"] = latencies[
+                min(len(latencies) - 1, int(len(latencies) * 0.95))
+            ]
+
+    aws_clients._session = None
+    storage.s3 = None
+    message_bus.sqs = None
+    instrumentation.METRICS_ENABLED = metrics_enabled
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    from app.utils import codec
+
+    sizes = QUICK_TRANSCRIPT_SIZES if args.quick else TRANSCRIPT_SIZES
+    lexicon_sizes = QUICK_LEXICON_SIZES if args.quick else LEXICON_SIZES
+    invocations = 10 if args.quick else args.invocations
+
+    results: Dict[str, float] = {}
+    stages: Dict[str, Callable[[], Dict[str, float]]] = {
+        "classify": lambda: bench_classify(
+            sizes, lexicon_sizes, random.Random(args.seed)
+        ),
+        "payload": lambda: bench_payload_stages(
+            sizes, random.Random(args.seed)
+        ),
+        "handler": lambda: bench_handler(
+            sizes, invocations, random.Random(args.seed)
+        ),
+    }
+    for name in args.stages:
+        stage_results = stages[name]()
+        for metric, seconds in stage_results.items():
+            print(f"{metric:>32} {seconds * 1e6:>12.1f} µs")
+        results.update(stage_results)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "codec": codec.CODEC_NAME,
+            "seed": args.seed,
+            "quick": args.quick,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"results written to {args.output}")
+    return 0
+
+
+def compare_results(
+    baseline: Dict[str, float],
+    current: Dict[str, float],
+    threshold: float
+) -> List[str]:
+    """
+    Lists the metrics of ``current`` that regressed against ``baseline``.
+
+    Args:
+        baseline (Dict[str, float]): Seconds per operation by metric.
+        current (Dict[str, float]): Seconds per operation by metric.
+        threshold (float): Tolerated relative slowdown, such as 0.2 for 20%.
+
+    Returns:
+        List[str]: The regressed metric names; metrics missing from either
+            run are ignored.
+    """
+    return [
+        metric
+        for metric in sorted(baseline.keys() & current.keys())
+        if current[metric] > baseline[metric] * (1 + threshold)
+    ]
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    print(f"{'metric':>32} {'baseline µs':>12} {'current µs':>12} {'change':>8}")
+    for metric in sorted(baseline.keys() | current.keys()):
+        if metric not in baseline or metric not in current:
+            print(f"{metric:>32} {'only in one run':>34}")
+            continue
+        change = current[metric] / baseline[metric] - 1
+        print(
+            f"{metric:>32} {baseline[metric] * 1e6:>12.1f} "
+            f"{current[metric] * 1e6:>12.1f} {change:>+7.1%}"
+        )
+
+    regressions = compare_results(baseline, current, args.threshold)
+    if regressions:
+        print(
+            f"FAIL: {len(regressions)} metric(s) slower by more than "
+            f"{args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite")
+    run_parser.add_argument("--output", default="bench.json")
+    run_parser.add_argument("--quick", action="store_true")
+    run_parser.add_argument("--invocations", type=int, default=50)
+    run_parser.add_argument("--seed", type=int, default=11)
+    run_parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=["classify", "payload", "handler"],
+        default=["classify", "payload", "handler"],
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Fail when the current run regressed"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+DEFAULT_CONNECT_TIMEOUT = 2.0
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_RETRY_MODE = "standard"
+DEFAULT_MAX_ATTEMPTS = 3
+
+_session: Any = None
+_session_lock = threading.Lock()
+
+
+def endpoint_url() -> Optional[str]:
+    """
+    Returns the endpoint override for AWS clients.
+
+    ``AWS_ENDPOINT_URL`` defaults to LocalStack; set it to an empty string
+    to use the regular AWS endpoints.
+
+    Returns:
+        Optional[str]: The endpoint URL, or None for the AWS defaults.
+    """
+    return os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566") or None
+
+
+def client_config_options() -> Dict[str, Any]:
+    """
+    Returns the keyword arguments of the shared client configuration.
+
+    Exposed separately from :func:`client_config` so that other client
+    implementations, such as aiobotocore's ``AioConfig``, can reuse them.
+
+    Returns:
+        Dict[str, Any]: ``botocore.config.Config`` keyword arguments.
+    """
+    return {
+        "max_pool_connections": int(
+            os.getenv("AWS_MAX_POOL_CONNECTIONS", DEFAULT_MAX_POOL_CONNECTIONS)
+        ),
+        "tcp_keepalive": (
+            os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+        ),
+        "connect_timeout": float(
+            os.getenv("AWS_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+        ),
+        "read_timeout": float(
+            os.getenv("AWS_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+        ),
+        "retries": {
+            "mode": os.getenv("AWS_RETRY_MODE", DEFAULT_RETRY_MODE),
+            "total_max_attempts": int(
+                os.getenv("AWS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+            ),
+        },
+    }
+
+
+def client_config() -> Any:
+    """
+    Builds the botocore configuration shared by every client.
+
+    Settings are read from the environment so they can be tuned per
+    deployment:
+
+    * ``AWS_MAX_POOL_CONNECTIONS``: HTTP connections kept per client; should
+      be at least the number of worker threads issuing calls concurrently.
+    * ``AWS_TCP_KEEPALIVE``: ``"true"`` (default) keeps idle TLS connections
+      alive between invocations.
+    * ``AWS_CONNECT_TIMEOUT`` / ``AWS_READ_TIMEOUT``: socket timeouts in
+      seconds.
+    * ``AWS_RETRY_MODE`` / ``AWS_MAX_ATTEMPTS``: botocore retry strategy
+      (``legacy``, ``standard`` or ``adaptive``) and total attempts.
+
+    Returns:
+        Any: A ``botocore.config.Config`` instance.
+    """
+    from botocore.config import Config
+
+    return Config(**client_config_options())
+
+
+def get_session() -> Any:
+    """
+    Returns the boto3 session shared by every client, creating it once.
+
+    Sharing one session means credentials and the service model loader are
+    resolved once per container instead of once per client.
+
+    Returns:
+        Any: A ``boto3.session.Session`` instance.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import boto3.session
+
+                _session = boto3.session.Session(
+                    region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+                )
+    return _session
+
+
+def create_client(service: str, config: Optional[Any] = None) -> Any:
+    """
+    Creates a boto3 client for the given AWS service.
+
+    boto3 is imported here rather than at module level so that importing the
+    adapters stays cheap on cold starts; its import cost is only paid by the
+    first invocation that actually talks to AWS. Clients are built from the
+    shared session with a tuned connection pool (see :func:`client_config`),
+    so concurrent calls reuse warm connections rather than queueing for one
+    of botocore's default 10.
+
+    Sessions are not thread-safe, so client creation is serialized; the
+    returned client is safe to share between threads.
+
+    Args:
+        service (str): AWS service name, such as ``"s3"`` or ``"sqs"``.
+        config (Optional[Any]): ``botocore.config.Config`` merged over the
+            shared configuration.
+
+    Returns:
+        Any: A configured boto3 client.
+    """
+    session = get_session()
+    merged = client_config()
+    if config is not None:
+        merged = merged.merge(config)
+
+    with _session_lock:
+        return session.client(
+            service,
+            endpoint_url=endpoint_url(),
+            config=merged
+        )
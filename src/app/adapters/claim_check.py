@@ -0,0 +1,150 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional, Union
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.adapters.message_compression import decompress_body
+from app.adapters.resilience import CircuitOpenError, get_guard
+from app.adapters.storage import get_s3_client
+from app.utils import codec
+
+CLAIM_CHECK_FIELD = "claim_check"
+DEFAULT_THRESHOLD_BYTES = 240 * 1024
+DEFAULT_PREFIX = "claim-checks/"
+
+
+def claim_check_bucket() -> Optional[str]:
+    """
+    Returns the bucket that stores offloaded bodies, if claim-check is on.
+
+    Returns:
+        Optional[str]: Value of ``CLAIM_CHECK_BUCKET``, or None when
+            offloading is disabled.
+    """
+    return os.getenv("CLAIM_CHECK_BUCKET") or None
+
+
+def claim_check_threshold() -> int:
+    """
+    Returns the body size, in bytes, above which bodies are offloaded.
+
+    Defaults to 240 KB, leaving room under the 256 KB SQS limit for message
+    attributes. Override with ``CLAIM_CHECK_THRESHOLD_BYTES``.
+
+    Returns:
+        int: The threshold in bytes.
+    """
+    return int(os.getenv("CLAIM_CHECK_THRESHOLD_BYTES", DEFAULT_THRESHOLD_BYTES))
+
+
+def offload_if_needed(body: bytes) -> bytes:
+    """
+    Replaces an oversized message body with a claim-check pointer.
+
+    Bodies at or under the threshold, or any body when no claim-check bucket
+    is configured, are returned unchanged. Larger bodies are written to S3
+    under a key derived from their SHA-256 digest, so identical bodies are
+    stored once, and a small pointer message is returned instead.
+
+    Args:
+        body (bytes): The already serialized message body.
+
+    Returns:
+        bytes: The body to send to SQS.
+
+    Raises:
+        ValueError: If the body could not be written to S3.
+    """
+    bucket = claim_check_bucket()
+    if bucket is None or len(body) <= claim_check_threshold():
+        return body
+
+    digest = hashlib.sha256(body).hexdigest()
+    key = f"{os.getenv('CLAIM_CHECK_PREFIX', DEFAULT_PREFIX)}{digest}.json"
+    try:
+        get_guard("s3").call(
+            get_s3_client().put_object,
+            Bucket=bucket,
+            Key=key,
+            Body=body,
+            ContentType="application/json"
+        )
+    except (BotoCoreError, CircuitOpenError, ClientError) as e:
+        raise ValueError(
+            f"Failed to store claim-check body in bucket '{bucket}': {e}"
+        ) from e
+
+    return codec.dumps({
+        CLAIM_CHECK_FIELD: {
+            "bucket": bucket,
+            "key": key,
+            "sha256": digest,
+            "size": len(body),
+        }
+    })
+
+
+def is_claim_check(message: Any) -> bool:
+    """
+    Checks whether a parsed message is a claim-check pointer.
+
+    Args:
+        message (Any): Parsed SQS message body.
+
+    Returns:
+        bool: True if the message only carries a claim-check pointer.
+    """
+    return (
+        isinstance(message, dict)
+        and set(message) == {CLAIM_CHECK_FIELD}
+        and isinstance(message[CLAIM_CHECK_FIELD], dict)
+    )
+
+
+def read_message_body(
+    body: Union[str, bytes],
+    content_encoding: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Parses an SQS message body, resolving claim-check pointers.
+
+    Intended for consumers of the queue: compressed bodies are decoded
+    first, inline messages are parsed as they are, and pointer messages are
+    replaced with the payload fetched from S3 after verifying its SHA-256
+    digest.
+
+    Args:
+        body (Union[str, bytes]): The SQS message body.
+        content_encoding (Optional[str]): The ``content-encoding`` message
+            attribute, as returned by
+            :func:`app.adapters.message_compression.get_content_encoding`.
+
+    Returns:
+        Dict[str, Any]: The original message payload.
+
+    Raises:
+        ValueError: If the body cannot be decoded or is not valid JSON, or
+            the offloaded payload cannot be retrieved or does not match its
+            digest.
+    """
+    message = codec.loads(decompress_body(body, content_encoding))
+    if not is_claim_check(message):
+        return message
+
+    pointer = message[CLAIM_CHECK_FIELD]
+    try:
+        response = get_s3_client().get_object(
+            Bucket=pointer["bucket"],
+            Key=pointer["key"]
+        )
+    except ClientError as e:
+        raise ValueError(
+            f"Failed to retrieve claim-check body '{pointer['key']}': {e}"
+        ) from e
+
+    payload = response["Body"].read()
+    if hashlib.sha256(payload).hexdigest() != pointer["sha256"]:
+        raise ValueError(
+            f"Claim-check body '{pointer['key']}' does not match its digest"
+        )
+    return codec.loads(payload)
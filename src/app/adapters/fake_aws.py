@@ -0,0 +1,638 @@
+import hashlib
+import io
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from app.adapters.message_bus import SQS_MAX_BATCH_BYTES, SQS_MAX_BATCH_ENTRIES
+
+FAKE_ACCOUNT_ID = "000000000000"
+
+THROTTLING_ERRORS = {
+    "s3": ("SlowDown", 503),
+    "sqs": ("ThrottlingException", 400),
+}
+
+
+def client_error(code: str, status: int, operation: str) -> ClientError:
+    """
+    Builds a ``ClientError`` shaped like the ones botocore raises.
+
+    Args:
+        code (str): The AWS error code.
+        status (int): The HTTP status code.
+        operation (str): The operation name, such as ``"GetObject"``.
+
+    Returns:
+        ClientError: The error.
+    """
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": f"Injected {code}"},
+            "ResponseMetadata": {"HTTPStatusCode": status},
+        },
+        operation
+    )
+
+
+class Latency:
+    """
+    Distribution of the latency of a call, in seconds.
+
+    Args:
+        kind (str): ``"none"``, ``"fixed"`` (``a`` seconds), ``"uniform"``
+            (between ``a`` and ``b`` seconds) or ``"lognormal"`` (median
+            ``a`` seconds, shape ``b``; long-tailed like real services).
+        a (float): First parameter of the distribution.
+        b (float): Second parameter of the distribution.
+
+    Raises:
+        ValueError: If the kind is unknown.
+    """
+
+    KINDS = ("none", "fixed", "uniform", "lognormal")
+
+    def __init__(self, kind: str = "none", a: float = 0.0, b: float = 0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unsupported latency distribution: '{kind}'")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """
+        Parses a distribution from a ``<kind>[:<a>[:<b>]]`` specification
+        in milliseconds, such as ``fixed:5``, ``uniform:2:10`` or
+        ``lognormal:20:0.5`` (the shape of a lognormal has no unit).
+
+        Args:
+            spec (str): The specification.
+
+        Returns:
+            Latency: The distribution.
+
+        Raises:
+            ValueError: If the specification is invalid.
+        """
+        kind, *values = spec.strip().split(":")
+        try:
+            numbers = [float(value) for value in values]
+        except ValueError as e:
+            raise ValueError(f"Invalid latency specification: '{spec}'") from e
+        expected = {"none": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if expected.get(kind) != len(numbers):
+            raise ValueError(f"Invalid latency specification: '{spec}'")
+
+        a = numbers[0] / 1000 if numbers else 0.0
+        b = numbers[1] if len(numbers) > 1 else 0.0
+        if kind == "uniform":
+            b /= 1000
+        return cls(kind, a, b)
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draws one latency.
+
+        Args:
+            rng (random.Random): Source of randomness.
+
+        Returns:
+            float: The latency in seconds.
+        """
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return self.a * math.exp(rng.gauss(0.0, self.b))
+        return 0.0
+
+
+class FaultInjector:
+    """
+    Delays and fails the calls made to a fake client.
+
+    Every call first waits for a latency sample. It is then throttled when
+    more than ``max_rps`` calls were made in the current second, or at
+    random with ``throttle_rate``, and otherwise fails with an
+    ``InternalError`` with ``error_rate``. Draws come from a seeded
+    generator, so a sequential run replays exactly; with concurrent callers
+    only the order in which draws are handed out varies. Safe to share
+    between threads.
+
+    Args:
+        latency (Optional[Latency]): Latency of every call; none by default.
+        error_rate (float): Share of calls failing with a 500.
+        throttle_rate (float): Share of calls throttled at random.
+        max_rps (float): Calls per second the service accepts before it
+            throttles; ``0`` means unlimited.
+        seed (int): Seed of the random draws.
+        clock (Callable[[], float]): Returns monotonic seconds.
+        sleep (Callable[[float], None]): Waits for the given seconds.
+
+    Attributes:
+        calls (int): Calls seen.
+        throttled (int): Calls failed with a throttling error.
+        errors (int): Calls failed with an ``InternalError``.
+        delay (float): Total latency injected, in seconds.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Latency] = None,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_rps: float = 0.0,
+        seed: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self.latency = latency or Latency()
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self._rng = random.Random(seed)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._window = -1
+        self._window_calls = 0
+
+        self.calls = 0
+        self.throttled = 0
+        self.errors = 0
+        self.delay = 0.0
+
+    def roll(self, rate: float) -> bool:
+        """
+        Draws whether an event of the given probability happens.
+
+        Args:
+            rate (float): The probability.
+
+        Returns:
+            bool: True if it happens.
+        """
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    def before_call(self, service: str, operation: str) -> None:
+        """
+        Waits for the latency of a call and raises its injected failure.
+
+        Args:
+            service (str): ``"s3"`` or ``"sqs"``.
+            operation (str): The operation name, such as ``"GetObject"``.
+
+        Raises:
+            ClientError: If the call is throttled or fails.
+        """
+        with self._lock:
+            self.calls += 1
+            delay = self.latency.sample(self._rng)
+            self.delay += delay
+            throttle_roll = self._rng.random()
+            error_roll = self._rng.random()
+
+            window = int(self._clock())
+            if window != self._window:
+                self._window = window
+                self._window_calls = 0
+            self._window_calls += 1
+            over_capacity = bool(self.max_rps) and (
+                self._window_calls > self.max_rps
+            )
+
+            throttled = over_capacity or throttle_roll < self.throttle_rate
+            failed = not throttled and error_roll < self.error_rate
+            if throttled:
+                self.throttled += 1
+            elif failed:
+                self.errors += 1
+
+        if delay > 0:
+            self._sleep(delay)
+        if throttled:
+            code, status = THROTTLING_ERRORS[service]
+            raise client_error(code, status, operation)
+        if failed:
+            raise client_error("InternalError", 500, operation)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters of the injector.
+
+        Returns:
+            Dict[str, Any]: Calls, throttled calls, failed calls and the
+                total injected latency in seconds.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "delay_s": self.delay,
+            }
+
+
+class _FakeClient:
+    service = ""
+
+    def __init__(self, injector: Optional[FaultInjector] = None) -> None:
+        self.injector = injector
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str) -> None:
+        if self.injector is not None:
+            self.injector.before_call(self.service, operation)
+
+
+class _ListObjectsPaginator:
+    def __init__(self, client: "FakeS3Client") -> None:
+        self._client = client
+
+    def paginate(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        while True:
+            page = self._client.list_objects_v2(**kwargs)
+            yield page
+            if not page["IsTruncated"]:
+                return
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+class FakeS3Client(_FakeClient):
+    """
+    In-memory S3 client.
+
+    Supports ``create_bucket``, ``put_object``, ``get_object``,
+    ``head_object``, ``delete_object``, ``list_objects_v2`` and its
+    paginator. Bodies are returned as streams, like botocore's.
+
+    Args:
+        injector (Optional[FaultInjector]): Latency and failures of every
+            call, or None.
+    """
+
+    service = "s3"
+
+    def __init__(self, injector: Optional[FaultInjector] = None) -> None:
+        super().__init__(injector)
+        self._buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def create_bucket(self, Bucket: str, **kwargs: Any) -> Dict[str, Any]:
+        self._call("CreateBucket")
+        with self._lock:
+            self._buckets.setdefault(Bucket, {})
+        return {"Location": f"/{Bucket}"}
+
+    def put_object(
+        self,
+        Bucket: str,
+        Key: str,
+        Body: Any = b"",
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("PutObject")
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        elif hasattr(Body, "read"):
+            Body = Body.read()
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        stored = {
+            "Body": bytes(Body),
+            "ETag": etag,
+            "ContentType": kwargs.get("ContentType", "binary/octet-stream"),
+        }
+        if kwargs.get("ContentEncoding"):
+            stored["ContentEncoding"] = kwargs["ContentEncoding"]
+        with self._lock:
+            self._bucket(Bucket, "PutObject")[Key] = stored
+        return {"ETag": etag}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict[str, Any]:
+        self._call("GetObject")
+        stored = self._object(Bucket, Key, "GetObject")
+        response = self._metadata(stored)
+        response["Body"] = io.BytesIO(stored["Body"])
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict[str, Any]:
+        self._call("HeadObject")
+        return self._metadata(self._object(Bucket, Key, "HeadObject"))
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict:
+        self._call("DeleteObject")
+        with self._lock:
+            self._bucket(Bucket, "DeleteObject").pop(Key, None)
+        return {}
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = "",
+        StartAfter: str = "",
+        ContinuationToken: Optional[str] = None,
+        MaxKeys: int = 1000,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("ListObjectsV2")
+        after = ContinuationToken or StartAfter
+        with self._lock:
+            keys = sorted(
+                key for key in self._bucket(Bucket, "ListObjectsV2")
+                if key.startswith(Prefix) and key > after
+            )
+            objects = self._buckets[Bucket]
+            page = [
+                {
+                    "Key": key,
+                    "Size": len(objects[key]["Body"]),
+                    "ETag": objects[key]["ETag"],
+                }
+                for key in keys[:MaxKeys]
+            ]
+        response: Dict[str, Any] = {
+            "KeyCount": len(page),
+            "IsTruncated": len(keys) > MaxKeys,
+        }
+        if page:
+            response["Contents"] = page
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]["Key"]
+        return response
+
+    def get_paginator(self, operation: str) -> _ListObjectsPaginator:
+        if operation != "list_objects_v2":
+            raise NotImplementedError(f"No fake paginator for '{operation}'")
+        return _ListObjectsPaginator(self)
+
+    def objects(self, bucket: str, prefix: str = "") -> Dict[str, bytes]:
+        """
+        Returns the content of the objects of a bucket, bypassing the
+        injector.
+
+        Args:
+            bucket (str): Name of the bucket.
+            prefix (str): Only return the keys with this prefix.
+
+        Returns:
+            Dict[str, bytes]: Content per key.
+        """
+        with self._lock:
+            return {
+                key: stored["Body"]
+                for key, stored in self._buckets.get(bucket, {}).items()
+                if key.startswith(prefix)
+            }
+
+    def _bucket(self, bucket: str, operation: str) -> Dict[str, Dict]:
+        objects = self._buckets.get(bucket)
+        if objects is None:
+            raise client_error("NoSuchBucket", 404, operation)
+        return objects
+
+    def _object(self, bucket: str, key: str, operation: str) -> Dict:
+        with self._lock:
+            stored = self._bucket(bucket, operation).get(key)
+        if stored is None:
+            raise client_error("NoSuchKey", 404, operation)
+        return stored
+
+    @staticmethod
+    def _metadata(stored: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = {k: v for k, v in stored.items() if k != "Body"}
+        metadata["ContentLength"] = len(stored["Body"])
+        return metadata
+
+
+class FakeSqsClient(_FakeClient):
+    """
+    In-memory SQS client.
+
+    Supports ``create_queue``, ``get_queue_url``, ``send_message``,
+    ``send_message_batch``, ``receive_message`` and ``delete_message``, and
+    enforces the limits of 10 entries and 256 KB per request, attributes
+    included.
+
+    Args:
+        injector (Optional[FaultInjector]): Latency and failures of every
+            call, or None.
+        entry_failure_rate (float): Share of the entries of a successful
+            ``send_message_batch`` reported in its ``Failed`` list.
+    """
+
+    service = "sqs"
+
+    def __init__(
+        self,
+        injector: Optional[FaultInjector] = None,
+        entry_failure_rate: float = 0.0
+    ) -> None:
+        super().__init__(injector)
+        self.entry_failure_rate = entry_failure_rate
+        self._queues: Dict[str, List[Dict[str, Any]]] = {}
+
+    def create_queue(self, QueueName: str, **kwargs: Any) -> Dict[str, str]:
+        self._call("CreateQueue")
+        url = self._url(QueueName)
+        with self._lock:
+            self._queues.setdefault(url, [])
+        return {"QueueUrl": url}
+
+    def get_queue_url(self, QueueName: str, **kwargs: Any) -> Dict[str, str]:
+        self._call("GetQueueUrl")
+        url = self._url(QueueName)
+        with self._lock:
+            self._queue(url, "GetQueueUrl")
+        return {"QueueUrl": url}
+
+    def send_message(
+        self,
+        QueueUrl: str,
+        MessageBody: str,
+        MessageAttributes: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> Dict[str, str]:
+        self._call("SendMessage")
+        message = self._message(MessageBody, MessageAttributes)
+        if message["size"] > SQS_MAX_BATCH_BYTES:
+            raise client_error("InvalidParameterValue", 400, "SendMessage")
+        with self._lock:
+            self._queue(QueueUrl, "SendMessage").append(message)
+        return {"MessageId": message["MessageId"]}
+
+    def send_message_batch(
+        self,
+        QueueUrl: str,
+        Entries: List[Dict[str, Any]],
+        **kwargs: Any
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        operation = "SendMessageBatch"
+        self._call(operation)
+        if not Entries:
+            raise client_error(
+                "AWS.SimpleQueueService.EmptyBatchRequest", 400, operation
+            )
+        if len(Entries) > SQS_MAX_BATCH_ENTRIES:
+            raise client_error(
+                "AWS.SimpleQueueService.TooManyEntriesInBatchRequest",
+                400,
+                operation
+            )
+        messages = [
+            self._message(entry["MessageBody"], entry.get("MessageAttributes"))
+            for entry in Entries
+        ]
+        if sum(message["size"] for message in messages) > SQS_MAX_BATCH_BYTES:
+            raise client_error(
+                "AWS.SimpleQueueService.BatchRequestTooLong", 400, operation
+            )
+
+        successful, failed = [], []
+        delivered = []
+        for entry, message in zip(Entries, messages, strict=True):
+            if self.injector is not None and self.injector.roll(
+                self.entry_failure_rate
+            ):
+                failed.append({
+                    "Id": entry["Id"],
+                    "SenderFault": False,
+                    "Code": "InternalError",
+                    "Message": "Injected entry failure",
+                })
+                continue
+            delivered.append(message)
+            successful.append(
+                {"Id": entry["Id"], "MessageId": message["MessageId"]}
+            )
+        with self._lock:
+            self._queue(QueueUrl, operation).extend(delivered)
+        return {"Successful": successful, "Failed": failed}
+
+    def receive_message(
+        self,
+        QueueUrl: str,
+        MaxNumberOfMessages: int = 1,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("ReceiveMessage")
+        with self._lock:
+            queue = self._queue(QueueUrl, "ReceiveMessage")
+            received = queue[:MaxNumberOfMessages]
+            del queue[:MaxNumberOfMessages]
+        if not received:
+            return {}
+        return {"Messages": [self._received(message) for message in received]}
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **kwargs: Any):
+        self._call("DeleteMessage")
+        return {}
+
+    def messages(self, queue_url: str) -> List[Dict[str, Any]]:
+        """
+        Returns the messages waiting in a queue, without receiving them and
+        bypassing the injector.
+
+        Args:
+            queue_url (str): URL of the queue.
+
+        Returns:
+            List[Dict[str, Any]]: The messages, shaped like those of
+                ``receive_message``.
+        """
+        with self._lock:
+            return [
+                self._received(message)
+                for message in self._queues.get(queue_url, [])
+            ]
+
+    @staticmethod
+    def _url(name: str) -> str:
+        return f"https://sqs.us-east-1.fake/{FAKE_ACCOUNT_ID}/{name}"
+
+    def _queue(self, url: str, operation: str) -> List[Dict[str, Any]]:
+        queue = self._queues.get(url)
+        if queue is None:
+            raise client_error(
+                "AWS.SimpleQueueService.NonExistentQueue", 400, operation
+            )
+        return queue
+
+    @staticmethod
+    def _message(
+        body: Any,
+        attributes: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        size = len(body.encode("utf-8"))
+        for name, attribute in (attributes or {}).items():
+            size += len(name) + len(attribute.get("DataType", "")) + len(
+                str(attribute.get("StringValue", ""))
+            )
+        return {
+            "MessageId": str(uuid.uuid4()),
+            "Body": body,
+            "MessageAttributes": attributes or {},
+            "size": size,
+        }
+
+    @staticmethod
+    def _received(message: Dict[str, Any]) -> Dict[str, Any]:
+        received = {
+            "MessageId": message["MessageId"],
+            "ReceiptHandle": message["MessageId"],
+            "Body": message["Body"],
+        }
+        if message["MessageAttributes"]:
+            received["MessageAttributes"] = message["MessageAttributes"]
+        return received
+
+
+def install_fake_aws(
+    s3: Optional[FakeS3Client] = None,
+    sqs: Optional[FakeSqsClient] = None
+) -> Tuple[FakeS3Client, FakeSqsClient]:
+    """
+    Replaces the shared S3 and SQS clients of the adapters with fakes.
+
+    The fakes implement the subset of the boto3 client API the pipeline
+    calls and fail the way AWS does, with ``ClientError`` codes such as
+    ``SlowDown``, ``NoSuchKey`` or
+    ``AWS.SimpleQueueService.BatchRequestTooLong``, so the whole ``handler``
+    runs against them, guards and batching included, without network,
+    Docker or moto. Give them a :class:`FaultInjector` to model latency,
+    capacity and errors.
+
+    This covers every call made through :func:`app.adapters.storage.get_s3_client`
+    and :func:`app.adapters.message_bus.get_sqs_client`: object reads, the
+    claim check, the S3 output sink and message publishing. The lexicon
+    store, the idempotency store and the asyncio entrypoint create their own
+    clients and are not covered.
+
+    Args:
+        s3 (Optional[FakeS3Client]): The S3 fake; a new one by default.
+        sqs (Optional[FakeSqsClient]): The SQS fake; a new one by default.
+
+    Returns:
+        Tuple[FakeS3Client, FakeSqsClient]: The installed fakes.
+
+    Example:
+        >>> s3, sqs = install_fake_aws()  # doctest: +SKIP
+        >>> s3.injector = FaultInjector(
+        ...     Latency.parse("lognormal:20:0.5"), max_rps=3500
+        ... )  # doctest: +SKIP
+    """
+    from app.adapters import message_bus, storage
+
+    s3 = s3 or FakeS3Client()
+    sqs = sqs or FakeSqsClient()
+    storage.s3 = s3
+    message_bus.sqs = sqs
+    return s3, sqs
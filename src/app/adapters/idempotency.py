@@ -0,0 +1,506 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.adapters.aws_clients import create_client
+from app.utils.parse_event import S3ObjectRef
+
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_CLAIM_SECONDS = 15 * 60
+DEFAULT_CACHE_SIZE = 4096
+
+_cache: Any = None
+_cache_lock = threading.Lock()
+
+
+class IdempotencyStore(ABC):
+    """
+    Persistent record of processed keys, shared between containers.
+
+    Implementations only store the expiry time of each key; expired entries
+    are treated as absent even if the backend has not removed them yet.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[float]:
+        """
+        Returns the expiry time of a key.
+
+        Args:
+            key (str): The idempotency key.
+
+        Returns:
+            Optional[float]: Epoch seconds at which the key expires, or None
+                if the key was never stored.
+        """
+
+    @abstractmethod
+    def put(self, key: str, expires_at: float) -> None:
+        """
+        Records a key as processed until ``expires_at``.
+
+        Args:
+            key (str): The idempotency key.
+            expires_at (float): Epoch seconds at which the key expires.
+        """
+
+    @abstractmethod
+    def claim(self, key: str, expires_at: float, now: float) -> bool:
+        """
+        Records a key until ``expires_at`` unless it is already recorded.
+
+        The check and the write are one atomic operation, so of several
+        callers claiming the same key at once exactly one succeeds.
+
+        Args:
+            key (str): The idempotency key.
+            expires_at (float): Epoch seconds at which the claim expires.
+            now (float): Current epoch seconds; entries expiring at or
+                before it do not block the claim.
+
+        Returns:
+            bool: True if the caller now holds the key.
+        """
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """
+        Forgets a claimed key, so that a retry can claim it again.
+
+        Args:
+            key (str): The idempotency key.
+        """
+
+
+class SqliteIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency store backed by a local SQLite file.
+
+    Meant for tests and local runs; every container has its own file, so it
+    does not deduplicate across Lambda instances.
+
+    Args:
+        path (str): Database file, or ``":memory:"``.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT expires_at FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, expires_at: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO idempotency VALUES (?, ?)",
+                (key, expires_at)
+            )
+
+    def claim(self, key: str, expires_at: float, now: float) -> bool:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM idempotency WHERE key = ? AND expires_at <= ?",
+                (key, now)
+            )
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO idempotency VALUES (?, ?)",
+                (key, expires_at)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM idempotency WHERE key = ?", (key,)
+            )
+
+
+class DynamoDbIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency store backed by a DynamoDB table.
+
+    The table needs a string partition key named ``id``. Enable DynamoDB
+    TTL on the ``expires_at`` attribute so expired keys are purged.
+
+    Args:
+        table_name (str): Name of the DynamoDB table.
+    """
+
+    def __init__(self, table_name: str) -> None:
+        self.table_name = table_name
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_client("dynamodb")
+        return self._client
+
+    def get(self, key: str) -> Optional[float]:
+        try:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key={"id": {"S": key}},
+                ConsistentRead=True
+            )
+        except (BotoCoreError, ClientError) as e:
+            raise RuntimeError(
+                f"Failed to read idempotency key from "
+                f"'{self.table_name}': {e}"
+            ) from e
+        item = response.get("Item")
+        return float(item["expires_at"]["N"]) if item else None
+
+    def put(self, key: str, expires_at: float) -> None:
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "id": {"S": key},
+                    "expires_at": {"N": str(int(expires_at))},
+                }
+            )
+        except (BotoCoreError, ClientError) as e:
+            raise RuntimeError(
+                f"Failed to write idempotency key to "
+                f"'{self.table_name}': {e}"
+            ) from e
+
+    def claim(self, key: str, expires_at: float, now: float) -> bool:
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "id": {"S": key},
+                    "expires_at": {"N": str(int(expires_at))},
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(#id) OR expires_at <= :now"
+                ),
+                ExpressionAttributeNames={"#id": "id"},
+                ExpressionAttributeValues={":now": {"N": str(int(now))}}
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise RuntimeError(
+                f"Failed to claim idempotency key in "
+                f"'{self.table_name}': {e}"
+            ) from e
+        except BotoCoreError as e:
+            raise RuntimeError(
+                f"Failed to claim idempotency key in "
+                f"'{self.table_name}': {e}"
+            ) from e
+        return True
+
+    def release(self, key: str) -> None:
+        try:
+            self.client.delete_item(
+                TableName=self.table_name,
+                Key={"id": {"S": key}}
+            )
+        except (BotoCoreError, ClientError) as e:
+            raise RuntimeError(
+                f"Failed to release idempotency key in "
+                f"'{self.table_name}': {e}"
+            ) from e
+
+
+class IdempotencyCache:
+    """
+    In-container LRU with a TTL in front of an optional persistent store.
+
+    Lookups hit the LRU first and only fall through to the store on a
+    miss, so repeated retries within a warm container cost no network call.
+    Safe to share between threads.
+
+    Work is deduplicated with :meth:`claim`, which checks and records a key
+    in one atomic store operation, so two invocations racing on the same
+    object cannot both process it. A claim lasts ``claim_seconds``; it is
+    extended to ``ttl_seconds`` by :meth:`add` once the work succeeded, or
+    dropped by :meth:`release` when it failed. A claim left behind by an
+    invocation that died blocks the key until it expires.
+
+    Args:
+        store (Optional[IdempotencyStore]): Persistent store, or None to
+            only deduplicate within the container.
+        max_entries (int): Keys kept in the LRU.
+        ttl_seconds (float): How long a key stays recorded.
+        claim_seconds (float): How long a claim holds a key before the
+            work is recorded.
+        clock (Callable[[], float]): Returns the current epoch seconds;
+            injectable for tests.
+
+    Example:
+        >>> cache = IdempotencyCache()
+        >>> cache.claim("s3://bucket/a.json?etag=1")
+        True
+        >>> cache.claim("s3://bucket/a.json?etag=1")
+        False
+        >>> cache.add("s3://bucket/a.json?etag=1")
+        >>> cache.contains("s3://bucket/a.json?etag=1")
+        True
+    """
+
+    def __init__(
+        self,
+        store: Optional[IdempotencyStore] = None,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        claim_seconds: float = DEFAULT_CLAIM_SECONDS,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.claim_seconds = claim_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def contains(self, key: str) -> bool:
+        """
+        Tells whether a key was recorded and has not expired yet.
+
+        Args:
+            key (str): The idempotency key.
+
+        Returns:
+            bool: True if the key is a duplicate.
+        """
+        now = self._clock()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                expires_at = None
+            if expires_at is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+
+        if self.store is not None:
+            expires_at = self.store.get(key)
+            if expires_at is not None and expires_at > now:
+                with self._lock:
+                    self._remember(key, expires_at)
+                    self.hits += 1
+                return True
+
+        with self._lock:
+            self.misses += 1
+        return False
+
+    def claim(self, key: str) -> bool:
+        """
+        Atomically takes a key that is not recorded yet.
+
+        Args:
+            key (str): The idempotency key.
+
+        Returns:
+            bool: True if the caller holds the key and should do the work;
+                False if the key is a duplicate.
+
+        Raises:
+            RuntimeError: If the persistent store cannot be reached.
+        """
+        now = self._clock()
+        expires_at = now + self.claim_seconds
+        with self._lock:
+            recorded = self._entries.get(key)
+            if recorded is not None and recorded > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return False
+            self._remember(key, expires_at)
+
+        if self.store is not None:
+            try:
+                claimed = self.store.claim(key, expires_at, now)
+            except Exception:
+                with self._lock:
+                    self._entries.pop(key, None)
+                raise
+            if not claimed:
+                with self._lock:
+                    self._entries.pop(key, None)
+                    self.hits += 1
+                return False
+
+        with self._lock:
+            self.misses += 1
+        return True
+
+    def release(self, key: str) -> None:
+        """
+        Drops a claim whose work failed, so that a retry can claim it again.
+
+        Args:
+            key (str): The idempotency key.
+
+        Raises:
+            RuntimeError: If the persistent store cannot be written.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.store is not None:
+            self.store.release(key)
+
+    def add(self, key: str) -> None:
+        """
+        Records a key as processed, replacing its claim.
+
+        Args:
+            key (str): The idempotency key.
+
+        Raises:
+            RuntimeError: If the persistent store cannot be written.
+        """
+        expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at)
+        if self.store is not None:
+            self.store.put(key, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the lookup counters since the container started.
+
+        Returns:
+            Dict[str, Any]: Hits, misses and the hit rate (0.0 when there
+                were no lookups).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, expires_at: float) -> None:
+        self._entries[key] = expires_at
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def object_key(location: S3ObjectRef) -> Optional[str]:
+    """
+    Builds the idempotency key of an uploaded object version.
+
+    Args:
+        location (S3ObjectRef): Bucket, key and ETag of the object.
+
+    Returns:
+        Optional[str]: The key, or None when the event carries no ETag, since
+            an overwritten object must not be mistaken for a duplicate.
+    """
+    if not location.etag:
+        return None
+    return f"s3://{location.bucket}/{location.key}?etag={location.etag}"
+
+
+def interaction_key(payload: Dict[str, Any]) -> Optional[str]:
+    """
+    Builds the idempotency key of a transformed transcript.
+
+    Args:
+        payload (Dict[str, Any]): The message about to be published.
+
+    Returns:
+        Optional[str]: The key, or None if the payload has no interaction id.
+    """
+    interaction_id = payload.get("interaction_id")
+    if not interaction_id:
+        return None
+    return f"interaction:{interaction_id}"
+
+
+def create_store(spec: str) -> Optional[IdempotencyStore]:
+    """
+    Builds a persistent store from its ``IDEMPOTENCY_STORE`` specification.
+
+    Args:
+        spec (str): ``memory`` for no persistent store, ``sqlite:<path>``
+            or ``dynamodb:<table>``.
+
+    Returns:
+        Optional[IdempotencyStore]: The store, or None for ``memory``.
+
+    Raises:
+        ValueError: If the specification is not recognized.
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "memory" and not target:
+        return None
+    if kind == "sqlite" and target:
+        return SqliteIdempotencyStore(target)
+    if kind == "dynamodb" and target:
+        return DynamoDbIdempotencyStore(target)
+    raise ValueError(f"Unsupported IDEMPOTENCY_STORE: '{spec}'")
+
+
+def get_idempotency_cache() -> Optional[IdempotencyCache]:
+    """
+    Returns the container-wide idempotency cache, creating it on first use.
+
+    Configured from the environment:
+
+    * ``IDEMPOTENCY_STORE``: unset (default) disables idempotency; see
+      :func:`create_store` for the accepted values.
+    * ``IDEMPOTENCY_TTL_SECONDS``: how long a key is remembered; defaults to
+      six hours, the Lambda asynchronous retry window.
+    * ``IDEMPOTENCY_CACHE_SIZE``: keys kept in the in-container LRU.
+    * ``IDEMPOTENCY_CLAIM_SECONDS``: how long a key claimed by a running
+      invocation stays blocked if the invocation dies; defaults to 15
+      minutes, the longest Lambda timeout.
+
+    Returns:
+        Optional[IdempotencyCache]: The cache, or None when disabled.
+    """
+    global _cache
+    spec = os.getenv("IDEMPOTENCY_STORE")
+    if not spec:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = IdempotencyCache(
+                    store=create_store(spec),
+                    max_entries=int(
+                        os.getenv("IDEMPOTENCY_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+                    ),
+                    ttl_seconds=float(
+                        os.getenv("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+                    ),
+                    claim_seconds=float(
+                        os.getenv(
+                            "IDEMPOTENCY_CLAIM_SECONDS", DEFAULT_CLAIM_SECONDS
+                        )
+                    )
+                )
+    return _cache
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.adapters.aws_clients import create_client
+from app.domain.lexicon import Lexicon
+from app.utils import codec
+
+DEFAULT_REFRESH_SECONDS = 300.0
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "lynza-lexicon")
+CACHE_FORMAT = 1
+
+logger = Logger(service="lynza", child=True)
+
+_store: Any = None
+_store_lock = threading.Lock()
+
+
+def parse_source(source: str) -> Tuple[Optional[str], str]:
+    """
+    Splits a lexicon source into its bucket and key or path.
+
+    Args:
+        source (str): ``s3://<bucket>/<key>`` or a local file path.
+
+    Returns:
+        Tuple[Optional[str], str]: The bucket and key of an S3 source, or
+            None and the path of a local file.
+
+    Raises:
+        ValueError: If an S3 source has no key.
+    """
+    if not source.startswith("s3://"):
+        return None, source
+    bucket, _, key = source[len("s3://"):].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid lexicon source: '{source}'")
+    return bucket, key
+
+
+def _md5(content: bytes) -> str:
+    return hashlib.md5(content, usedforsecurity=False).hexdigest()
+
+
+class LexiconStore:
+    """
+    Loads a lexicon file and keeps its compiled form up to date.
+
+    The file, a JSON object with ``negative`` and ``positive`` keyword
+    lists, is read from S3 or from a local path. Its ETag (for local files,
+    the MD5 of the content, which is what S3 uses for single-part uploads)
+    is checked at most every ``refresh_seconds``, and the lexicon is only
+    fetched and compiled again when it changed.
+
+    Compiled lexicons are pickled to ``cache_dir`` under their ETag, so a
+    new container whose ``/tmp`` survived, or whose cache directory was
+    filled at build time, loads the automaton instead of building it.
+
+    While one thread checks for a newer lexicon, the others keep using the
+    current one instead of waiting. When a refresh fails the current
+    lexicon stays in use until the next check. Safe to share between
+    threads.
+
+    Args:
+        source (str): ``s3://<bucket>/<key>`` or a local file path.
+        refresh_seconds (float): Minimum time between two ETag checks.
+        cache_dir (Optional[str]): Where compiled lexicons are stored; None
+            disables the cache.
+        clock (Callable[[], float]): Returns monotonic seconds; injectable
+            for tests.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.source = source
+        self.bucket, self.key = parse_source(source)
+        self.refresh_seconds = refresh_seconds
+        self.cache_dir = cache_dir
+        self._clock = clock
+        self._lexicon: Optional[Lexicon] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._s3: Any = None
+        self.reloads = 0
+        self.cache_hits = 0
+
+    def get(self) -> Lexicon:
+        """
+        Returns the current lexicon, checking for a newer one when due.
+
+        Returns:
+            Lexicon: The compiled lexicon.
+
+        Raises:
+            RuntimeError: If the lexicon was never loaded successfully.
+        """
+        lexicon = self._lexicon
+        if lexicon is not None:
+            if self._clock() < self._next_check:
+                return lexicon
+            if not self._lock.acquire(blocking=False):
+                return lexicon
+        else:
+            self._lock.acquire()
+
+        try:
+            if self._lexicon is None or self._clock() >= self._next_check:
+                self._refresh()
+            return self._lexicon  # type: ignore[return-value]
+        finally:
+            self._lock.release()
+
+    def _refresh(self) -> None:
+        self._next_check = self._clock() + self.refresh_seconds
+        try:
+            etag = self._current_etag()
+            if self._lexicon is not None and etag == self._lexicon.version:
+                return
+            self._lexicon = self._load(etag)
+            self.reloads += 1
+            logger.info(
+                "Lexicon loaded",
+                extra={"source": self.source, "version": etag}
+            )
+        except (BotoCoreError, ClientError, OSError, ValueError) as e:
+            if self._lexicon is None:
+                raise RuntimeError(
+                    f"Failed to load lexicon from '{self.source}': {e}"
+                ) from e
+            logger.warning(
+                "Lexicon refresh failed, keeping the current version",
+                extra={
+                    "source": self.source,
+                    "version": self._lexicon.version,
+                    "error": str(e),
+                }
+            )
+
+    def _get_s3(self) -> Any:
+        if self._s3 is None:
+            self._s3 = create_client("s3")
+        return self._s3
+
+    def _current_etag(self) -> str:
+        if self.bucket is None:
+            with open(self.key, "rb") as f:
+                return _md5(f.read())
+        response = self._get_s3().head_object(Bucket=self.bucket, Key=self.key)
+        return response["ETag"].strip('"')
+
+    def _read(self) -> Tuple[bytes, str]:
+        if self.bucket is None:
+            with open(self.key, "rb") as f:
+                content = f.read()
+            return content, _md5(content)
+        response = self._get_s3().get_object(Bucket=self.bucket, Key=self.key)
+        return response["Body"].read(), response["ETag"].strip('"')
+
+    def _load(self, etag: str) -> Lexicon:
+        cached = self._read_cache(etag)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        content, etag = self._read()
+        lexicon = Lexicon.from_document(codec.loads(content), version=etag)
+        self._write_cache(lexicon)
+        return lexicon
+
+    def _cache_path(self, etag: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{etag}-{CACHE_FORMAT}.pickle")
+
+    def _read_cache(self, etag: str) -> Optional[Lexicon]:
+        path = self._cache_path(etag)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                lexicon = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if not isinstance(lexicon, Lexicon) or lexicon.version != etag:
+            return None
+        return lexicon
+
+    def _write_cache(self, lexicon: Lexicon) -> None:
+        path = self._cache_path(lexicon.version)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)  # type: ignore
+            fd, temporary = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(
+                "Could not cache the compiled lexicon",
+                extra={"path": path, "error": str(e)}
+            )
+
+
+def get_lexicon_store() -> LexiconStore:
+    """
+    Returns the container-wide lexicon store, creating it on first use.
+
+    Configured from the environment:
+
+    * ``LEXICON_SOURCE``: ``s3://<bucket>/<key>`` or a local path of the
+      lexicon file.
+    * ``LEXICON_REFRESH_SECONDS``: minimum time between two ETag checks;
+      defaults to five minutes.
+    * ``LEXICON_CACHE_DIR``: where compiled lexicons are stored; defaults
+      to ``/tmp/lynza-lexicon``, and an empty value disables the cache.
+
+    Returns:
+        LexiconStore: The store.
+
+    Raises:
+        ValueError: If ``LEXICON_SOURCE`` is not set or invalid.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                source = os.getenv("LEXICON_SOURCE")
+                if not source:
+                    raise ValueError("LEXICON_SOURCE is not set")
+                _store = LexiconStore(
+                    source,
+                    refresh_seconds=float(
+                        os.getenv(
+                            "LEXICON_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS
+                        )
+                    ),
+                    cache_dir=os.getenv("LEXICON_CACHE_DIR", DEFAULT_CACHE_DIR)
+                )
+    return _store
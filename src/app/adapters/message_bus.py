@@ -1,36 +1,376 @@
-import boto3
-import json
 import os
-from typing import Dict
-from botocore.exceptions import ClientError, ParamValidationError
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from botocore.exceptions import BotoCoreError, ClientError
 
-sqs = boto3.client(
-    "sqs",
-    region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
-    endpoint_url=os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566")
+from app.adapters.aws_clients import create_client
+from app.adapters.claim_check import (
+    claim_check_bucket,
+    claim_check_threshold,
+    offload_if_needed,
 )
+from app.adapters.message_compression import (
+    attributes_size,
+    compress_body,
+    message_attributes,
+)
+from app.adapters.output_sink import OutputSink
+from app.adapters.resilience import CircuitOpenError, get_guard
+from app.utils import codec
+from app.utils.instrumentation import stage
+
+sqs: Any = None
+_sqs_lock = threading.Lock()
+
+SQS_MAX_BATCH_ENTRIES = 10
+SQS_MAX_BATCH_BYTES = 256 * 1024
+
+
+def get_sqs_client() -> Any:
+    """
+    Returns the SQS client, creating it on first use.
+
+    The client is cached for the lifetime of the container and is safe to
+    share between threads.
+
+    Returns:
+        Any: The boto3 SQS client.
+    """
+    global sqs
+    if sqs is None:
+        with _sqs_lock:
+            if sqs is None:
+                sqs = create_client("sqs")
+    return sqs
+
+
+def get_queue_url() -> str:
+    """
+    Returns the URL of the output queue.
+
+    Returns:
+        str: Value of the ``SQS_QUEUE_URL`` environment variable.
+
+    Raises:
+        RuntimeError: If the variable is not set.
+    """
+    queue_url = os.getenv("SQS_QUEUE_URL")
+    if not queue_url:
+        raise RuntimeError("Missing environment variable: SQS_QUEUE_URL")
+    return queue_url
+
+
+class EncodedMessage(NamedTuple):
+    """
+    A message body ready to be sent to SQS.
+
+    Attributes:
+        body (bytes): The UTF-8 encoded body.
+        content_encoding (Optional[str]): ``"gzip"`` or ``"zstd"`` when the
+            body is compressed and base64 encoded.
+    """
+
+    body: bytes
+    content_encoding: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        """
+        Size of the message as counted by SQS, attributes included.
+        """
+        return len(self.body) + attributes_size(self.content_encoding)
+
+    def entry(self, entry_id: str) -> Dict[str, Any]:
+        """
+        Builds the ``send_message_batch`` entry of the message.
+        """
+        entry: Dict[str, Any] = {
+            "Id": entry_id,
+            "MessageBody": self.body.decode("utf-8"),
+        }
+        if self.content_encoding:
+            entry["MessageAttributes"] = message_attributes(
+                self.content_encoding
+            )
+        return entry
+
+
+def encode_body(body: bytes) -> EncodedMessage:
+    """
+    Prepares a serialized message body for SQS.
+
+    Bodies above the compression threshold are compressed when
+    ``SQS_COMPRESSION`` is set (see :mod:`app.adapters.message_compression`).
+    Bodies that still exceed the claim-check threshold are offloaded to S3
+    uncompressed and replaced with a pointer (see
+    :mod:`app.adapters.claim_check`).
+
+    Args:
+        body (bytes): The serialized payload.
+
+    Returns:
+        EncodedMessage: The body to send and its content encoding.
+
+    Raises:
+        ValueError: If an oversized body could not be offloaded, or
+            ``SQS_COMPRESSION`` is invalid.
+        RuntimeError: If zstd compression is requested but unavailable.
+    """
+    compressed, content_encoding = compress_body(body)
+    if content_encoding is not None and (
+        claim_check_bucket() is None
+        or len(compressed) <= claim_check_threshold()
+    ):
+        return EncodedMessage(compressed, content_encoding)
+    return EncodedMessage(offload_if_needed(body))
+
+
+def encode_message(payload: Dict) -> EncodedMessage:
+    """
+    Serializes a payload into the message that is sent to SQS.
+
+    The payload is serialized once and then compressed or offloaded as
+    needed by :func:`encode_body`.
+
+    Args:
+        payload (Dict): The message payload.
+
+    Returns:
+        EncodedMessage: The body to send and its content encoding.
+
+    Raises:
+        TypeError: If the payload cannot be serialized.
+        ValueError: If an oversized body could not be offloaded.
+    """
+    return encode_body(codec.dumps(payload))
 
 
 def send_message_to_queue(payload: Dict) -> None:
     """
     Publishes a JSON message to an AWS SQS queue.
 
+    Throttled and transient failures of the call are retried by the SQS
+    guard (see :func:`app.adapters.resilience.get_guard`).
+
+    Payloads larger than the compression threshold are compressed when
+    compression is on, and payloads larger than the claim-check threshold
+    are stored in S3 and a pointer message is sent instead.
+
     Args:
         payload (Dict): The message payload to be serialized and sent.
 
     Raises:
         ValueError: If the payload could not be serialized or sent.
     """
-    queue_url = os.getenv("SQS_QUEUE_URL")
-    if not queue_url:
-        raise RuntimeError("Missing environment variable: SQS_QUEUE_URL")
+    queue_url = get_queue_url()
 
     try:
-        message_body = json.dumps(payload)
+        message = encode_message(payload)
+        arguments: Dict[str, Any] = {
+            "QueueUrl": queue_url,
+            "MessageBody": message.body.decode("utf-8"),
+        }
+        if message.content_encoding:
+            arguments["MessageAttributes"] = message_attributes(
+                message.content_encoding
+            )
 
-        sqs.send_message(
-            QueueUrl=queue_url,
-            MessageBody=message_body
-        )
-    except (ClientError, ParamValidationError, TypeError) as e:
+        get_guard("sqs").call(get_sqs_client().send_message, **arguments)
+    except (
+        BotoCoreError, ClientError, RuntimeError, TypeError, ValueError
+    ) as e:
         raise ValueError(f"Failed to send message to SQS: {e}") from e
+
+
+class SqsBatchPublisher(OutputSink):
+    """
+    Buffers messages and publishes them with ``send_message_batch``.
+
+    Entries are packed up to the SQS limits of 10 messages and 256 KB per
+    request; payloads are compressed or offloaded to S3 by
+    :func:`encode_body` before being packed. The buffer is flushed
+    automatically when adding a message would exceed either limit, and
+    explicitly via :meth:`flush` or when used as a context manager. Entries
+    reported in the ``Failed`` list of a response are resent on their own
+    with exponential backoff; entries that still fail, or that failed
+    because of the sender, are recorded in :attr:`failed`. A request that
+    fails as a whole is retried by the SQS guard only (see
+    :func:`app.adapters.resilience.get_guard`), and its entries are then
+    recorded as failed.
+
+    The publisher is not thread-safe: share one instance per thread.
+
+    Attributes:
+        failed (Dict[str, str]): Error message per entry id that could not
+            be delivered.
+        sent (int): Number of entries delivered successfully.
+        requests (int): Number of ``send_message_batch`` calls performed.
+
+    Example:
+        >>> with SqsBatchPublisher() as publisher:  # doctest: +SKIP
+        ...     for payload in payloads:
+        ...         publisher.add(payload)
+    """
+
+    name = "sqs"
+
+    def __init__(
+        self,
+        queue_url: Optional[str] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 0.1,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Args:
+            queue_url (Optional[str]): Target queue. Defaults to the
+                ``SQS_QUEUE_URL`` environment variable.
+            max_attempts (int): Maximum number of times an entry reported
+                in the ``Failed`` list of a response is sent.
+            backoff_base (float): Delay in seconds before the first resend;
+                doubled on every further attempt.
+            sleep (Callable[[float], None]): Function used to wait between
+                attempts.
+
+        Raises:
+            RuntimeError: If no queue URL is given or configured.
+        """
+        self.queue_url = queue_url or get_queue_url()
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self._sleep = sleep
+
+        self.failed: Dict[str, str] = {}
+        self.sent = 0
+        self.requests = 0
+
+        self._entries: List[Dict[str, Any]] = []
+        self._buffered_bytes = 0
+        self._next_id = 0
+
+    def add(self, payload: Dict, entry_id: Optional[str] = None) -> str:
+        """
+        Serializes a payload and queues it for the next batch.
+
+        Args:
+            payload (Dict): The message payload to be serialized and sent.
+            entry_id (Optional[str]): Identifier used to report failures.
+                Must be unique among pending entries; generated when omitted.
+
+        Returns:
+            str: The entry id under which the outcome is tracked.
+        """
+        if entry_id is None:
+            entry_id = str(self._next_id)
+            self._next_id += 1
+
+        try:
+            encoded = encode_message(payload)
+        except (RuntimeError, TypeError, ValueError) as e:
+            self.failed[entry_id] = f"Failed to send message to SQS: {e}"
+            return entry_id
+
+        size = encoded.size
+        if size > SQS_MAX_BATCH_BYTES:
+            self.failed[entry_id] = (
+                f"Failed to send message to SQS: message of {size} bytes "
+                f"exceeds the {SQS_MAX_BATCH_BYTES} bytes limit"
+            )
+            return entry_id
+
+        if (
+            len(self._entries) >= SQS_MAX_BATCH_ENTRIES
+            or self._buffered_bytes + size > SQS_MAX_BATCH_BYTES
+        ):
+            self.flush()
+
+        self._entries.append(encoded.entry(entry_id))
+        self._buffered_bytes += size
+        return entry_id
+
+    def flush(self) -> None:
+        """
+        Sends every buffered entry, resending the entries a response reports
+        as failed with backoff.
+        """
+        pending = self._entries
+        self._entries = []
+        self._buffered_bytes = 0
+
+        for attempt in range(self.max_attempts):
+            if not pending:
+                return
+            if attempt:
+                self._sleep(self.backoff_base * 2 ** (attempt - 1))
+            pending = self._send(pending, last_attempt=(
+                attempt == self.max_attempts - 1
+            ))
+
+    def _send(
+        self,
+        entries: List[Dict[str, Any]],
+        last_attempt: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Performs one guarded ``send_message_batch`` call.
+
+        The guard already retries the call itself, so when it still fails
+        every entry is recorded as failed rather than resent.
+
+        Returns:
+            List[Dict[str, Any]]: The entries of the ``Failed`` list that
+                should be resent.
+        """
+        self.requests += 1
+        try:
+            with stage("SqsPublish"):
+                response = get_guard("sqs").call(
+                    get_sqs_client().send_message_batch,
+                    QueueUrl=self.queue_url,
+                    Entries=entries
+                )
+        except (BotoCoreError, CircuitOpenError, ClientError) as e:
+            for entry in entries:
+                self.failed[entry["Id"]] = f"Failed to send message to SQS: {e}"
+            return []
+
+        self.sent += len(response.get("Successful", []))
+        retry, failed = split_batch_response(response, entries, last_attempt)
+        self.failed.update(failed)
+        return retry
+
+
+def split_batch_response(
+    response: Dict[str, Any],
+    entries: List[Dict[str, Any]],
+    last_attempt: bool
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Sorts the failed entries of a ``send_message_batch`` response.
+
+    Entries that failed because of the sender, or on the last attempt, are
+    final failures; the others should be resent.
+
+    Args:
+        response (Dict[str, Any]): The ``send_message_batch`` response.
+        entries (List[Dict[str, Any]]): The entries that were sent.
+        last_attempt (bool): Whether no further attempt will be made.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[str, str]]: The entries to resend,
+            and the error message per finally failed entry id.
+    """
+    by_id = {entry["Id"]: entry for entry in entries}
+    retry = []
+    failed = {}
+    for failure in response.get("Failed", []):
+        entry_id = failure["Id"]
+        if failure.get("SenderFault") or last_attempt:
+            failed[entry_id] = (
+                "Failed to send message to SQS: "
+                f"{failure.get('Code')}: {failure.get('Message', '')}"
+            )
+        else:
+            retry.append(by_id[entry_id])
+    return retry, failed
@@ -0,0 +1,233 @@
+import base64
+import binascii
+import gzip
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+from app.utils.compression import DECOMPRESSION_ERRORS, GZIP, ZSTD, zstandard
+
+CONTENT_ENCODING_ATTRIBUTE = "content-encoding"
+DEFAULT_THRESHOLD_BYTES = 4 * 1024
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 3}
+
+_local = threading.local()
+
+
+def message_compression() -> Optional[str]:
+    """
+    Returns the compression applied to large message bodies, if any.
+
+    Returns:
+        Optional[str]: ``"gzip"`` or ``"zstd"`` from ``SQS_COMPRESSION``, or
+            None when it is unset or ``none``.
+
+    Raises:
+        ValueError: If the value names an unsupported compression.
+        RuntimeError: If zstd is requested but ``zstandard`` is not
+            installed.
+    """
+    value = os.getenv("SQS_COMPRESSION", "").strip().lower()
+    if value in ("", "none"):
+        return None
+    if value not in DEFAULT_LEVELS:
+        raise ValueError(f"Unsupported SQS_COMPRESSION: '{value}'")
+    if value == ZSTD and zstandard is None:
+        raise RuntimeError(
+            "SQS_COMPRESSION=zstd requires the 'zstandard' package"
+        )
+    return value
+
+
+def compression_threshold() -> int:
+    """
+    Returns the body size, in bytes, above which bodies are compressed.
+
+    Defaults to 4 KB; smaller bodies gain little once base64 encoded.
+    Override with ``SQS_COMPRESSION_THRESHOLD_BYTES``.
+
+    Returns:
+        int: The threshold in bytes.
+    """
+    return int(
+        os.getenv("SQS_COMPRESSION_THRESHOLD_BYTES", DEFAULT_THRESHOLD_BYTES)
+    )
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compresses bytes with gzip or zstd.
+
+    gzip output carries no timestamp, so equal inputs compress to equal
+    bytes.
+
+    Args:
+        data (bytes): The bytes to compress.
+        encoding (str): ``"gzip"`` or ``"zstd"``.
+        level (Optional[int]): Compression level; defaults to 6 for gzip
+            and 3 for zstd.
+
+    Returns:
+        bytes: The compressed bytes.
+
+    Raises:
+        ValueError: If the encoding is not supported, or is zstd without
+            the ``zstandard`` package.
+    """
+    if encoding not in DEFAULT_LEVELS:
+        raise ValueError(f"Unsupported content encoding: '{encoding}'")
+    if level is None:
+        level = DEFAULT_LEVELS[encoding]
+    if encoding == GZIP:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if zstandard is None:
+        raise ValueError(
+            "zstd-compressed content requires the 'zstandard' package"
+        )
+
+    # Compressor contexts are not thread-safe, so each thread keeps its own.
+    compressors = getattr(_local, "zstd", None)
+    if compressors is None:
+        compressors = _local.zstd = {}
+    compressor = compressors.get(level)
+    if compressor is None:
+        compressor = compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressor.compress(data)
+
+
+def compress_body(body: bytes) -> Tuple[bytes, Optional[str]]:
+    """
+    Compresses and base64-encodes a message body above the threshold.
+
+    Bodies at or under :func:`compression_threshold`, any body when
+    compression is off, and bodies that would not get smaller are returned
+    unchanged.
+
+    Args:
+        body (bytes): The serialized message body.
+
+    Returns:
+        Tuple[bytes, Optional[str]]: The body to send, and its content
+            encoding, or None when it was left as is.
+
+    Raises:
+        ValueError: If ``SQS_COMPRESSION`` is invalid.
+        RuntimeError: If zstd is requested but unavailable.
+    """
+    encoding = message_compression()
+    if encoding is None or len(body) <= compression_threshold():
+        return body, None
+
+    level = os.getenv("SQS_COMPRESSION_LEVEL")
+    encoded = base64.b64encode(
+        compress(body, encoding, int(level) if level else None)
+    )
+    if len(encoded) >= len(body):
+        return body, None
+    return encoded, encoding
+
+
+def decompress_body(
+    body: Union[str, bytes],
+    content_encoding: Optional[str]
+) -> Union[str, bytes]:
+    """
+    Reverses :func:`compress_body`.
+
+    Args:
+        body (Union[str, bytes]): The SQS message body.
+        content_encoding (Optional[str]): Value of the ``content-encoding``
+            message attribute, or None.
+
+    Returns:
+        Union[str, bytes]: The serialized message; ``body`` itself when it
+            has no content encoding.
+
+    Raises:
+        ValueError: If the encoding is unknown or the body is corrupt.
+    """
+    if not content_encoding:
+        return body
+    if content_encoding not in DEFAULT_LEVELS:
+        raise ValueError(f"Unsupported content encoding: '{content_encoding}'")
+
+    try:
+        data = base64.b64decode(body, validate=True)
+        if content_encoding == GZIP:
+            return gzip.decompress(data)
+        if zstandard is None:
+            raise ValueError(
+                "zstd-encoded messages require the 'zstandard' package"
+            )
+        return zstandard.ZstdDecompressor().decompress(data)
+    except (binascii.Error,) + DECOMPRESSION_ERRORS as e:
+        raise ValueError(
+            f"Failed to decode {content_encoding} message body: {e}"
+        ) from e
+
+
+def message_attributes(content_encoding: str) -> Dict[str, Dict[str, str]]:
+    """
+    Builds the ``MessageAttributes`` that mark a compressed body.
+
+    Args:
+        content_encoding (str): The content encoding of the body.
+
+    Returns:
+        Dict[str, Dict[str, str]]: The attributes, as expected by
+            ``send_message`` and ``send_message_batch``.
+    """
+    return {
+        CONTENT_ENCODING_ATTRIBUTE: {
+            "DataType": "String",
+            "StringValue": content_encoding,
+        }
+    }
+
+
+def attributes_size(content_encoding: Optional[str]) -> int:
+    """
+    Returns how many bytes the attributes of a body add to its SQS size.
+
+    SQS counts the name, data type and value of every attribute.
+
+    Args:
+        content_encoding (Optional[str]): The content encoding, or None.
+
+    Returns:
+        int: The size of the attributes in bytes.
+    """
+    if not content_encoding:
+        return 0
+    return (
+        len(CONTENT_ENCODING_ATTRIBUTE) + len("String") + len(content_encoding)
+    )
+
+
+def get_content_encoding(message: Dict[str, Any]) -> Optional[str]:
+    """
+    Reads the content encoding of a received SQS message.
+
+    Accepts both the messages returned by ``receive_message`` and the
+    records of an SQS-triggered Lambda event.
+
+    Args:
+        message (Dict[str, Any]): The received message.
+
+    Returns:
+        Optional[str]: The content encoding, or None when the body is plain.
+
+    Example:
+        >>> get_content_encoding({"messageAttributes": {
+        ...     "content-encoding": {"stringValue": "gzip"}}})
+        'gzip'
+    """
+    attributes = (
+        message.get("MessageAttributes")
+        or message.get("messageAttributes")
+        or {}
+    )
+    attribute = attributes.get(CONTENT_ENCODING_ATTRIBUTE)
+    if not attribute:
+        return None
+    return attribute.get("StringValue") or attribute.get("stringValue")
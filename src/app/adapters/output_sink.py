@@ -0,0 +1,87 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class OutputSink(ABC):
+    """
+    Destination of the enriched payloads of an invocation.
+
+    Payloads are handed over with :meth:`add` and may be buffered until
+    :meth:`flush`, which is also called when the sink is used as a context
+    manager, so nothing is left behind at the end of the invocation.
+    Delivery failures are reported per entry id in :attr:`failed` rather
+    than raised.
+
+    Attributes:
+        failed (Dict[str, str]): Error message per entry id that could not
+            be delivered.
+        sent (int): Number of entries delivered successfully.
+        requests (int): Number of calls made to the backend.
+    """
+
+    name = "sink"
+
+    failed: Dict[str, str]
+    sent: int
+    requests: int
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    @abstractmethod
+    def add(self, payload: Dict, entry_id: Optional[str] = None) -> str:
+        """
+        Queues a payload for delivery.
+
+        Args:
+            payload (Dict): The enriched payload.
+            entry_id (Optional[str]): Identifier used to report failures.
+                Must be unique among pending entries; generated when omitted.
+
+        Returns:
+            str: The entry id under which the outcome is tracked.
+        """
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Delivers every buffered payload.
+        """
+
+
+def create_output_sink(spec: Optional[str] = None) -> OutputSink:
+    """
+    Builds the sink of an invocation from its ``OUTPUT_SINK`` specification.
+
+    Args:
+        spec (Optional[str]): ``sqs`` for one SQS message per payload (see
+            :class:`app.adapters.message_bus.SqsBatchPublisher`), or
+            ``s3://<bucket>/<prefix>`` for partitioned files (see
+            :class:`app.adapters.s3_writer.S3BatchWriter`); defaults to the
+            ``OUTPUT_SINK`` environment variable, itself defaulting to
+            ``sqs``.
+
+    Returns:
+        OutputSink: A new sink, owned by the caller.
+
+    Raises:
+        ValueError: If the specification is not recognized.
+        RuntimeError: If the sink's own settings are missing.
+    """
+    if spec is None:
+        spec = os.getenv("OUTPUT_SINK", "sqs")
+    if spec == "sqs":
+        from app.adapters.message_bus import SqsBatchPublisher
+
+        return SqsBatchPublisher()
+    if spec.startswith("s3://"):
+        from app.adapters.s3_writer import S3BatchWriter
+
+        bucket, _, prefix = spec[len("s3://"):].partition("/")
+        if bucket:
+            return S3BatchWriter.from_env(bucket, prefix)
+    raise ValueError(f"Unsupported OUTPUT_SINK: '{spec}'")
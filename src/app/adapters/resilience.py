@@ -0,0 +1,455 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+from app.utils.instrumentation import add_metric
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.05
+DEFAULT_MAX_DELAY = 2.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+
+RETRYABLE_ERROR_CODES = frozenset({
+    "InternalError",
+    "InternalFailure",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "ServiceUnavailable",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "AWS.SimpleQueueService.ServiceUnavailable",
+})
+
+RETRYABLE_CONNECTION_ERRORS = (
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+T = TypeVar("T")
+
+logger = Logger(service="lynza", child=True)
+
+_guards: Dict[str, "ServiceGuard"] = {}
+_guards_lock = threading.Lock()
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a service whose circuit breaker is open.
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Checks whether a failed AWS call may succeed when repeated.
+
+    Throttling, 5xx responses and connection errors are retryable; client
+    errors such as ``AccessDenied`` or ``NoSuchKey`` are not.
+
+    Args:
+        error (BaseException): The error raised by the call.
+
+    Returns:
+        bool: True if the call should be retried.
+    """
+    if isinstance(error, RETRYABLE_CONNECTION_ERRORS):
+        return True
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get("Error", {}).get("Code", "")
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in RETRYABLE_ERROR_CODES or (
+        isinstance(status, int) and status >= 500
+    )
+
+
+class TokenBucket:
+    """
+    Limits calls to ``rate`` per second, with bursts of up to ``burst``.
+
+    Safe to share between threads and coroutines; waiting callers sleep
+    outside the lock.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (Optional[float]): Most tokens held at once; defaults to one
+            second worth of tokens.
+        clock (Callable[[], float]): Returns monotonic seconds.
+        sleep (Callable[[float], None]): Waits for the given seconds.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes one token, waiting until one is available.
+
+        Returns:
+            float: The seconds waited.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """
+        Takes one token, waiting on the event loop until one is available.
+
+        Returns:
+            float: The seconds waited.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class CircuitBreaker:
+    """
+    Fails fast after ``failure_threshold`` consecutive failures.
+
+    Once open, calls are rejected for ``reset_seconds``; then a single trial
+    call is let through, which closes the circuit when it succeeds and opens
+    it again when it fails. Safe to share between threads.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_seconds (float): How long the circuit stays open.
+        clock (Callable[[], float]): Returns monotonic seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """
+        Checks whether a call may be made now.
+
+        Returns:
+            bool: False while the circuit is open, or while the trial call
+                of a half-open circuit is in flight.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if (
+                self.state == self.OPEN
+                and self._clock() - self._opened_at >= self.reset_seconds
+            ):
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> bool:
+        """
+        Counts a failed call.
+
+        Returns:
+            bool: True if this failure opened the circuit.
+        """
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED
+                and self._failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+
+class ServiceGuard:
+    """
+    Rate limits, retries and circuit-breaks the calls to one AWS service.
+
+    Every call waits for a token of the rate limiter (when there is one) and
+    is rejected with :class:`CircuitOpenError` while the breaker is open.
+    Retryable failures (see :func:`is_retryable`) are retried with full
+    jitter exponential backoff, so only the call that failed is repeated;
+    other errors are raised at once. The original error is raised once the
+    attempts are exhausted, so callers handle it as before. Calls of async
+    clients go through :meth:`call_async` and share the same limiter,
+    breaker and counters.
+
+    Retries happen on top of botocore's own (``AWS_MAX_ATTEMPTS``), which
+    do not back off across a throttled burst nor trip a breaker.
+
+    Args:
+        service (str): Service name, for logs and metrics.
+        limiter (Optional[TokenBucket]): Rate limiter, or None.
+        breaker (Optional[CircuitBreaker]): Circuit breaker, or None.
+        max_attempts (int): Calls made before giving up.
+        base_delay (float): Upper bound of the first backoff, in seconds;
+            doubled on every further attempt.
+        max_delay (float): Upper bound of any backoff, in seconds.
+        sleep (Callable[[float], None]): Waits for the given seconds.
+        rng (random.Random): Source of the jitter.
+
+    Attributes:
+        calls (int): Calls made to the service.
+        retries (int): Calls repeated after a retryable failure.
+        rejected (int): Calls rejected by the open breaker.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None
+    ) -> None:
+        self.service = service
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def call(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Calls a client method under the rate limit, retries and breaker.
+
+        Args:
+            function (Callable[..., T]): The client method.
+            *args (Any): Its positional arguments.
+            **kwargs (Any): Its keyword arguments.
+
+        Returns:
+            T: What the method returned.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            Exception: The error of the last attempt.
+        """
+        attempt = 0
+        while True:
+            self._admit()
+            if self.limiter is not None:
+                self.limiter.acquire()
+
+            self.calls += 1
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                attempt += 1
+            else:
+                self._record_success()
+                return result
+
+    async def call_async(
+        self,
+        function: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """
+        Awaits an async client method under the rate limit, retries and
+        breaker.
+
+        Same as :meth:`call`, but waits for tokens and backoffs with
+        ``asyncio.sleep``, so the event loop keeps serving other calls.
+
+        Args:
+            function (Callable[..., Awaitable[T]]): The client method, such
+                as one of an aiobotocore client.
+            *args (Any): Its positional arguments.
+            **kwargs (Any): Its keyword arguments.
+
+        Returns:
+            T: What the method returned.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            Exception: The error of the last attempt.
+        """
+        attempt = 0
+        while True:
+            self._admit()
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+
+            self.calls += 1
+            try:
+                result = await function(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self._record_success()
+                return result
+
+    def _admit(self) -> None:
+        if self.breaker is not None and not self.breaker.allow():
+            self.rejected += 1
+            add_metric("AwsCallsRejected", 1)
+            raise CircuitOpenError(
+                f"Circuit breaker for {self.service} is open; "
+                "not calling it until it recovers"
+            )
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Records a failed attempt.
+
+        Returns:
+            Optional[float]: The backoff before the next attempt, or None
+                when the error must be raised.
+        """
+        if not is_retryable(error):
+            self._record_success()
+            return None
+        self._record_failure(error)
+        if attempt == self.max_attempts - 1:
+            return None
+        self.retries += 1
+        add_metric("AwsRetries", 1)
+        return self._backoff(attempt)
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return self._rng.uniform(0, ceiling)
+
+    def _record_success(self) -> None:
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def _record_failure(self, error: Exception) -> None:
+        if self.breaker is not None and self.breaker.record_failure():
+            logger.warning(
+                "Circuit breaker opened",
+                extra={"service": self.service, "error": str(error)}
+            )
+
+
+def get_guard(service: str) -> ServiceGuard:
+    """
+    Returns the container-wide guard of an AWS service, creating it once.
+
+    Configured from the environment:
+
+    * ``<SERVICE>_MAX_RPS`` (such as ``S3_MAX_RPS``): calls per second
+      allowed to the service; unset or ``0`` (default) disables the limit.
+    * ``AWS_GUARD_MAX_ATTEMPTS``: calls made before giving up; defaults
+      to 3, and ``1`` disables the retries.
+    * ``AWS_GUARD_BASE_DELAY`` / ``AWS_GUARD_MAX_DELAY``: backoff bounds in
+      seconds; default to 0.05 and 2.
+    * ``CIRCUIT_FAILURE_THRESHOLD``: consecutive retryable failures that open
+      the breaker; defaults to 5, and ``0`` disables it.
+    * ``CIRCUIT_RESET_SECONDS``: how long the breaker stays open; defaults
+      to 30.
+
+    Args:
+        service (str): AWS service name, such as ``"s3"`` or ``"sqs"``.
+
+    Returns:
+        ServiceGuard: The guard.
+    """
+    guard = _guards.get(service)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(service)
+            if guard is None:
+                guard = _guards[service] = _create_guard(service)
+    return guard
+
+
+def _create_guard(service: str) -> ServiceGuard:
+    rate = float(os.getenv(f"{service.upper()}_MAX_RPS", "0"))
+    threshold = int(
+        os.getenv("CIRCUIT_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)
+    )
+    return ServiceGuard(
+        service,
+        limiter=TokenBucket(rate) if rate > 0 else None,
+        breaker=CircuitBreaker(
+            threshold,
+            float(os.getenv("CIRCUIT_RESET_SECONDS", DEFAULT_RESET_SECONDS))
+        ) if threshold > 0 else None,
+        max_attempts=int(
+            os.getenv("AWS_GUARD_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+        ),
+        base_delay=float(
+            os.getenv("AWS_GUARD_BASE_DELAY", DEFAULT_BASE_DELAY)
+        ),
+        max_delay=float(os.getenv("AWS_GUARD_MAX_DELAY", DEFAULT_MAX_DELAY))
+    )
@@ -0,0 +1,269 @@
+import gzip
+import io
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.adapters.output_sink import OutputSink
+from app.adapters.resilience import CircuitOpenError, get_guard
+from app.adapters.storage import get_s3_client
+from app.utils import codec
+from app.utils.instrumentation import stage
+
+NDJSON = "ndjson"
+PARQUET = "parquet"
+FORMATS = (NDJSON, PARQUET)
+
+DEFAULT_MAX_RECORDS = 50_000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 60.0
+UNKNOWN_SENTIMENT = "UNKNOWN"
+
+
+class _Partition:
+    """
+    Records buffered for one date and sentiment.
+    """
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.entry_ids: List[str] = []
+        self.records: List[Any] = []
+        self.size = 0
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "OUTPUT_FORMAT=parquet requires the 'pyarrow' package"
+        ) from e
+    return pyarrow
+
+
+class S3BatchWriter(OutputSink):
+    """
+    Buffers enriched payloads and writes them to S3 as a few large files.
+
+    Payloads are grouped by processing date (UTC) and sentiment and written
+    under Hive-style partitions, such as
+    ``<prefix>date=2024-05-01/sentiment=NEGATIVE/<time>-<id>.ndjson.gz``, so
+    Athena can prune them. Files are gzip-compressed NDJSON or, with
+    ``pyarrow`` installed, Snappy-compressed Parquet.
+
+    A partition is written once it holds ``max_records`` payloads or
+    ``max_bytes`` of serialized JSON, and every partition whose oldest
+    payload is ``max_age_seconds`` old is written on the next :meth:`add`;
+    :meth:`flush` writes the rest, at the latest when the invocation ends.
+    When a file cannot be written, the entries it held are recorded in
+    :attr:`failed`.
+
+    The writer is not thread-safe: share one instance per thread.
+
+    Args:
+        bucket (str): Target bucket.
+        prefix (str): Key prefix of the partitions.
+        file_format (str): ``"ndjson"`` or ``"parquet"``.
+        max_records (int): Payloads per file.
+        max_bytes (int): Serialized JSON bytes per file, before compression.
+        max_age_seconds (float): Longest time a payload stays buffered.
+        clock (Callable[[], float]): Returns epoch seconds.
+
+    Attributes:
+        keys (List[str]): Keys of the files written.
+
+    Raises:
+        ValueError: If the format is not supported.
+        RuntimeError: If Parquet is requested without ``pyarrow``.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        file_format: str = NDJSON,
+        max_records: int = DEFAULT_MAX_RECORDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        if file_format not in FORMATS:
+            raise ValueError(f"Unsupported OUTPUT_FORMAT: '{file_format}'")
+        if file_format == PARQUET:
+            _require_pyarrow()
+        self.bucket = bucket
+        self.prefix = prefix if not prefix or prefix.endswith("/") else (
+            prefix + "/"
+        )
+        self.file_format = file_format
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+
+        self.failed: Dict[str, str] = {}
+        self.sent = 0
+        self.requests = 0
+        self.keys: List[str] = []
+
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._next_id = 0
+
+    @classmethod
+    def from_env(cls, bucket: str, prefix: str = "") -> "S3BatchWriter":
+        """
+        Builds a writer configured from the environment.
+
+        * ``OUTPUT_FORMAT``: ``ndjson`` (default) or ``parquet``.
+        * ``OUTPUT_MAX_RECORDS``: payloads per file; defaults to 50,000.
+        * ``OUTPUT_MAX_BYTES``: serialized bytes per file; defaults to 4 MB,
+          which keeps the buffer and its compressed copy well within a
+          128 MB function.
+        * ``OUTPUT_MAX_AGE_SECONDS``: longest buffering time; defaults to 60.
+
+        Args:
+            bucket (str): Target bucket.
+            prefix (str): Key prefix of the partitions.
+
+        Returns:
+            S3BatchWriter: The writer.
+        """
+        return cls(
+            bucket,
+            prefix,
+            file_format=os.getenv("OUTPUT_FORMAT", NDJSON),
+            max_records=int(
+                os.getenv("OUTPUT_MAX_RECORDS", DEFAULT_MAX_RECORDS)
+            ),
+            max_bytes=int(os.getenv("OUTPUT_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            max_age_seconds=float(
+                os.getenv("OUTPUT_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS)
+            )
+        )
+
+    def add(self, payload: Dict, entry_id: Optional[str] = None) -> str:
+        """
+        Buffers a payload in its partition, writing the partitions that are
+        full or old enough.
+
+        Args:
+            payload (Dict): The enriched payload.
+            entry_id (Optional[str]): Identifier used to report failures.
+                Must be unique among pending entries; generated when omitted.
+
+        Returns:
+            str: The entry id under which the outcome is tracked.
+        """
+        if entry_id is None:
+            entry_id = str(self._next_id)
+            self._next_id += 1
+
+        try:
+            line = codec.dumps(payload)
+        except (TypeError, ValueError) as e:
+            self.failed[entry_id] = f"Failed to write record to S3: {e}"
+            return entry_id
+
+        now = self._clock()
+        key = (self._date(now), self._sentiment(payload))
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition(now)
+        partition.entry_ids.append(entry_id)
+        partition.records.append(line if self.file_format == NDJSON else payload)
+        partition.size += len(line) + 1
+
+        if (
+            len(partition.records) >= self.max_records
+            or partition.size >= self.max_bytes
+        ):
+            self._write(key, self._partitions.pop(key))
+        self._write_aged(now)
+        return entry_id
+
+    def flush(self) -> None:
+        """
+        Writes every buffered partition.
+        """
+        partitions = self._partitions
+        self._partitions = {}
+        for key, partition in partitions.items():
+            self._write(key, partition)
+
+    def _write_aged(self, now: float) -> None:
+        aged = [
+            key for key, partition in self._partitions.items()
+            if now - partition.started >= self.max_age_seconds
+        ]
+        for key in aged:
+            self._write(key, self._partitions.pop(key))
+
+    @staticmethod
+    def _date(now: float) -> str:
+        return datetime.fromtimestamp(now, tz=timezone.utc).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _sentiment(payload: Dict) -> str:
+        analysis = payload.get("analysis")
+        sentiment = analysis.get("sentiment") if isinstance(analysis, dict) else None
+        return str(sentiment or UNKNOWN_SENTIMENT)
+
+    def _write(self, key: Tuple[str, str], partition: _Partition) -> None:
+        date, sentiment = key
+        stamp = datetime.fromtimestamp(
+            self._clock(), tz=timezone.utc
+        ).strftime("%Y%m%dT%H%M%SZ")
+        extension = "ndjson.gz" if self.file_format == NDJSON else "parquet"
+        object_key = (
+            f"{self.prefix}date={date}/sentiment={sentiment}/"
+            f"{stamp}-{uuid.uuid4().hex}.{extension}"
+        )
+
+        self.requests += 1
+        try:
+            body, content_type = self._encode(partition.records)
+            with stage("S3Write"):
+                get_guard("s3").call(
+                    get_s3_client().put_object,
+                    Bucket=self.bucket,
+                    Key=object_key,
+                    Body=body,
+                    ContentType=content_type
+                )
+        except (
+            BotoCoreError, CircuitOpenError, ClientError, RuntimeError,
+            ValueError
+        ) as e:
+            for entry_id in partition.entry_ids:
+                self.failed[entry_id] = (
+                    f"Failed to write records to "
+                    f"s3://{self.bucket}/{object_key}: {e}"
+                )
+            return
+
+        self.sent += len(partition.entry_ids)
+        self.keys.append(object_key)
+
+    def _encode(self, records: List[Any]) -> Tuple[bytes, str]:
+        if self.file_format == NDJSON:
+            buffer = io.BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as f:
+                for record in records:
+                    f.write(record)
+                    f.write(b"\n")
+            return buffer.getvalue(), "application/x-ndjson"
+
+        pyarrow = _require_pyarrow()
+        buffer = io.BytesIO()
+        pyarrow.parquet.write_table(
+            pyarrow.Table.from_pylist(records), buffer, compression="snappy"
+        )
+        return buffer.getvalue(), "application/vnd.apache.parquet"
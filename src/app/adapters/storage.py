@@ -1,20 +1,191 @@
 import os
-import boto3
-import json
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterator, NamedTuple, Optional
 from botocore.exceptions import ClientError
 
-s3 = boto3.client(
-    "s3",
-    region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
-    endpoint_url=os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566")
+from app.adapters.aws_clients import create_client
+from app.adapters.resilience import get_guard
+from app.utils import codec
+from app.utils.compression import (
+    DECOMPRESSION_ERRORS,
+    LineTooLongError,
+    iter_lines,
+    open_decompressed,
+    strip_compression_suffix,
 )
 
+s3: Any = None
+_s3_lock = threading.Lock()
+
+NDJSON_SUFFIXES = (".jsonl", ".ndjson")
+LINE_CHUNK_BYTES = 64 * 1024
+MAX_OBJECT_BYTES = int(os.getenv("MAX_OBJECT_BYTES", str(4 * 1024 * 1024)))
+
+
+class ObjectTooLargeError(ValueError):
+    """
+    Raised when an S3 object, or one line of an NDJSON object, is larger
+    than ``MAX_OBJECT_BYTES``.
+    """
+
+
+class JsonLine(NamedTuple):
+    """
+    One line of a line-delimited JSON object.
+
+    Exactly one of ``data`` and ``error`` is set.
+
+    Attributes:
+        line_number (int): 1-based line number within the object.
+        data (Optional[Dict[str, Any]]): Parsed JSON object.
+        error (Optional[str]): Why the line could not be parsed.
+    """
+
+    line_number: int
+    data: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+def get_s3_client() -> Any:
+    """
+    Returns the S3 client, creating it on first use.
+
+    The client is cached for the lifetime of the container and is safe to
+    share between threads.
+
+    Returns:
+        Any: The boto3 S3 client.
+    """
+    global s3
+    if s3 is None:
+        with _s3_lock:
+            if s3 is None:
+                s3 = create_client("s3")
+    return s3
+
+
+def is_ndjson_key(key: str) -> bool:
+    """
+    Checks whether an object key names a line-delimited JSON file.
+
+    Args:
+        key (str): Key (path) to the object in the bucket.
+
+    Returns:
+        bool: True for ``.jsonl`` and ``.ndjson`` keys, optionally followed
+            by a compression suffix such as ``.gz``.
+    """
+    return strip_compression_suffix(key).lower().endswith(NDJSON_SUFFIXES)
+
+
+def check_object_size(response: Dict[str, Any], bucket: str, key: str) -> None:
+    """
+    Rejects an object whose ``ContentLength`` exceeds ``MAX_OBJECT_BYTES``.
+
+    Meant to be called on the ``get_object`` response before its body is
+    read; the body is closed when the object is rejected.
+
+    Args:
+        response (Dict[str, Any]): The ``get_object`` response.
+        bucket (str): Name of the S3 bucket, for error messages.
+        key (str): Key (path) to the object, for error messages.
+
+    Raises:
+        ObjectTooLargeError: If the object is larger than the limit.
+    """
+    size = response.get("ContentLength")
+    if MAX_OBJECT_BYTES and size is not None and size > MAX_OBJECT_BYTES:
+        response["Body"].close()
+        raise ObjectTooLargeError(
+            f"S3 object '{key}' in bucket '{bucket}' is {size} bytes, "
+            f"more than the {MAX_OBJECT_BYTES} allowed; upload it as NDJSON "
+            "to stream it"
+        )
+
+
+def read_limited(body: Any, key: str) -> bytes:
+    """
+    Reads a (decompressing) stream of at most ``MAX_OBJECT_BYTES``.
+
+    Guards against compressed objects that are small in S3 but expand past
+    the limit.
+
+    Args:
+        body (Any): Object with a ``read(size)`` method.
+        key (str): Key (path) to the object, for error messages.
+
+    Returns:
+        bytes: The content of the stream.
+
+    Raises:
+        ObjectTooLargeError: If the content is larger than the limit.
+        ValueError: If the content cannot be decompressed.
+    """
+    try:
+        if not MAX_OBJECT_BYTES:
+            return body.read()
+        data = body.read(MAX_OBJECT_BYTES + 1)
+    except DECOMPRESSION_ERRORS as e:
+        raise ValueError(f"S3 object '{key}' could not be decompressed") from e
+
+    if len(data) > MAX_OBJECT_BYTES:
+        raise ObjectTooLargeError(
+            f"S3 object '{key}' decompresses to more than the "
+            f"{MAX_OBJECT_BYTES} bytes allowed"
+        )
+    return data
+
+
+def read_object_bytes(bucket: str, key: str) -> bytes:
+    """
+    Reads the content of an S3 object.
+
+    Gzip and zstd content, detected from ``ContentEncoding``, the key suffix
+    or magic bytes, is decompressed while it is streamed from S3.
+    Objects larger than ``MAX_OBJECT_BYTES`` (``0`` disables the limit) are
+    rejected from their ``ContentLength`` before the body is read, and the
+    decompressed content is subject to the same limit. Throttled and
+    transient ``GetObject`` failures are retried by the S3 guard (see
+    :func:`app.adapters.resilience.get_guard`).
+
+    Args:
+        bucket (str): Name of the S3 bucket.
+        key (str): Key (path) to the object in the bucket.
+
+    Returns:
+        bytes: The (decompressed) object content.
+
+    Raises:
+        ObjectTooLargeError: If the object is larger than the limit.
+        ValueError: If the object cannot be decompressed.
+        RuntimeError: If the object cannot be retrieved, or the S3 circuit
+            breaker is open.
+    """
+    try:
+        response = get_guard("s3").call(
+            get_s3_client().get_object, Bucket=bucket, Key=key
+        )
+        check_object_size(response, bucket, key)
+        body = open_decompressed(
+            response["Body"],
+            response.get("ContentEncoding"),
+            key
+        )
+        return read_limited(body, key)
+
+    except ClientError as e:
+        raise RuntimeError(
+            f"Failed to retrieve object '{key}' from bucket '{bucket}': {e}"
+        ) from e
+
 
 def read_json_from_s3(bucket: str, key: str) -> Dict[str, Any]:
     """
     Reads and parses a JSON file from an S3 bucket.
 
+    Gzip and zstd content, detected from ``ContentEncoding``, the key suffix
+    or magic bytes, is decompressed while it is streamed from S3.
+
     Args:
         bucket (str): Name of the S3 bucket.
         key (str): Key (path) to the object in the bucket.
@@ -23,33 +194,115 @@ def read_json_from_s3(bucket: str, key: str) -> Dict[str, Any]:
         Dict[str, Any]: Parsed JSON content.
 
     Raises:
-        ValueError: If the object is empty, not valid JSON, or not a JSON
-            object.
+        ValueError: If the object is empty, cannot be decompressed, is not
+            valid JSON, or is not a JSON object.
         ClientError: If the object cannot be retrieved.
     """
+    return parse_json_object(read_object_bytes(bucket, key), bucket, key)
+
+
+def iter_json_lines_from_s3(bucket: str, key: str) -> Iterator[JsonLine]:
+    """
+    Streams a line-delimited JSON file from S3, one parsed line at a time.
+
+    The object body is consumed incrementally, and decompressed on the fly
+    when it is gzip or zstd compressed, so memory use does not depend on the
+    size of the object. This is the path for uploads larger than
+    ``MAX_OBJECT_BYTES``: the limit applies to each line rather than to the
+    object. Blank lines are skipped.
+    A line that is not a valid JSON object is yielded with an error instead
+    of aborting the stream.
+
+    Args:
+        bucket (str): Name of the S3 bucket.
+        key (str): Key (path) to the object in the bucket.
+
+    Yields:
+        JsonLine: The parsed object or the parse error of each line.
+
+    Raises:
+        RuntimeError: If the object cannot be retrieved.
+        ObjectTooLargeError: If a line is larger than the limit.
+        ValueError: If the object cannot be decompressed.
+    """
     try:
-        response = s3.get_object(Bucket=bucket, Key=key)
-        raw_data = response["Body"].read()
+        response = get_guard("s3").call(
+            get_s3_client().get_object, Bucket=bucket, Key=key
+        )
+    except ClientError as e:
+        raise RuntimeError(
+            f"Failed to retrieve object '{key}' from bucket '{bucket}': {e}"
+        ) from e
 
-        if not raw_data:
-            raise ValueError(
-                f"S3 object '{key}' in bucket '{bucket}' is empty"
-            )
+    body = open_decompressed(
+        response["Body"],
+        response.get("ContentEncoding"),
+        key
+    )
+    lines = _iter_decompressed_lines(body, key)
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
 
         try:
-            parsed = json.loads(raw_data)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"S3 object '{key}' contains invalid JSON") from e
+            parsed = codec.loads(line)
+        except ValueError:
+            yield JsonLine(line_number, None, "Line contains invalid JSON")
+            continue
 
         if not isinstance(parsed, dict):
-            raise ValueError(
-                "Expected a JSON object, got "
-                f"{type(parsed).__name__}"
+            yield JsonLine(
+                line_number,
+                None,
+                f"Expected a JSON object, got {type(parsed).__name__}"
             )
+            continue
 
-        return parsed
+        yield JsonLine(line_number, parsed, None)
 
-    except ClientError as e:
-        raise RuntimeError(
-            f"Failed to retrieve object '{key}' from bucket '{bucket}': {e}"
+
+def _iter_decompressed_lines(body: Any, key: str) -> Iterator[bytes]:
+    try:
+        yield from iter_lines(body, LINE_CHUNK_BYTES, MAX_OBJECT_BYTES or None)
+    except LineTooLongError as e:
+        raise ObjectTooLargeError(
+            f"S3 object '{key}' has a line longer than the "
+            f"{MAX_OBJECT_BYTES} bytes allowed"
         ) from e
+    except DECOMPRESSION_ERRORS as e:
+        raise ValueError(f"S3 object '{key}' could not be decompressed") from e
+
+
+def parse_json_object(raw_data: bytes, bucket: str, key: str) -> Dict[str, Any]:
+    """
+    Parses the content of an S3 object that must hold one JSON object.
+
+    Args:
+        raw_data (bytes): The (decompressed) object content.
+        bucket (str): Name of the S3 bucket, for error messages.
+        key (str): Key (path) to the object, for error messages.
+
+    Returns:
+        Dict[str, Any]: Parsed JSON content.
+
+    Raises:
+        ValueError: If the content is empty, not valid JSON, or not a JSON
+            object.
+    """
+    if not raw_data:
+        raise ValueError(
+            f"S3 object '{key}' in bucket '{bucket}' is empty"
+        )
+
+    try:
+        parsed = codec.loads(raw_data)
+    except ValueError as e:
+        raise ValueError(f"S3 object '{key}' contains invalid JSON") from e
+
+    if not isinstance(parsed, dict):
+        raise ValueError(
+            "Expected a JSON object, got "
+            f"{type(parsed).__name__}"
+        )
+
+    return parsed
@@ -0,0 +1,527 @@
+import asyncio
+import contextlib
+import os
+import threading
+from typing import Any, Awaitable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+from app.adapters.aws_clients import client_config_options, endpoint_url
+from app.adapters.claim_check import (
+    claim_check_bucket,
+    claim_check_threshold,
+)
+from app.adapters.idempotency import get_idempotency_cache, interaction_key
+from app.adapters.message_bus import (
+    SQS_MAX_BATCH_BYTES,
+    SQS_MAX_BATCH_ENTRIES,
+    EncodedMessage,
+    encode_body,
+    get_queue_url,
+    split_batch_response,
+)
+from app.adapters.resilience import CircuitOpenError, get_guard
+from app.adapters.storage import (
+    check_object_size,
+    is_ndjson_key,
+    parse_json_object,
+    read_limited,
+)
+from app.handler import (
+    build_response,
+    build_results,
+    find_processed_objects,
+    is_duplicate,
+    process_ndjson_record,
+    record_processed,
+    transform_object,
+)
+from app.utils import codec
+from app.utils.compression import open_decompressed
+from app.utils.instrumentation import log_metrics
+from app.utils.parse_event import S3ObjectRef, get_s3_object_locations
+
+logger = Logger(service="lynza")
+
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "32"))
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_clients: Optional[Tuple[asyncio.AbstractEventLoop, Any, Any, Any]] = None
+
+
+class AsyncBatchSender:
+    """
+    Publishes messages with ``send_message_batch`` from an event loop.
+
+    Async counterpart of :class:`app.adapters.message_bus.SqsBatchPublisher`:
+    entries are packed under the same count and size limits, and every full
+    batch is sent in its own task so that several requests can be in flight
+    at once, up to ``max_in_flight``. Requests go through the SQS guard (see
+    :meth:`app.adapters.resilience.ServiceGuard.call_async`), which alone
+    retries a request that fails as a whole; entries reported in the
+    ``Failed`` list of a response are resent with exponential backoff.
+
+    Attributes:
+        failed (Dict[str, str]): Error message per entry id that could not
+            be delivered.
+        sent (int): Number of entries delivered successfully.
+        requests (int): Number of ``send_message_batch`` calls performed.
+    """
+
+    def __init__(
+        self,
+        sqs: Any,
+        queue_url: str,
+        max_in_flight: int,
+        max_attempts: int = 3,
+        backoff_base: float = 0.1,
+    ) -> None:
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+
+        self.failed: Dict[str, str] = {}
+        self.sent = 0
+        self.requests = 0
+
+        self._entries: List[Dict[str, Any]] = []
+        self._buffered_bytes = 0
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def add(self, entry_id: str, message: EncodedMessage) -> None:
+        """
+        Queues an encoded message for the next batch.
+
+        Waits when ``max_in_flight`` batches are already being sent, which
+        propagates backpressure to the producers.
+
+        Args:
+            entry_id (str): Identifier used to report failures.
+            message (EncodedMessage): The encoded message.
+        """
+        size = message.size
+        if size > SQS_MAX_BATCH_BYTES:
+            self.failed[entry_id] = (
+                f"Failed to send message to SQS: message of {size} bytes "
+                f"exceeds the {SQS_MAX_BATCH_BYTES} bytes limit"
+            )
+            return
+
+        # Other producers may fill the buffer while this one waits for a
+        # free send slot, so the limits are checked again after each wait.
+        while (
+            len(self._entries) >= SQS_MAX_BATCH_ENTRIES
+            or self._buffered_bytes + size > SQS_MAX_BATCH_BYTES
+        ):
+            await self._dispatch()
+
+        self._entries.append(message.entry(entry_id))
+        self._buffered_bytes += size
+
+    async def flush(self) -> None:
+        """
+        Sends the buffered entries and waits for every in-flight batch.
+        """
+        await self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def _dispatch(self) -> None:
+        if not self._entries:
+            return
+        entries = self._entries
+        self._entries = []
+        self._buffered_bytes = 0
+
+        await self._in_flight.acquire()
+        task = asyncio.create_task(self._send_with_retries(entries))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_with_retries(self, entries: List[Dict[str, Any]]) -> None:
+        try:
+            pending = entries
+            for attempt in range(self.max_attempts):
+                if not pending:
+                    return
+                if attempt:
+                    await asyncio.sleep(
+                        self.backoff_base * 2 ** (attempt - 1)
+                    )
+                last_attempt = attempt == self.max_attempts - 1
+                pending = await self._send(pending, last_attempt)
+        finally:
+            self._in_flight.release()
+
+    async def _send(
+        self,
+        entries: List[Dict[str, Any]],
+        last_attempt: bool
+    ) -> List[Dict[str, Any]]:
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        self.requests += 1
+        try:
+            response = await get_guard("sqs").call_async(
+                self.sqs.send_message_batch,
+                QueueUrl=self.queue_url,
+                Entries=entries
+            )
+        except (BotoCoreError, CircuitOpenError, ClientError) as e:
+            for entry in entries:
+                self.failed[entry["Id"]] = f"Failed to send message to SQS: {e}"
+            return []
+
+        self.sent += len(response.get("Successful", []))
+        retry, failed = split_batch_response(response, entries, last_attempt)
+        self.failed.update(failed)
+        return retry
+
+
+def run_async(coroutine: Awaitable[T]) -> T:
+    """
+    Runs a coroutine on the event loop kept for the life of the container.
+
+    ``asyncio.run`` closes its loop on return, and with it the connections
+    of every aiobotocore client created on it. Reusing one loop across
+    invocations lets :func:`get_async_clients` keep its clients, and their
+    warm TLS connections, between invocations.
+
+    Args:
+        coroutine (Awaitable[T]): The coroutine to run.
+
+    Returns:
+        T: The result of the coroutine.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        with _loop_lock:
+            if _loop is None or _loop.is_closed():
+                _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coroutine)
+
+
+async def get_async_clients(
+    max_concurrency: int = ASYNC_MAX_CONCURRENCY
+) -> Tuple[Any, Any]:
+    """
+    Returns the aiobotocore S3 and SQS clients, creating them once per loop.
+
+    Clients are bound to the event loop that created them, so they are
+    rebuilt when called from another loop; under :func:`run_async` they
+    are created by the first invocation only.
+
+    Args:
+        max_concurrency (int): Objects in flight, used as the minimum size
+            of the connection pools.
+
+    Returns:
+        Tuple[Any, Any]: The S3 and SQS clients.
+
+    Raises:
+        ImportError: If the optional ``aiobotocore`` package is missing.
+    """
+    global _clients
+    loop = asyncio.get_running_loop()
+    if _clients is not None and _clients[0] is loop:
+        return _clients[2], _clients[3]
+
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+
+    options = client_config_options()
+    options["max_pool_connections"] = max(
+        options["max_pool_connections"],
+        max_concurrency
+    )
+    config = AioConfig(**options)
+    region = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    session = get_session()
+    stack = contextlib.AsyncExitStack()
+    s3 = await stack.enter_async_context(session.create_client(
+        "s3", region_name=region, endpoint_url=endpoint_url(), config=config
+    ))
+    sqs = await stack.enter_async_context(session.create_client(
+        "sqs", region_name=region, endpoint_url=endpoint_url(), config=config
+    ))
+    _clients = (loop, stack, s3, sqs)
+    return s3, sqs
+
+
+async def close_async_clients() -> None:
+    """
+    Closes the clients created by :func:`get_async_clients`, if any.
+    """
+    global _clients
+    if _clients is not None:
+        stack = _clients[1]
+        _clients = None
+        await stack.aclose()
+
+
+class _BlockingStream:
+    """
+    Synchronous ``read(size)`` over an aiobotocore body, for a worker
+    thread.
+
+    Every read is run on the event loop that owns the body and waited for,
+    so the synchronous decompressors pull the object chunk by chunk.
+
+    Args:
+        stream (Any): The aiobotocore ``StreamingBody``.
+        loop (asyncio.AbstractEventLoop): The loop the body belongs to.
+    """
+
+    def __init__(self, stream: Any, loop: asyncio.AbstractEventLoop) -> None:
+        self._stream = stream
+        self._loop = loop
+
+    def read(self, size: int = -1) -> bytes:
+        return asyncio.run_coroutine_threadsafe(
+            self._read(size), self._loop
+        ).result()
+
+    async def _read(self, size: int) -> bytes:
+        if size is None or size < 0:
+            return await self._stream.read()
+        # aiohttp returns what is buffered, so read until the size or EOF
+        # like botocore does.
+        chunks = []
+        while size > 0:
+            chunk = await self._stream.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+
+async def read_object_bytes_async(s3: Any, location: S3ObjectRef) -> bytes:
+    """
+    Reads the content of an S3 object with an async client.
+
+    Applies the same decompression rules and size limit as
+    :func:`app.adapters.storage.read_object_bytes`, and like it decompresses
+    while streaming: the body is read chunk by chunk by a worker thread, so
+    the compressed content is never buffered as a whole. ``GetObject`` goes
+    through the S3 guard (see
+    :meth:`app.adapters.resilience.ServiceGuard.call_async`).
+
+    Args:
+        s3 (Any): An aiobotocore S3 client.
+        location (S3ObjectRef): Bucket and key of the object.
+
+    Returns:
+        bytes: The (decompressed) object content.
+
+    Raises:
+        ObjectTooLargeError: If the object is larger than the limit.
+        ValueError: If the object cannot be decompressed.
+        RuntimeError: If the object cannot be retrieved, or the S3 circuit
+            breaker is open.
+    """
+    from botocore.exceptions import ClientError
+
+    bucket, key = location.bucket, location.key
+    loop = asyncio.get_running_loop()
+
+    def read(stream: Any, content_encoding: Optional[str]) -> bytes:
+        body = open_decompressed(
+            _BlockingStream(stream, loop), content_encoding, key
+        )
+        return read_limited(body, key)
+
+    try:
+        response = await get_guard("s3").call_async(
+            s3.get_object, Bucket=bucket, Key=key
+        )
+        check_object_size(response, bucket, key)
+        async with response["Body"] as stream:
+            return await asyncio.to_thread(
+                read, stream, response.get("ContentEncoding")
+            )
+    except ClientError as e:
+        raise RuntimeError(
+            f"Failed to retrieve object '{key}' from bucket '{bucket}': {e}"
+        ) from e
+
+
+async def read_json_from_s3_async(
+    s3: Any,
+    location: S3ObjectRef
+) -> Dict[str, Any]:
+    """
+    Reads and parses a JSON object from S3 with an async client.
+
+    Applies the same decompression and validation rules as
+    :func:`app.adapters.storage.read_json_from_s3`.
+
+    Args:
+        s3 (Any): An aiobotocore S3 client.
+        location (S3ObjectRef): Bucket and key of the object.
+
+    Returns:
+        Dict[str, Any]: Parsed JSON content.
+
+    Raises:
+        ValueError: If the object is empty, cannot be decompressed, is not
+            valid JSON, or is not a JSON object.
+        RuntimeError: If the object cannot be retrieved.
+    """
+    raw_data = await read_object_bytes_async(s3, location)
+    return parse_json_object(raw_data, location.bucket, location.key)
+
+
+async def process_locations_async(
+    locations: List[S3ObjectRef],
+    max_concurrency: int = ASYNC_MAX_CONCURRENCY
+) -> Tuple[List[Dict[str, Any]], Dict[int, Exception]]:
+    """
+    Processes S3 objects on one event loop with bounded concurrency.
+
+    Up to ``max_concurrency`` objects are fetched and classified at the same
+    time, while their messages are packed into batches and published by
+    concurrent ``send_message_batch`` calls. An object keeps its slot until
+    its message is handed to the sender, and the sender blocks when too many
+    batches are in flight, so buffered messages stay bounded when
+    publishing falls behind. NDJSON objects are streamed by the synchronous
+    :func:`app.handler.process_ndjson_record` on a worker thread.
+
+    Duplicates are skipped as in :func:`app.handler.process_locations`; the
+    idempotency cache is consulted on worker threads, since its store makes
+    blocking calls.
+
+    Args:
+        locations (List[S3ObjectRef]): Objects to process.
+        max_concurrency (int): Maximum number of objects in flight.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[int, Exception]]: The status entry
+            of every location and the error per failed location index.
+
+    Raises:
+        RuntimeError: If ``SQS_QUEUE_URL`` is not set.
+        ImportError: If the optional ``aiobotocore`` package is missing.
+    """
+    queue_url = get_queue_url()
+    errors: Dict[int, Exception] = {}
+    summaries: Dict[int, Dict[str, Any]] = {}
+    skipped: Set[int] = set()
+    interactions: Dict[int, str] = {}
+    slots = asyncio.Semaphore(max_concurrency)
+
+    cache = get_idempotency_cache()
+    lookups = cache.stats() if cache is not None else None
+    if cache is not None:
+        skipped = await asyncio.to_thread(
+            find_processed_objects, cache, locations
+        )
+    pending = [i for i in range(len(locations)) if i not in skipped]
+
+    s3, sqs = await get_async_clients(max_concurrency)
+    sender = AsyncBatchSender(
+        sqs,
+        queue_url,
+        max_in_flight=max(1, max_concurrency // SQS_MAX_BATCH_ENTRIES)
+    )
+
+    async def process(index: int, location: S3ObjectRef) -> None:
+        async with slots:
+            try:
+                if is_ndjson_key(location.key):
+                    summaries[index] = await asyncio.to_thread(
+                        process_ndjson_record, location
+                    )
+                    return
+                raw_data = await read_object_bytes_async(s3, location)
+                transformed = transform_object(raw_data, location)
+                if cache is not None:
+                    key = interaction_key(transformed)
+                    if await asyncio.to_thread(is_duplicate, cache, key):
+                        skipped.add(index)
+                        return
+                    if key is not None:
+                        interactions[index] = key
+                body = codec.dumps(transformed)
+                if claim_check_bucket() and len(body) > claim_check_threshold():
+                    message = await asyncio.to_thread(encode_body, body)
+                else:
+                    message = encode_body(body)
+            except Exception as e:
+                errors[index] = e
+                return
+            await sender.add(str(index), message)
+
+    await asyncio.gather(
+        *(process(index, locations[index]) for index in pending)
+    )
+    await sender.flush()
+
+    for entry_id, message in sender.failed.items():
+        errors[int(entry_id)] = ValueError(message)
+
+    sent = sender.sent + sum(s["lines_processed"] for s in summaries.values())
+    requests = sender.requests + sum(
+        s["requests"] for s in summaries.values()
+    )
+    logger.info(
+        "Messages sent to SQS",
+        extra={"sent": sent, "requests": requests}
+    )
+
+    if cache is not None and lookups is not None:
+        await asyncio.to_thread(
+            record_processed,
+            cache, locations, pending, errors, interactions, lookups
+        )
+
+    return build_results(locations, errors, summaries, skipped), errors
+
+
+@logger.inject_lambda_context
+@log_metrics
+def handler(
+    event: Dict[str, Any],
+    context: LambdaContext
+) -> Dict[str, Any]:
+    """
+    Asyncio variant of the S3-triggered Lambda entrypoint.
+
+    Behaves like :func:`app.handler.handler`, but overlaps the S3 GETs and
+    SQS sends of every record on one event loop instead of a thread pool,
+    which suits events with many records and bulk replays. Concurrency is
+    bounded by ``ASYNC_MAX_CONCURRENCY``. The loop and its clients are kept
+    between invocations (see :func:`run_async`). Requires the optional
+    ``aiobotocore`` package.
+
+    Args:
+        event (Dict[str, Any]): The S3 event payload.
+        context (LambdaContext): Lambda execution context.
+
+    Returns:
+        Dict[str, Any]: Status response with one ``results`` entry per
+            record.
+
+    Raises:
+        KeyError: If the S3 event payload is malformed.
+        Exception: If every record fails, the first record's error.
+    """
+    try:
+        locations = get_s3_object_locations(event)
+    except KeyError as e:
+        logger.error(
+            "Malformed S3 event payload",
+            extra={"error": str(e)},
+            exc_info=True
+        )
+        raise
+
+    results, errors = run_async(process_locations_async(locations))
+    return build_response(results, errors)
@@ -0,0 +1,713 @@
+"""
+Reprocesses every transcript under an S3 prefix, for example after the
+classification rules changed.
+
+Keys are listed with ``list_objects_v2``, fetched on a thread pool,
+classified with :func:`app.domain.sentiment_analysis.process_transcript` on
+a process pool and published in batches by a few concurrent output sinks
+(see :func:`app.adapters.output_sink.create_output_sink`) that last the
+whole run. Results are consumed in listing order; every
+``--checkpoint-interval`` seconds the sinks are flushed and the last key
+they delivered is saved to the checkpoint file, so an interrupted run
+resumes right after it. NDJSON objects are streamed in parts of ``--chunk-size``
+lines, and the checkpoint only moves past one once its last part was
+published, so an interrupted run restarts the object it was in. Objects
+that fail are reported and appended to the failures file, but do not stop
+the run.
+
+With ``--memo-size`` each worker memoizes classifications (see
+:mod:`app.domain.classification_memo`), so repeated transcripts are scanned
+once per worker; ``--share-memo`` also shares results between the workers
+through a ``multiprocessing`` manager, which pays off with large lexicons.
+
+Usage:
+    python -m app.backfill --bucket my-bucket --prefix 2024/ \\
+        [--queue-url URL] [--checkpoint backfill.json] [--processes 4] \\
+        [--memo-size 10000 [--share-memo]]
+"""
+import argparse
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List
+from typing import MutableMapping, NamedTuple, Optional, Sequence, Tuple
+from typing import TypeVar, Union
+
+from app.adapters.output_sink import OutputSink
+
+DEFAULT_FETCH_WORKERS = 16
+DEFAULT_PUBLISH_WORKERS = 4
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_CHECKPOINT_INTERVAL_SECONDS = 30.0
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+T = TypeVar("T")
+
+Document = Union[bytes, Dict[str, Any]]
+
+
+class Fetched(NamedTuple):
+    """
+    The documents of one object, or why they could not be read.
+
+    Attributes:
+        key (str): Key of the object.
+        documents (List[Tuple[str, Document]]): Item id and raw bytes of a
+            JSON object, or item id and parsed content of each NDJSON line.
+        error (Optional[str]): Why the object could not be read.
+        line_errors (Sequence[Tuple[str, str]]): Item id and error of each
+            NDJSON line that is not a JSON object.
+        complete (bool): Whether this is the last part of the object; an
+            NDJSON object is read in several parts.
+    """
+
+    key: str
+    documents: List[Tuple[str, Document]]
+    error: Optional[str] = None
+    line_errors: Sequence[Tuple[str, str]] = ()
+    complete: bool = True
+
+    @property
+    def size(self) -> int:
+        """
+        Number of outcomes the part produces, at least one.
+        """
+        return max(1, len(self.documents) + len(self.line_errors))
+
+
+class Classified(NamedTuple):
+    """
+    The outcome of one document.
+
+    Attributes:
+        key (str): Key of the object the document came from.
+        item_id (str): Key of the object, with the line number for NDJSON.
+        payload (Optional[Dict[str, Any]]): The enriched payload.
+        error (Optional[str]): Why the document could not be processed.
+    """
+
+    key: str
+    item_id: str
+    payload: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+class Checkpoint:
+    """
+    Progress of a backfill, saved as JSON after every chunk.
+
+    Args:
+        path (Optional[str]): File the progress is saved to; None keeps it
+            in memory only.
+        bucket (str): Bucket being backfilled.
+        prefix (str): Prefix being backfilled.
+    """
+
+    def __init__(self, path: Optional[str], bucket: str, prefix: str) -> None:
+        self.path = path
+        self.bucket = bucket
+        self.prefix = prefix
+        self.last_key: Optional[str] = None
+        self.objects = 0
+        self.published = 0
+        self.failed = 0
+        self.complete = False
+
+    @classmethod
+    def load(cls, path: Optional[str], bucket: str, prefix: str) -> "Checkpoint":
+        """
+        Reads the checkpoint of a previous run, or starts a new one.
+
+        Raises:
+            ValueError: If the file belongs to another bucket or prefix.
+        """
+        checkpoint = cls(path, bucket, prefix)
+        if not path or not os.path.exists(path):
+            return checkpoint
+
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("bucket") != bucket or state.get("prefix") != prefix:
+            raise ValueError(
+                f"Checkpoint '{path}' is for s3://{state.get('bucket')}/"
+                f"{state.get('prefix')}, not s3://{bucket}/{prefix}"
+            )
+        checkpoint.last_key = state.get("last_key")
+        checkpoint.objects = state.get("objects", 0)
+        checkpoint.published = state.get("published", 0)
+        checkpoint.failed = state.get("failed", 0)
+        checkpoint.complete = state.get("complete", False)
+        return checkpoint
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(
+                {
+                    "bucket": self.bucket,
+                    "prefix": self.prefix,
+                    "last_key": self.last_key,
+                    "objects": self.objects,
+                    "published": self.published,
+                    "failed": self.failed,
+                    "complete": self.complete,
+                },
+                f
+            )
+        os.replace(temporary, self.path)
+
+
+def iter_keys(
+    bucket: str,
+    prefix: str,
+    start_after: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Lists the object keys under a prefix in lexicographic order.
+
+    Args:
+        bucket (str): Name of the S3 bucket.
+        prefix (str): Key prefix to list.
+        start_after (Optional[str]): Only list keys after this one.
+
+    Yields:
+        str: Every key that does not name a folder.
+    """
+    from app.adapters.storage import get_s3_client
+
+    arguments = {"Bucket": bucket, "Prefix": prefix}
+    if start_after:
+        arguments["StartAfter"] = start_after
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(**arguments):
+        for entry in page.get("Contents", []):
+            if not entry["Key"].endswith("/"):
+                yield entry["Key"]
+
+
+def fetch_object(
+    bucket: str,
+    key: str,
+    part_lines: int = DEFAULT_CHUNK_SIZE
+) -> Iterable[Fetched]:
+    """
+    Reads the documents of one object; never raises.
+
+    A JSON object is read at once, as a single part. An NDJSON object is
+    returned as a lazy iterator of parts of at most ``part_lines`` lines,
+    streamed from S3 as the parts are consumed, so an object of any size is
+    never held whole in memory.
+
+    Args:
+        bucket (str): Name of the S3 bucket.
+        key (str): Key of the object.
+        part_lines (int): Lines per part of an NDJSON object.
+
+    Returns:
+        Iterable[Fetched]: The parts of the object, the last one marked
+            ``complete``; an object that cannot be read ends with a part
+            holding the error.
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    from app.adapters.storage import is_ndjson_key, read_object_bytes
+
+    if is_ndjson_key(key):
+        return _iter_ndjson_parts(bucket, key, part_lines)
+    try:
+        return [Fetched(key, [(key, read_object_bytes(bucket, key))])]
+    except (BotoCoreError, ClientError, RuntimeError, ValueError) as e:
+        return [Fetched(key, [], str(e))]
+
+
+def _iter_ndjson_parts(
+    bucket: str,
+    key: str,
+    part_lines: int
+) -> Iterator[Fetched]:
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    from app.adapters.storage import iter_json_lines_from_s3
+
+    documents: List[Tuple[str, Document]] = []
+    line_errors: List[Tuple[str, str]] = []
+    try:
+        for line in iter_json_lines_from_s3(bucket, key):
+            item_id = f"{key}#{line.line_number}"
+            if line.data is None:
+                line_errors.append((item_id, line.error or ""))
+            else:
+                documents.append((item_id, line.data))
+            if len(documents) + len(line_errors) >= part_lines:
+                yield Fetched(key, documents, line_errors=line_errors,
+                              complete=False)
+                documents, line_errors = [], []
+    except (BotoCoreError, ClientError, RuntimeError, ValueError) as e:
+        if documents or line_errors:
+            yield Fetched(key, documents, line_errors=line_errors,
+                          complete=False)
+        yield Fetched(key, [], str(e))
+        return
+    yield Fetched(key, documents, line_errors=line_errors)
+
+
+def install_memo(
+    memo_size: int,
+    shared: Optional[MutableMapping[str, str]] = None
+) -> None:
+    """
+    Enables the classification memo of a worker.
+
+    Used as the initializer of the classifying workers, so it only takes
+    picklable values; manager proxies are.
+
+    Args:
+        memo_size (int): Results kept by the worker; 0 leaves the memo to
+            ``CLASSIFICATION_MEMO_SIZE``.
+        shared (Optional[MutableMapping[str, str]]): Results shared by all
+            the workers, or None.
+    """
+    if memo_size <= 0:
+        return
+
+    from app.domain.classification_memo import (
+        ClassificationMemo,
+        set_classification_memo,
+    )
+
+    set_classification_memo(ClassificationMemo(memo_size, shared=shared))
+
+
+def classify_documents(
+    bucket: str,
+    fetched: List[Fetched]
+) -> Tuple[List[str], List[Classified], Optional[Dict[str, Any]]]:
+    """
+    Validates and classifies the documents of a chunk of fetched objects.
+
+    Runs in the worker processes, so it only takes and returns picklable
+    values.
+
+    Args:
+        bucket (str): Name of the S3 bucket, for error messages.
+        fetched (List[Fetched]): Objects read by :func:`fetch_object`.
+
+    Returns:
+        Tuple[List[str], List[Classified], Optional[Dict[str, Any]]]: The
+            keys whose last part is in the chunk, one outcome per document
+            or per object that could not be read, and the memo counters of
+            the worker so far, with its ``pid``, or None when it has no
+            memo.
+    """
+    from app.adapters.storage import parse_json_object
+    from app.domain.classification_memo import get_classification_memo
+    from app.domain.sentiment_analysis import process_transcript
+
+    results = []
+    for item in fetched:
+        if item.error is not None:
+            results.append(Classified(item.key, item.key, None, item.error))
+            continue
+        for item_id, error in item.line_errors:
+            results.append(Classified(item.key, item_id, None, error))
+        for item_id, document in item.documents:
+            try:
+                if isinstance(document, bytes):
+                    document = parse_json_object(document, bucket, item_id)
+                payload = process_transcript(document)
+            except ValueError as e:
+                results.append(Classified(item.key, item_id, None, str(e)))
+                continue
+            results.append(Classified(item.key, item_id, payload, None))
+
+    memo = get_classification_memo()
+    memo_stats = dict(memo.stats(), pid=os.getpid()) if memo else None
+    keys = [item.key for item in fetched if item.complete]
+    return keys, results, memo_stats
+
+
+def bounded_map(
+    executor: Executor,
+    function: Any,
+    items: Iterable[Any],
+    window: int
+) -> Iterator[Any]:
+    """
+    Maps a function over items on an executor, in order, with at most
+    ``window`` calls in flight.
+
+    Unlike ``Executor.map`` the items are consumed lazily, so a listing of
+    millions of keys is never held in memory.
+    """
+    futures: Deque[Future] = deque()
+    for item in items:
+        futures.append(executor.submit(function, item))
+        if len(futures) >= window:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def chunked(
+    items: Iterable[T],
+    size: int,
+    weight: Optional[Callable[[T], int]] = None
+) -> Iterator[List[T]]:
+    """
+    Groups items into lists whose total weight reaches ``size``; every
+    item weighs one unless ``weight`` is given.
+    """
+    chunk: List[T] = []
+    total = 0
+    for item in items:
+        chunk.append(item)
+        total += weight(item) if weight is not None else 1
+        if total >= size:
+            yield chunk
+            chunk = []
+            total = 0
+    if chunk:
+        yield chunk
+
+
+class Backfill:
+    """
+    Runs a backfill of one prefix.
+
+    Args:
+        bucket (str): Name of the S3 bucket.
+        prefix (str): Key prefix to reprocess.
+        checkpoint (Checkpoint): Progress to resume from and update.
+        queue_url (Optional[str]): Target queue; when omitted, results go to
+            the ``OUTPUT_SINK`` (``SQS_QUEUE_URL`` by default).
+        fetch_workers (int): Threads fetching objects.
+        processes (int): Processes classifying documents; 0 classifies on
+            a thread of the current process.
+        chunk_size (int): Documents per classification task and
+            checkpoint; NDJSON objects are read in parts of as many lines,
+            so they are never held whole.
+        publish_workers (int): Threads publishing the results, each to an
+            output sink of its own that lasts the whole run.
+        checkpoint_interval (float): Seconds between checkpoints. The
+            sinks are flushed before every checkpoint, so a partitioned S3
+            sink writes files of that many seconds of results; 0 saves one
+            after every chunk.
+        failures_path (Optional[str]): File that failed keys are appended
+            to as JSON lines.
+        progress (Any): Stream that progress lines are written to, or None.
+        memo_size (int): Classifications memoized by each worker; 0 leaves
+            the memo to ``CLASSIFICATION_MEMO_SIZE``.
+        share_memo (bool): Whether the workers also share their results.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str,
+        checkpoint: Checkpoint,
+        queue_url: Optional[str] = None,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        processes: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        publish_workers: int = DEFAULT_PUBLISH_WORKERS,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL_SECONDS,
+        failures_path: Optional[str] = None,
+        progress: Any = None,
+        memo_size: int = 0,
+        share_memo: bool = False
+    ) -> None:
+        self.bucket = bucket
+        self.prefix = prefix
+        self.checkpoint = checkpoint
+        self.queue_url = queue_url
+        self.fetch_workers = fetch_workers
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.publish_workers = max(1, publish_workers)
+        self.checkpoint_interval = checkpoint_interval
+        self.failures_path = failures_path
+        self.progress = progress
+        self.memo_size = memo_size
+        self.share_memo = share_memo
+        self.memo_stats: Dict[int, Dict[str, Any]] = {}
+        self.objects = 0
+        self.elapsed = 0.0
+        self._entry_ids = itertools.count()
+        self._pending: List[Dict[str, Classified]] = [
+            {} for _ in range(self.publish_workers)
+        ]
+        self._pending_failed: Dict[str, str] = {}
+        self._pending_keys: List[str] = []
+
+    def run(self) -> Checkpoint:
+        """
+        Processes every key after the checkpoint and marks it complete.
+
+        Returns:
+            Checkpoint: The final progress.
+        """
+        if self.checkpoint.complete:
+            return self.checkpoint
+
+        start = time.perf_counter()
+        last_report = last_checkpoint = start
+        sinks = [self._create_sink() for _ in range(self.publish_workers)]
+        context = multiprocessing.get_context("spawn")
+        manager = (
+            context.Manager()
+            if self.memo_size > 0 and self.share_memo and self.processes > 0
+            else None
+        )
+        classifier = self._classifier(
+            context, manager.dict() if manager is not None else None
+        )
+        try:
+            with ThreadPoolExecutor(self.fetch_workers) as fetchers, \
+                    ThreadPoolExecutor(self.publish_workers) as publishers:
+                keys = iter_keys(
+                    self.bucket, self.prefix, self.checkpoint.last_key
+                )
+                fetched = bounded_map(
+                    fetchers,
+                    lambda key: fetch_object(
+                        self.bucket, key, self.chunk_size
+                    ),
+                    keys,
+                    self.fetch_workers * 2
+                )
+                chunks = bounded_map(
+                    classifier,
+                    functools.partial(classify_documents, self.bucket),
+                    chunked(
+                        itertools.chain.from_iterable(fetched),
+                        self.chunk_size,
+                        weight=lambda part: part.size
+                    ),
+                    max(1, self.processes) * 2
+                )
+                for keys_in_chunk, results, memo_stats in chunks:
+                    if memo_stats is not None:
+                        self.memo_stats[memo_stats.pop("pid")] = memo_stats
+                    self._publish(publishers, sinks, keys_in_chunk, results)
+                    self.objects += len(keys_in_chunk)
+                    now = time.perf_counter()
+                    if now - last_checkpoint >= self.checkpoint_interval:
+                        self._save_checkpoint(publishers, sinks)
+                        last_checkpoint = now
+                    if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                        self._report(now - start)
+                        last_report = now
+                self._save_checkpoint(publishers, sinks)
+        finally:
+            classifier.shutdown()
+            if manager is not None:
+                manager.shutdown()
+
+        self.elapsed = time.perf_counter() - start
+        self.checkpoint.complete = True
+        self.checkpoint.save()
+        self._report(self.elapsed)
+        return self.checkpoint
+
+    def _classifier(
+        self,
+        context: Any,
+        shared: Optional[MutableMapping[str, str]]
+    ) -> Executor:
+        initargs = (self.memo_size, shared)
+        if self.processes <= 0:
+            return ThreadPoolExecutor(
+                1, initializer=install_memo, initargs=initargs
+            )
+        return ProcessPoolExecutor(
+            self.processes,
+            mp_context=context,
+            initializer=install_memo,
+            initargs=initargs
+        )
+
+    def memo_totals(self) -> Dict[str, int]:
+        """
+        Sums the latest memo counters of every worker.
+
+        Returns:
+            Dict[str, int]: ``hits``, ``shared_hits``, ``misses`` and
+                ``evictions`` over all workers.
+        """
+        names = ("hits", "shared_hits", "misses", "evictions")
+        return {
+            name: sum(stats[name] for stats in self.memo_stats.values())
+            for name in names
+        }
+
+    def _create_sink(self) -> OutputSink:
+        from app.adapters.message_bus import SqsBatchPublisher
+        from app.adapters.output_sink import create_output_sink
+
+        if self.queue_url:
+            return SqsBatchPublisher(self.queue_url)
+        return create_output_sink()
+
+    def _publish(
+        self,
+        publishers: Executor,
+        sinks: List[OutputSink],
+        keys: List[str],
+        results: List[Classified]
+    ) -> None:
+        """
+        Hands the results of one chunk to the output sinks.
+
+        The entries are spread over the ``publish_workers`` sinks, which
+        send concurrently, since a ``send_message_batch`` round trip takes
+        longer than classifying a batch. The keys are only checkpointed by
+        :meth:`_save_checkpoint`, once the sinks were flushed.
+        """
+        groups: List[List[Tuple[str, Dict[str, Any]]]] = [[] for _ in sinks]
+        for result in results:
+            if result.error is not None or result.payload is None:
+                error = result.error or "No payload"
+                self._pending_failed.setdefault(
+                    result.key, f"{result.item_id}: {error}"
+                )
+                continue
+            index = next(self._entry_ids)
+            entry_id = str(index)
+            self._pending[index % len(sinks)][entry_id] = result
+            groups[index % len(sinks)].append((entry_id, result.payload))
+
+        list(publishers.map(self._publish_group, sinks, groups))
+        self._pending_keys.extend(keys)
+
+    @staticmethod
+    def _publish_group(
+        sink: OutputSink, group: List[Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        for entry_id, payload in group:
+            sink.add(payload, entry_id=entry_id)
+
+    def _save_checkpoint(
+        self, publishers: Executor, sinks: List[OutputSink]
+    ) -> None:
+        """
+        Flushes the output sinks and saves the keys whose results they
+        delivered, recording the entries that failed against their key.
+        """
+        list(publishers.map(lambda sink: sink.flush(), sinks))
+
+        failed = self._pending_failed
+        for sink, pending in zip(sinks, self._pending, strict=True):
+            self.checkpoint.published += len(pending) - len(sink.failed)
+            for entry_id, error in sink.failed.items():
+                result = pending[entry_id]
+                failed.setdefault(result.key, f"{result.item_id}: {error}")
+            sink.failed.clear()
+            pending.clear()
+
+        self._record_failures(failed)
+        if self._pending_keys:
+            self.checkpoint.last_key = self._pending_keys[-1]
+        self.checkpoint.objects += len(self._pending_keys)
+        self.checkpoint.failed += len(failed)
+        self.checkpoint.save()
+        self._pending_failed = {}
+        self._pending_keys = []
+
+    def _record_failures(self, failed: Dict[str, str]) -> None:
+        if not failed or not self.failures_path:
+            return
+        with open(self.failures_path, "a") as f:
+            for key, error in failed.items():
+                f.write(json.dumps({"key": key, "error": error}) + "\n")
+
+    def _report(self, elapsed: float) -> None:
+        if self.progress is None:
+            return
+        rate = self.objects / elapsed if elapsed else 0.0
+        memo = "".join(
+            f" memo_{name}={value}"
+            for name, value in self.memo_totals().items()
+        ) if self.memo_stats else ""
+        self.progress.write(
+            f"objects={self.checkpoint.objects} "
+            f"published={self.checkpoint.published} "
+            f"failed={self.checkpoint.failed} "
+            f"last_key={self.checkpoint.last_key} "
+            f"objects/s={rate:.1f}{memo}\n"
+        )
+        self.progress.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bucket", required=True)
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--queue-url", help="Defaults to SQS_QUEUE_URL")
+    parser.add_argument(
+        "--endpoint-url",
+        help="AWS endpoint, such as http://localhost:4566 for LocalStack; "
+        "defaults to AWS_ENDPOINT_URL"
+    )
+    parser.add_argument("--checkpoint", default="backfill-checkpoint.json")
+    parser.add_argument("--failures", default="backfill-failures.jsonl")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint of a previous run")
+    parser.add_argument("--fetch-workers", type=int,
+                        default=DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--processes", type=int,
+                        default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--publish-workers", type=int,
+                        default=DEFAULT_PUBLISH_WORKERS)
+    parser.add_argument("--checkpoint-interval", type=float,
+                        default=DEFAULT_CHECKPOINT_INTERVAL_SECONDS,
+                        help="Seconds between checkpoints, each of which "
+                        "flushes the output sinks")
+    parser.add_argument("--memo-size", type=int, default=0,
+                        help="Classifications memoized by each worker")
+    parser.add_argument("--share-memo", action="store_true",
+                        help="Share memoized classifications between the "
+                        "worker processes")
+    args = parser.parse_args(argv)
+
+    if args.endpoint_url is not None:
+        os.environ["AWS_ENDPOINT_URL"] = args.endpoint_url
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    checkpoint = Checkpoint.load(args.checkpoint, args.bucket, args.prefix)
+    if checkpoint.complete:
+        print(f"s3://{args.bucket}/{args.prefix} was already backfilled; "
+              "use --restart to run it again")
+        return 0
+
+    backfill = Backfill(
+        args.bucket,
+        args.prefix,
+        checkpoint,
+        queue_url=args.queue_url,
+        fetch_workers=args.fetch_workers,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+        publish_workers=args.publish_workers,
+        checkpoint_interval=args.checkpoint_interval,
+        failures_path=args.failures,
+        progress=sys.stderr,
+        memo_size=args.memo_size,
+        share_memo=args.share_memo
+    )
+    backfill.run()
+    return 1 if checkpoint.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
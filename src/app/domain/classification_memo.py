@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, MutableMapping, Optional
+
+DEFAULT_MEMO_SIZE = 0
+
+_memo: Any = None
+_memo_lock = threading.Lock()
+_memo_configured = False
+
+
+def memo_key(text: str, lexicon_version: str, word_boundary: bool) -> str:
+    """
+    Builds the memo key of a normalized transcript.
+
+    The text is hashed with BLAKE2b into 128 bits, so entries stay small
+    and the key is the same in every process, unlike ``hash()``.
+
+    Args:
+        text (str): The transcript as scanned by the classifier, that is,
+            lowercased.
+        lexicon_version (str): Version of the lexicon it is classified
+            with, so that a new lexicon never reuses old results.
+        word_boundary (bool): Whether keywords must match whole words.
+
+    Returns:
+        str: The key.
+    """
+    digest = hashlib.blake2b(
+        text.encode("utf-8", "surrogatepass"), digest_size=16
+    ).hexdigest()
+    return f"{lexicon_version}:{int(word_boundary)}:{digest}"
+
+
+class ClassificationMemo:
+    """
+    Bounded LRU of classification results, keyed by :func:`memo_key`.
+
+    Optionally backed by a mapping shared between processes, such as a
+    ``multiprocessing.Manager().dict()``. Results missing from the local
+    LRU are looked up there before being computed, and computed results are
+    added to it while it holds fewer than ``max_shared_entries``. Each
+    shared lookup is an IPC round trip, so sharing only pays off when
+    classifying costs more than that, as with large lexicons.
+
+    Safe to share between threads.
+
+    Args:
+        max_entries (int): Results kept in the local LRU.
+        shared (Optional[MutableMapping[str, str]]): Mapping shared with
+            other processes, or None.
+        max_shared_entries (int): Most results added to ``shared``.
+
+    Example:
+        >>> memo = ClassificationMemo(max_entries=2)
+        >>> memo.get_or_compute("k", lambda: "NEUTRAL")
+        'NEUTRAL'
+        >>> memo.get_or_compute("k", lambda: "POSITIVE")
+        'NEUTRAL'
+        >>> memo.stats()["hits"]
+        1
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        shared: Optional[MutableMapping[str, str]] = None,
+        max_shared_entries: int = 100_000
+    ) -> None:
+        self.max_entries = max_entries
+        self.shared = shared
+        self.max_shared_entries = max_shared_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        """
+        Returns the memoized result of a key, computing it on a miss.
+
+        Args:
+            key (str): The memo key.
+            compute (Callable[[], str]): Computes the result on a miss.
+
+        Returns:
+            str: The result.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        result = self.shared.get(key) if self.shared is not None else None
+        shared_hit = result is not None
+        if result is None:
+            result = compute()
+            if (
+                self.shared is not None
+                and len(self.shared) < self.max_shared_entries
+            ):
+                self.shared[key] = result
+
+        with self._lock:
+            if shared_hit:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+            self._entries[key] = result
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit, miss and eviction counters.
+
+        Returns:
+            Dict[str, Any]: ``hits``, ``shared_hits``, ``misses``,
+                ``evictions``, ``entries`` and ``hit_rate``.
+        """
+        with self._lock:
+            hits, shared_hits = self.hits, self.shared_hits
+            misses, evictions = self.misses, self.evictions
+            entries = len(self._entries)
+        lookups = hits + shared_hits + misses
+        return {
+            "hits": hits,
+            "shared_hits": shared_hits,
+            "misses": misses,
+            "evictions": evictions,
+            "entries": entries,
+            "hit_rate": (hits + shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+def get_classification_memo() -> Optional[ClassificationMemo]:
+    """
+    Returns the process-wide classification memo, creating it on first use.
+
+    Sized by ``CLASSIFICATION_MEMO_SIZE``; unset or ``0`` (default)
+    disables memoization, unless a memo was installed with
+    :func:`set_classification_memo`.
+
+    Returns:
+        Optional[ClassificationMemo]: The memo, or None when disabled.
+    """
+    global _memo, _memo_configured
+    if not _memo_configured:
+        with _memo_lock:
+            if not _memo_configured:
+                size = int(
+                    os.getenv("CLASSIFICATION_MEMO_SIZE", DEFAULT_MEMO_SIZE)
+                )
+                _memo = ClassificationMemo(size) if size > 0 else None
+                _memo_configured = True
+    return _memo
+
+
+def set_classification_memo(memo: Optional[ClassificationMemo]) -> None:
+    """
+    Installs the process-wide classification memo, or disables it.
+
+    Used by worker processes that share a memo with their siblings.
+
+    Args:
+        memo (Optional[ClassificationMemo]): The memo, or None.
+    """
+    global _memo, _memo_configured
+    with _memo_lock:
+        _memo = memo
+        _memo_configured = True
@@ -0,0 +1,156 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher built on an Aho-Corasick automaton.
+
+    The automaton is compiled once from the keyword list and then finds every
+    occurrence of every keyword, including multi-word keywords such as
+    "no funciona", in a single left-to-right scan of the text. Scanning cost
+    is linear in the text length regardless of the number of keywords.
+
+    For small lexicons, C-level substring search beats a pure-Python scan
+    even though it touches the text once per keyword, so :meth:`find_all`
+    only uses the automaton when the lexicon has more than
+    ``SUBSTRING_SCAN_MAX_KEYWORDS`` entries. Both strategies return the same
+    result.
+
+    Matching is case-sensitive; callers are expected to normalize the text
+    the same way the keywords are normalized.
+
+    Example:
+        >>> matcher = KeywordMatcher(["tarde", "no funciona"])
+        >>> sorted(matcher.find_all("llegó tarde y no funciona"))
+        ['no funciona', 'tarde']
+        >>> KeywordMatcher(["tarde"], word_boundary=True).find_all("tardecita")
+        set()
+    """
+
+    SUBSTRING_SCAN_MAX_KEYWORDS = 256
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        word_boundary: bool = False
+    ) -> None:
+        """
+        Args:
+            keywords (Iterable[str]): Keywords to match. Empty strings are
+                ignored.
+            word_boundary (bool): If True, a keyword only matches when it is
+                not preceded or followed by a letter or digit, so "tarde"
+                does not match inside "tardecita".
+        """
+        self.word_boundary = word_boundary
+        self.keywords = frozenset(keyword for keyword in keywords if keyword)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[Tuple[str, int], ...]] = [()]
+
+        for keyword in self.keywords:
+            self._insert(keyword)
+
+        self._fail = self._link()
+
+    def _insert(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._outputs.append(())
+            state = next_state
+        self._outputs[state] += ((keyword, len(keyword)),)
+
+    def _link(self) -> List[int]:
+        """
+        Computes failure links breadth-first and merges the outputs of each
+        state with those of its failure state.
+        """
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] += self._outputs[fail[child]]
+
+        return fail
+
+    def iter_matches(self, text: str) -> Iterator[str]:
+        """
+        Yields each keyword occurrence in the order its match ends.
+
+        Args:
+            text (str): Text to scan.
+
+        Yields:
+            str: The matched keyword, once per occurrence.
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        word_boundary = self.word_boundary
+        text_length = len(text)
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for keyword, length in outputs[state]:
+                if word_boundary and not _is_whole_word(
+                    text, index - length + 1, index + 1, text_length
+                ):
+                    continue
+                yield keyword
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Returns the distinct keywords present in the text.
+
+        Args:
+            text (str): Text to scan.
+
+        Returns:
+            Set[str]: Every keyword found at least once.
+        """
+        if len(self.keywords) <= self.SUBSTRING_SCAN_MAX_KEYWORDS:
+            return self._find_substrings(text)
+        return set(self.iter_matches(text))
+
+    def _find_substrings(self, text: str) -> Set[str]:
+        if not self.word_boundary:
+            return {keyword for keyword in self.keywords if keyword in text}
+
+        found = set()
+        text_length = len(text)
+        for keyword in self.keywords:
+            start = text.find(keyword)
+            while start != -1:
+                end = start + len(keyword)
+                if _is_whole_word(text, start, end, text_length):
+                    found.add(keyword)
+                    break
+                start = text.find(keyword, start + 1)
+        return found
+
+
+def _is_whole_word(text: str, start: int, end: int, text_length: int) -> bool:
+    """
+    Checks that ``text[start:end]`` is not surrounded by letters or digits.
+    """
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if end < text_length and text[end].isalnum():
+        return False
+    return True
@@ -0,0 +1,90 @@
+import copy
+from typing import Any, Dict, Iterable, Optional
+
+from app.domain.keyword_matcher import KeywordMatcher
+
+BUILTIN_VERSION = "builtin"
+
+
+class Lexicon:
+    """
+    Negative and positive sentiment keywords, compiled into one matcher.
+
+    Keywords are lowercased, since transcripts are lowercased before they
+    are matched. A lexicon is immutable once built, so it can be shared
+    between threads and swapped for a newer one atomically.
+
+    Args:
+        negative (Iterable[str]): Keywords that make a text negative.
+        positive (Iterable[str]): Keywords that make a text positive.
+        version (str): Identifies the keyword lists, such as the ETag of the
+            file they were loaded from.
+
+    Example:
+        >>> lexicon = Lexicon(["tarde"], ["gracias"], version="v1")
+        >>> sorted(lexicon.get_matcher().find_all("gracias, llegó tarde"))
+        ['gracias', 'tarde']
+    """
+
+    def __init__(
+        self,
+        negative: Iterable[str],
+        positive: Iterable[str],
+        version: str = BUILTIN_VERSION
+    ) -> None:
+        self.negative = frozenset(keyword.lower() for keyword in negative)
+        self.positive = frozenset(keyword.lower() for keyword in positive)
+        self.version = version
+        self.matcher = KeywordMatcher(self.negative | self.positive)
+        self._word_boundary_matcher: Optional[KeywordMatcher] = None
+
+    def get_matcher(self, word_boundary: bool = False) -> KeywordMatcher:
+        """
+        Returns the compiled matcher of the lexicon.
+
+        Args:
+            word_boundary (bool): Whether keywords must match whole words.
+                Both variants share the same automaton.
+
+        Returns:
+            KeywordMatcher: Matcher over both negative and positive keywords.
+        """
+        if not word_boundary:
+            return self.matcher
+        if self._word_boundary_matcher is None:
+            matcher = copy.copy(self.matcher)
+            matcher.word_boundary = True
+            self._word_boundary_matcher = matcher
+        return self._word_boundary_matcher
+
+    @classmethod
+    def from_document(cls, document: Any, version: str) -> "Lexicon":
+        """
+        Builds a lexicon from a parsed lexicon file.
+
+        The file is a JSON object with a ``negative`` and a ``positive``
+        list of keywords.
+
+        Args:
+            document (Any): The parsed file.
+            version (str): Version to record, such as the file's ETag.
+
+        Returns:
+            Lexicon: The compiled lexicon.
+
+        Raises:
+            ValueError: If the document does not have both keyword lists.
+        """
+        if not isinstance(document, dict):
+            raise ValueError("Lexicon must be a JSON object")
+        lists: Dict[str, Any] = {}
+        for name in ("negative", "positive"):
+            keywords = document.get(name)
+            if not isinstance(keywords, list) or not all(
+                isinstance(keyword, str) for keyword in keywords
+            ):
+                raise ValueError(
+                    f"Lexicon field '{name}' must be a list of strings"
+                )
+            lists[name] = keywords
+        return cls(lists["negative"], lists["positive"], version=version)
@@ -1,6 +1,13 @@
-from typing import Dict
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Union
 from pydantic import BaseModel, ValidationError
 
+from app.domain.classification_memo import get_classification_memo, memo_key
+from app.domain.keyword_matcher import KeywordMatcher
+from app.domain.lexicon import Lexicon
+from app.utils import codec
+
 
 class TranscriptPayload(BaseModel):
     interaction_id: str
@@ -8,9 +15,245 @@ class TranscriptPayload(BaseModel):
     transcript: str
 
 
+class MalformedDocumentError(ValueError):
+    """
+    Raised when raw input is not a JSON object at all, as opposed to a JSON
+    object that fails validation.
+    """
+
+
+_DOCUMENT_ERROR_TYPES = {"json_invalid", "model_type"}
+
 NEGATIVE_KEYWORDS = {"problema", "ayuda", "no funciona", "tarde", "queja"}
 POSITIVE_KEYWORDS = {"gracias", "excelente", "solucionado", "perfecto"}
 
+LOWER_CHUNK_CHARS = 16 * 1024
+
+WORD_BOUNDARY_MATCHING = (
+    os.getenv("SENTIMENT_WORD_BOUNDARY", "false").lower() == "true"
+)
+
+
+@lru_cache(maxsize=None)
+def get_transcript_decoder() -> Optional[Callable[[Union[bytes, str]], Any]]:
+    """
+    Returns a compiled msgspec decoder for transcripts, built once.
+
+    msgspec parses and type-checks a document in one pass and is faster
+    than pydantic's JSON parser on long non-ASCII transcripts, so it is used
+    whenever it is the active codec (see :mod:`app.utils.codec`).
+
+    Returns:
+        Optional[Callable[[Union[bytes, str]], Any]]: Decodes a document into
+            an object with ``interaction_id``, ``customer_id`` and
+            ``transcript`` attributes, raising ValueError on any problem; or
+            None when msgspec is not the active codec.
+    """
+    if codec.CODEC_NAME != "msgspec":
+        return None
+
+    import msgspec
+
+    class Transcript(msgspec.Struct):
+        interaction_id: str
+        customer_id: str
+        transcript: str
+
+    decoder = msgspec.json.Decoder(Transcript)
+
+    def decode(raw_data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(raw_data)
+        except msgspec.MsgspecError as e:
+            raise ValueError(str(e)) from e
+
+    return decode
+
+
+@lru_cache(maxsize=None)
+def get_builtin_lexicon() -> Lexicon:
+    """
+    Returns the lexicon of ``NEGATIVE_KEYWORDS`` and ``POSITIVE_KEYWORDS``,
+    compiled once per container.
+
+    Returns:
+        Lexicon: The built-in lexicon.
+    """
+    return Lexicon(NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS)
+
+
+def get_lexicon() -> Lexicon:
+    """
+    Returns the lexicon used to classify transcripts.
+
+    When ``LEXICON_SOURCE`` is set the lexicon is loaded from that file and
+    kept up to date by :func:`app.adapters.lexicon_store.get_lexicon_store`;
+    otherwise the built-in keywords are used.
+
+    Returns:
+        Lexicon: The current lexicon.
+
+    Raises:
+        RuntimeError: If the configured lexicon cannot be loaded.
+    """
+    if not os.getenv("LEXICON_SOURCE"):
+        return get_builtin_lexicon()
+
+    from app.adapters.lexicon_store import get_lexicon_store
+
+    return get_lexicon_store().get()
+
+
+def get_keyword_matcher(word_boundary: bool = False) -> KeywordMatcher:
+    """
+    Returns the keyword matcher of the current lexicon.
+
+    Args:
+        word_boundary (bool): Whether keywords must match whole words.
+
+    Returns:
+        KeywordMatcher: Automaton over both negative and positive keywords.
+    """
+    return get_lexicon().get_matcher(word_boundary)
+
+
+def lower_text(text: str) -> str:
+    """
+    Lowercases a text without a full-size temporary buffer.
+
+    ``str.lower`` converts non-ASCII text through a buffer of four bytes per
+    character, several times the size of the text itself. Long non-ASCII
+    texts are therefore lowercased in chunks of about ``LOWER_CHUNK_CHARS``
+    characters, cut after a space so that context-dependent mappings give
+    the same result as ``str.lower``.
+
+    Args:
+        text (str): Text to lowercase.
+
+    Returns:
+        str: The same result as ``text.lower()``.
+    """
+    if len(text) <= LOWER_CHUNK_CHARS or text.isascii():
+        return text.lower()
+
+    parts = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + LOWER_CHUNK_CHARS, length)
+        if end < length:
+            cut = text.rfind(" ", start, end)
+            if cut > start:
+                end = cut + 1
+        parts.append(text[start:end].lower())
+        start = end
+    return "".join(parts)
+
+
+def classify_sentiment(
+    text: str,
+    word_boundary: bool = False,
+    lexicon: Optional[Lexicon] = None
+) -> str:
+    """
+    Classifies a text as "NEGATIVE", "POSITIVE", or "NEUTRAL".
+
+    Negative keywords take precedence over positive ones. When a
+    classification memo is enabled (see
+    :func:`app.domain.classification_memo.get_classification_memo`), texts
+    that lowercase to one already classified with the same lexicon version
+    are not scanned again.
+
+    Args:
+        text (str): Text to classify.
+        word_boundary (bool): Whether keywords must match whole words.
+        lexicon (Optional[Lexicon]): Keywords to use; defaults to
+            :func:`get_lexicon`.
+
+    Returns:
+        str: The detected sentiment.
+    """
+    lexicon = lexicon or get_lexicon()
+    text = lower_text(text)
+    memo = get_classification_memo()
+    if memo is None:
+        return _classify_lowered(text, word_boundary, lexicon)
+    return memo.get_or_compute(
+        memo_key(text, lexicon.version, word_boundary),
+        lambda: _classify_lowered(text, word_boundary, lexicon)
+    )
+
+
+def _classify_lowered(text: str, word_boundary: bool, lexicon: Lexicon) -> str:
+    found = lexicon.get_matcher(word_boundary).find_all(text)
+
+    if not found.isdisjoint(lexicon.negative):
+        return "NEGATIVE"
+    if found:
+        return "POSITIVE"
+    return "NEUTRAL"
+
+
+def validate_transcript(data: Dict) -> TranscriptPayload:
+    """
+    Validates an input payload that was already parsed.
+
+    Args:
+        data (Dict): Input payload containing interaction_id, customer_id,
+            and transcript.
+
+    Returns:
+        TranscriptPayload: The validated input.
+
+    Raises:
+        ValueError: If the input data is missing required fields or is invalid.
+    """
+    try:
+        return TranscriptPayload(**data)
+    except ValidationError as e:
+        raise ValueError(f"Invalid input data: {e}")
+
+
+def parse_transcript_json(raw_data: Union[bytes, str]) -> Any:
+    """
+    Parses and validates a raw JSON document in a single pass.
+
+    Uses the msgspec decoder of :func:`get_transcript_decoder` when
+    available and otherwise the compiled pydantic validator; neither builds
+    an intermediate dict. Documents rejected by msgspec are validated again
+    by pydantic, so error messages do not depend on the codec.
+
+    Args:
+        raw_data (Union[bytes, str]): UTF-8 encoded JSON object with
+            interaction_id, customer_id and transcript.
+
+    Returns:
+        Any: The validated input, with the attributes of
+            :class:`TranscriptPayload`.
+
+    Raises:
+        MalformedDocumentError: If the document is empty, not valid JSON or
+            not a JSON object. Callers that need a descriptive message can
+            re-parse the document, since this only happens on bad input.
+        ValueError: If the object is missing required fields or is invalid.
+    """
+    decode = get_transcript_decoder()
+    if decode is not None:
+        try:
+            return decode(raw_data)
+        except ValueError:
+            pass
+
+    try:
+        return TranscriptPayload.model_validate_json(raw_data)
+    except ValidationError as e:
+        if any(
+            error["type"] in _DOCUMENT_ERROR_TYPES and not error["loc"]
+            for error in e.errors(include_url=False)
+        ):
+            raise MalformedDocumentError(str(e)) from e
+        raise ValueError(f"Invalid input data: {e}") from e
+
 
 def process_transcript(data: Dict) -> Dict:
     """
@@ -18,7 +261,8 @@ def process_transcript(data: Dict) -> Dict:
 
     The function uses a keyword-based heuristic to classify the sentiment as
     "NEGATIVE", "POSITIVE", or "NEUTRAL" based on the presence of keywords in
-    the transcript text.
+    the transcript text. Whole-word matching is enabled with the
+    ``SENTIMENT_WORD_BOUNDARY`` environment variable.
 
     Args:
         data (Dict): Input payload containing interaction_id, customer_id,
@@ -31,18 +275,46 @@ def process_transcript(data: Dict) -> Dict:
     Raises:
         ValueError: If the input data is missing required fields or is invalid.
     """
-    try:
-        payload = TranscriptPayload(**data)
-    except ValidationError as e:
-        raise ValueError(f"Invalid input data: {e}")
+    return enrich(validate_transcript(data))
+
+
+def process_transcript_json(raw_data: Union[bytes, str]) -> Dict:
+    """
+    Validates a raw JSON document and performs sentiment analysis on it.
 
-    transcript = payload.transcript.lower()
+    Fast path for :func:`process_transcript` that validates the bytes
+    directly (see :func:`parse_transcript_json`).
 
-    sentiment = "NEUTRAL"
-    if any(keyword in transcript for keyword in NEGATIVE_KEYWORDS):
-        sentiment = "NEGATIVE"
-    elif any(keyword in transcript for keyword in POSITIVE_KEYWORDS):
-        sentiment = "POSITIVE"
+    Args:
+        raw_data (Union[bytes, str]): UTF-8 encoded JSON object with
+            interaction_id, customer_id and transcript.
+
+    Returns:
+        Dict: Enriched payload, as returned by :func:`process_transcript`.
+
+    Raises:
+        MalformedDocumentError: If the document is not a JSON object.
+        ValueError: If the object is missing required fields or is invalid.
+    """
+    return enrich(parse_transcript_json(raw_data))
+
+
+def enrich(payload: Any) -> Dict:
+    """
+    Builds the output message of a validated transcript.
+
+    Args:
+        payload (Any): The validated input, a :class:`TranscriptPayload` or
+            any object with the same attributes.
+
+    Returns:
+        Dict: The input fields and the detected sentiment under the
+            'analysis' key.
+    """
+    sentiment = classify_sentiment(
+        payload.transcript,
+        word_boundary=WORD_BOUNDARY_MATCHING
+    )
 
     return {
         "interaction_id": payload.interaction_id,
@@ -1,63 +1,523 @@
-from typing import Dict, Any
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from botocore.exceptions import BotoCoreError, ClientError
 
-from app.adapters.storage import read_json_from_s3
-from app.adapters.message_bus import send_message_to_queue
-from app.utils.parse_event import get_s3_object_location
-from app.domain.sentiment_analysis import process_transcript
-from dotenv import load_dotenv
+from app.adapters.output_sink import create_output_sink
+from app.adapters.storage import (
+    is_ndjson_key,
+    iter_json_lines_from_s3,
+    parse_json_object,
+    read_object_bytes,
+)
+from app.adapters.idempotency import (
+    get_idempotency_cache,
+    interaction_key,
+    object_key,
+)
+from app.domain.classification_memo import get_classification_memo
+from app.utils.parse_event import S3ObjectRef, get_s3_object_locations
+from app.domain.sentiment_analysis import (
+    MalformedDocumentError,
+    enrich,
+    parse_transcript_json,
+    process_transcript,
+    validate_transcript,
+)
+from app.utils import codec
+from app.utils.instrumentation import (
+    add_metric,
+    log_metrics,
+    record_sentiment,
+    stage,
+)
+from app.utils.payload_logging import log_payload
 
-load_dotenv()
+if "AWS_LAMBDA_FUNCTION_NAME" not in os.environ:
+    from dotenv import load_dotenv
+
+    load_dotenv()
 
 
 logger = Logger(service="lynza")
 
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+MAX_REPORTED_LINE_ERRORS = 100
 
-@logger.inject_lambda_context(log_event=True)
-def handler(
-    event: Dict[str, Any],
-    context: LambdaContext
-) -> Dict[str, Any]:
+
+def transform_object(raw_data: bytes, location: S3ObjectRef) -> Dict[str, Any]:
     """
-    Lambda entrypoint triggered by S3 upload events.
+    Validates and enriches the content of a single JSON object.
 
-    This function is triggered whenever a JSON file is uploaded to a specific
-    S3 bucket. It extracts the file location, retrieves the JSON content,
-    validates and transforms the payload, and sends the resulting message to an
-    SQS queue.
+    The bytes are validated in one pass by
+    :func:`app.domain.sentiment_analysis.parse_transcript_json`. Only when
+    they are not a JSON object are they parsed again, which yields the same
+    error messages as :func:`app.adapters.storage.read_json_from_s3`.
+    Parsing and classification are timed as the ``Parse`` and ``Classify``
+    stages.
 
     Args:
-        event (Dict[str, Any]): The S3 event payload.
-        context (LambdaContext): Lambda execution context.
+        raw_data (bytes): The (decompressed) object content.
+        location (S3ObjectRef): Bucket and key of the object, for error
+            messages.
+
+    Returns:
+        Dict[str, Any]: The enriched payload to publish.
+
+    Raises:
+        ValueError: If the content is empty, not a valid JSON object, or
+            fails validation.
+    """
+    with stage("Parse"):
+        try:
+            payload = parse_transcript_json(raw_data)
+        except MalformedDocumentError:
+            payload = validate_transcript(
+                parse_json_object(raw_data, location.bucket, location.key)
+            )
+
+    with stage("Classify"):
+        transformed_data = enrich(payload)
+    record_sentiment(transformed_data)
+    return transformed_data
+
+
+def process_record(location: S3ObjectRef) -> Dict[str, Any]:
+    """
+    Retrieves and transforms a single S3 object.
+
+    Retrieves the object content, then validates and transforms the payload
+    straight from its bytes (see :func:`transform_object`).
+    The module-level boto3 clients are thread-safe, so this function may run
+    concurrently on a worker pool; publishing is left to the caller so that
+    messages can be batched.
+
+    Args:
+        location (S3ObjectRef): Bucket and key of the uploaded object.
 
     Returns:
-        Dict[str, Any]: Status response for observability or future
-            integration.
+        Dict[str, Any]: The enriched payload to publish.
 
     Raises:
         ValueError: If the JSON file content is invalid.
         Exception: If any other unexpected error occurs.
     """
-    try:
-        bucket, key = get_s3_object_location(event)
-        logger.info("S3 event received", extra={"bucket": bucket, "key": key})
+    logger.info(
+        "S3 event received",
+        extra={"bucket": location.bucket, "key": location.key}
+    )
+
+    with stage("S3Get"):
+        raw_data = read_object_bytes(location.bucket, location.key)
+    add_metric("PayloadBytes", len(raw_data), "Bytes")
+
+    transformed_data = transform_object(raw_data, location)
+    log_payload(logger, "Transformed data", transformed_data, "transformed")
 
-        json_data = read_json_from_s3(bucket, key)
-        logger.debug("Raw JSON data retrieved", extra={"data": json_data})
+    return transformed_data
+
+
+def process_ndjson_record(location: S3ObjectRef) -> Dict[str, Any]:
+    """
+    Streams, transforms and publishes every line of an NDJSON object.
+
+    Lines are read, validated and classified as they arrive and handed to an
+    output sink owned by this call (see
+    :func:`app.adapters.output_sink.create_output_sink`), so memory use
+    stays constant regardless of the object size. Invalid lines are
+    reported by line number without aborting the rest of the object; only
+    the first ``MAX_REPORTED_LINE_ERRORS`` are listed.
+
+    Args:
+        location (S3ObjectRef): Bucket and key of the uploaded object.
+
+    Returns:
+        Dict[str, Any]: Number of lines published and failed, the reported
+            line failures, and the number of requests made by the sink.
 
-        transformed_data = process_transcript(json_data)
-        logger.debug(
-            "Transformed data",
-            extra={"transformed": transformed_data}
+    Raises:
+        RuntimeError: If the object cannot be retrieved.
+    """
+    logger.info(
+        "S3 NDJSON object received",
+        extra={"bucket": location.bucket, "key": location.key}
+    )
+
+    failed_lines: List[Dict[str, Any]] = []
+    failed_count = 0
+
+    def record_failure(line_number: int, error: str) -> None:
+        nonlocal failed_count
+        failed_count += 1
+        logger.warning(
+            "Skipping invalid line",
+            extra={"key": location.key, "line": line_number, "error": error}
         )
+        if len(failed_lines) < MAX_REPORTED_LINE_ERRORS:
+            failed_lines.append({"line": line_number, "error": error})
+
+    with create_output_sink() as sink:
+        for line in iter_json_lines_from_s3(location.bucket, location.key):
+            if line.data is None:
+                record_failure(line.line_number, line.error or "Empty line")
+                continue
+            try:
+                transformed_data = process_transcript(line.data)
+            except ValueError as e:
+                record_failure(line.line_number, str(e))
+                continue
+            record_sentiment(transformed_data)
+            sink.add(transformed_data, entry_id=str(line.line_number))
 
-        send_message_to_queue(transformed_data)
-        logger.info("Message successfully sent to SQS")
+    for entry_id, message in sink.failed.items():
+        record_failure(int(entry_id), message)
 
-        return {"statusCode": 200, "body": "Processed successfully"}
+    return {
+        "lines_processed": sink.sent,
+        "lines_failed": failed_count,
+        "failed_lines": sorted(failed_lines, key=lambda f: f["line"]),
+        "requests": sink.requests,
+    }
+
+
+def _log_record_failure(location: S3ObjectRef, error: Exception) -> None:
+    extra = {
+        "bucket": location.bucket,
+        "key": location.key,
+        "error": str(error),
+    }
+    if isinstance(error, ValueError):
+        logger.error("Validation failed", extra=extra, exc_info=error)
+    else:
+        logger.error(
+            "Unexpected error during processing",
+            extra=extra,
+            exc_info=error
+        )
 
+
+def build_results(
+    locations: List[S3ObjectRef],
+    errors: Dict[int, Exception],
+    summaries: Optional[Dict[int, Dict[str, Any]]] = None,
+    skipped: Optional[Set[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Builds one status entry per processed location.
+
+    Args:
+        locations (List[S3ObjectRef]): The processed locations, in order.
+        errors (Dict[int, Exception]): Error per failed location index.
+        summaries (Optional[Dict[int, Dict[str, Any]]]): Line summary per
+            NDJSON location index.
+        skipped (Optional[Set[int]]): Indexes of locations skipped as
+            duplicates.
+
+    Returns:
+        List[Dict[str, Any]]: Bucket, key and status of every location,
+            plus the error or line summary where applicable.
+    """
+    summaries = summaries or {}
+    skipped = skipped or set()
+    results: List[Dict[str, Any]] = []
+    for index, location in enumerate(locations):
+        result: Dict[str, Any] = {
+            "bucket": location.bucket,
+            "key": location.key,
+        }
+        error = errors.get(index)
+        summary = summaries.get(index)
+        if error is not None:
+            _log_record_failure(location, error)
+            result["status"] = "FAILED"
+            result["error"] = str(error)
+        elif summary is not None and summary["lines_failed"]:
+            result["status"] = (
+                "PARTIAL" if summary["lines_processed"] else "FAILED"
+            )
+            result.update(summary)
+        elif index in skipped:
+            result["status"] = "SKIPPED"
+        else:
+            result["status"] = "SUCCEEDED"
+            result.update(summary or {})
+        results.append(result)
+    return results
+
+
+def build_response(
+    results: List[Dict[str, Any]],
+    errors: Dict[int, Exception]
+) -> Dict[str, Any]:
+    """
+    Builds the handler response from the per-location results.
+
+    Args:
+        results (List[Dict[str, Any]]): Status entry of every location.
+        errors (Dict[int, Exception]): Error per failed location index.
+
+    Returns:
+        Dict[str, Any]: A 200 response when every location succeeded or was
+            skipped as a duplicate, or a 207 response when some did not.
+
+    Raises:
+        Exception: The error of the first location, if every location
+            failed with an error.
+    """
+    if results and len(errors) == len(results):
+        raise errors[min(errors)]
+
+    if any(
+        result["status"] not in ("SUCCEEDED", "SKIPPED") for result in results
+    ):
+        return {
+            "statusCode": 207,
+            "body": "Processed with errors",
+            "results": results,
+        }
+
+    return {
+        "statusCode": 200,
+        "body": "Processed successfully",
+        "results": results,
+    }
+
+
+def process_locations(
+    locations: List[S3ObjectRef]
+) -> Tuple[List[Dict[str, Any]], Dict[int, Exception]]:
+    """
+    Processes S3 objects concurrently and publishes the results in batches.
+
+    Each location is fetched and transformed on a bounded thread pool;
+    NDJSON objects are streamed and published by their worker, while the
+    results of single JSON objects are published through one shared output
+    sink as they complete.
+
+    When idempotency is enabled (see
+    :func:`app.adapters.idempotency.get_idempotency_cache`), object versions
+    already processed are skipped before they are downloaded, and single
+    JSON objects whose ``interaction_id`` was already published are not
+    published again. Keys are recorded only once their messages were sent,
+    and the lookups of the invocation are emitted as the
+    ``IdempotencyHits`` and ``IdempotencyMisses`` metrics.
+
+    Args:
+        locations (List[S3ObjectRef]): Objects to process.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[int, Exception]]: The status entry
+            of every location and the error per failed location index.
+    """
+    errors: Dict[int, Exception] = {}
+    summaries: Dict[int, Dict[str, Any]] = {}
+    skipped: Set[int] = set()
+    interactions: Dict[int, str] = {}
+    cache = get_idempotency_cache()
+    lookups = cache.stats() if cache is not None else None
+
+    if cache is not None:
+        skipped = find_processed_objects(cache, locations)
+    pending = [i for i in range(len(locations)) if i not in skipped]
+
+    workers = max(1, min(MAX_WORKERS, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            create_output_sink() as sink:
+        futures = {
+            executor.submit(
+                process_ndjson_record
+                if is_ndjson_key(locations[index].key)
+                else process_record,
+                locations[index]
+            ): index
+            for index in pending
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                errors[index] = e
+                continue
+            if is_ndjson_key(locations[index].key):
+                summaries[index] = result
+            else:
+                transformed = result
+                key = interaction_key(transformed) if cache else None
+                if cache is not None and is_duplicate(cache, key):
+                    skipped.add(index)
+                    continue
+                if key is not None:
+                    interactions[index] = key
+                sink.add(transformed, entry_id=str(index))
+
+    for entry_id, message in sink.failed.items():
+        errors[int(entry_id)] = ValueError(message)
+
+    sent = sink.sent + sum(s["lines_processed"] for s in summaries.values())
+    requests = sink.requests + sum(s["requests"] for s in summaries.values())
+    logger.info(
+        "Records published",
+        extra={"sink": sink.name, "sent": sent, "requests": requests}
+    )
+    add_metric("Records", len(locations))
+    add_metric("RecordsFailed", len(errors))
+    add_metric("RecordsSkipped", len(skipped))
+    add_metric("MessagesPublished", sent)
+
+    if cache is not None and lookups is not None:
+        record_processed(
+            cache, locations, pending, errors, interactions, lookups
+        )
+
+    memo = get_classification_memo()
+    if memo is not None:
+        logger.info("Classification memo stats", extra=memo.stats())
+
+    return build_results(locations, errors, summaries, skipped), errors
+
+
+def find_processed_objects(
+    cache: Any,
+    locations: List[S3ObjectRef]
+) -> Set[int]:
+    """
+    Finds the object versions already processed, before they are downloaded.
+
+    Args:
+        cache (Any): The idempotency cache.
+        locations (List[S3ObjectRef]): Objects of the invocation.
+
+    Returns:
+        Set[int]: Indexes of the locations to skip.
+    """
+    skipped: Set[int] = set()
+    for index, location in enumerate(locations):
+        if is_duplicate(cache, object_key(location)):
+            logger.info(
+                "Skipping already processed object",
+                extra={"bucket": location.bucket, "key": location.key}
+            )
+            skipped.add(index)
+    return skipped
+
+
+def is_duplicate(cache: Any, key: Optional[str]) -> bool:
+    """
+    Claims an idempotency key, telling whether it was already taken.
+
+    The key is checked and recorded in one atomic step (see
+    :meth:`app.adapters.idempotency.IdempotencyCache.claim`), so of two
+    invocations racing on it only one processes it. Fails open: when the
+    cache or its store cannot be reached, the key is treated as not seen
+    and the error is logged.
+
+    Args:
+        cache (Any): The idempotency cache.
+        key (Optional[str]): The key, or None when it cannot be built.
+
+    Returns:
+        bool: True if the key is a duplicate.
+    """
+    if key is None:
+        return False
+    try:
+        return not cache.claim(key)
+    except (BotoCoreError, ClientError, RuntimeError) as e:
+        logger.warning(
+            "Idempotency lookup failed, processing anyway",
+            extra={"idempotency_key": key, "error": str(e)}
+        )
+        return False
+
+
+def record_processed(
+    cache: Any,
+    locations: List[S3ObjectRef],
+    processed: List[int],
+    errors: Dict[int, Exception],
+    interactions: Dict[int, str],
+    lookups: Dict[str, Any]
+) -> None:
+    """
+    Records the keys of the locations processed without errors, and
+    releases the claims of the failed ones so that a retry processes them.
+
+    Also logs the cache counters and emits the hits and misses of the
+    invocation as the ``IdempotencyHits`` and ``IdempotencyMisses`` metrics.
+
+    Args:
+        cache (Any): The idempotency cache.
+        locations (List[S3ObjectRef]): Objects of the invocation.
+        processed (List[int]): Indexes of the locations that were processed.
+        errors (Dict[int, Exception]): Error per failed location index.
+        interactions (Dict[int, str]): Interaction key per location index.
+        lookups (Dict[str, Any]): Cache counters when the invocation
+            started, as returned by ``cache.stats()``.
+    """
+    for index in processed:
+        keys = [object_key(locations[index]), interactions.get(index)]
+        record = cache.release if index in errors else cache.add
+        try:
+            for key in filter(None, keys):
+                record(key)
+        except (BotoCoreError, ClientError, RuntimeError) as e:
+            logger.warning(
+                "Failed to record idempotency key",
+                extra={"key": locations[index].key, "error": str(e)}
+            )
+
+    stats = cache.stats()
+    logger.info("Idempotency cache stats", extra=stats)
+    add_metric("IdempotencyHits", stats["hits"] - lookups["hits"])
+    add_metric("IdempotencyMisses", stats["misses"] - lookups["misses"])
+
+
+@logger.inject_lambda_context
+@log_metrics
+def handler(
+    event: Dict[str, Any],
+    context: LambdaContext
+) -> Dict[str, Any]:
+    """
+    Lambda entrypoint triggered by S3 upload events.
+
+    This function is triggered whenever JSON files are uploaded to a specific
+    S3 bucket. Every record in the event is processed on a bounded thread
+    pool: the file content is retrieved, validated and transformed, and the
+    resulting messages are sent to an SQS queue in batches.
+
+    Objects with a ``.jsonl`` or ``.ndjson`` key hold one transcript per line
+    and are streamed line by line; every line becomes its own message.
+
+    A failing record does not abort the rest of the batch; its outcome is
+    reported in the ``results`` list instead. If every record fails, the
+    first error is raised so that Lambda can retry the invocation.
+
+    The event is only logged when ``POWERTOOLS_LOGGER_LOG_EVENT`` is
+    ``"true"``; payloads are logged at debug level through
+    :func:`app.utils.payload_logging.log_payload`. Per-stage latencies and
+    counters are written to stdout as one EMF document per invocation (see
+    :mod:`app.utils.instrumentation`).
+
+    Args:
+        event (Dict[str, Any]): The S3 event payload.
+        context (LambdaContext): Lambda execution context.
+
+    Returns:
+        Dict[str, Any]: Status response with one ``results`` entry per
+            record, for observability or future integration.
+
+    Raises:
+        KeyError: If the S3 event payload is malformed.
+        ValueError: If the JSON content of every record is invalid.
+        Exception: If every record fails with an unexpected error.
+    """
+    try:
+        locations = get_s3_object_locations(event)
     except KeyError as e:
         logger.error(
             "Malformed S3 event payload",
@@ -66,17 +526,100 @@ def handler(
         )
         raise
 
-    except ValueError as validation_error:
-        logger.error(
-            "Validation failed",
-            extra={"error": str(validation_error)},
-            exc_info=True
-        )
-        raise
+    results, errors = process_locations(locations)
+    return build_response(results, errors)
 
-    except Exception as e:
-        logger.exception(
-            "Unexpected error during processing",
-            extra={"error": str(e)}
-        )
-        raise
+
+def _unwrap_sqs_record(record: Dict[str, Any]) -> List[S3ObjectRef]:
+    """
+    Extracts the S3 object locations carried by one SQS message.
+
+    Args:
+        record (Dict[str, Any]): An SQS event record whose body is an S3
+            event notification.
+
+    Returns:
+        List[S3ObjectRef]: The locations in the notification; empty for the
+            ``s3:TestEvent`` sent when the notification is configured.
+
+    Raises:
+        KeyError: If the body is not an S3 event notification.
+    """
+    try:
+        notification = codec.loads(record["body"])
+    except ValueError as e:
+        raise KeyError("SQS message body is not valid JSON") from e
+
+    if (
+        isinstance(notification, dict)
+        and notification.get("Event") == "s3:TestEvent"
+    ):
+        return []
+    return get_s3_object_locations(notification)
+
+
+@logger.inject_lambda_context
+@log_metrics
+def sqs_handler(
+    event: Dict[str, Any],
+    context: LambdaContext
+) -> Dict[str, Any]:
+    """
+    Lambda entrypoint for S3 notifications buffered through an SQS queue.
+
+    Each SQS message body holds an S3 event notification with its own
+    ``Records`` array. The S3 records of every message in the batch are
+    processed together, as in :func:`handler`, so a single invocation can
+    absorb many uploads.
+
+    The function is meant to be configured with ``ReportBatchItemFailures``:
+    only messages whose body is malformed or which have at least one S3
+    record that failed with an error are reported, so only those are
+    redelivered. Records of NDJSON objects with invalid lines are not
+    retried, since redelivery would republish their valid lines.
+
+    Args:
+        event (Dict[str, Any]): The SQS event payload.
+        context (LambdaContext): Lambda execution context.
+
+    Returns:
+        Dict[str, Any]: The ``batchItemFailures`` response.
+    """
+    failed_messages: List[str] = []
+    locations: List[S3ObjectRef] = []
+    owners: List[str] = []
+
+    for record in event.get("Records", []):
+        message_id = record["messageId"]
+        try:
+            message_locations = _unwrap_sqs_record(record)
+        except KeyError as e:
+            logger.error(
+                "Malformed S3 event payload",
+                extra={"message_id": message_id, "error": str(e)},
+            )
+            failed_messages.append(message_id)
+            continue
+        locations.extend(message_locations)
+        owners.extend([message_id] * len(message_locations))
+
+    if locations:
+        _, errors = process_locations(locations)
+        for index in sorted(errors):
+            if owners[index] not in failed_messages:
+                failed_messages.append(owners[index])
+
+    logger.info(
+        "SQS batch processed",
+        extra={
+            "messages": len(event.get("Records", [])),
+            "objects": len(locations),
+            "failed_messages": len(failed_messages),
+        }
+    )
+
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id} for message_id in failed_messages
+        ]
+    }
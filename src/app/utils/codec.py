@@ -0,0 +1,122 @@
+import json
+import os
+from typing import Any, Callable, Dict, Tuple, Union
+
+CODECS = ("msgspec", "orjson", "json")
+
+
+def _stdlib_codec() -> Tuple[Callable[[Any], bytes], Callable[..., Any]]:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode("utf-8")
+
+    return dumps, json.loads
+
+
+def _orjson_codec() -> Tuple[Callable[[Any], bytes], Callable[..., Any]]:
+    import orjson
+
+    return orjson.dumps, orjson.loads
+
+
+def _msgspec_codec() -> Tuple[Callable[[Any], bytes], Callable[..., Any]]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return encoder.encode(obj)
+        except msgspec.EncodeError as e:
+            raise TypeError(str(e)) from e
+
+    return dumps, loads
+
+
+_FACTORIES: Dict[
+    str, Callable[[], Tuple[Callable[[Any], bytes], Callable[..., Any]]]
+] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+def load_codec(
+    name: str = "auto"
+) -> Tuple[str, Callable[[Any], bytes], Callable[..., Any]]:
+    """
+    Resolves a JSON codec by name.
+
+    With ``"auto"``, the first installed codec among msgspec, orjson and the
+    standard library is used, in order of measured speed on transcripts
+    (see ``benchmarks/bench_codec.py``).
+
+    Args:
+        name (str): ``"auto"``, ``"msgspec"``, ``"orjson"`` or ``"json"``.
+
+    Returns:
+        Tuple[str, Callable[[Any], bytes], Callable[..., Any]]: The codec
+            name and its ``dumps`` and ``loads`` functions.
+
+    Raises:
+        ValueError: If the name is unknown.
+        ImportError: If the requested codec is not installed.
+    """
+    if name == "auto":
+        for candidate in CODECS:
+            try:
+                return (candidate, *_FACTORIES[candidate]())
+            except ImportError:
+                continue
+
+    if name not in _FACTORIES:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    return (name, *_FACTORIES[name]())
+
+
+CODEC_NAME, _dumps, _loads = load_codec(os.getenv("JSON_CODEC", "auto"))
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes an object to compact UTF-8 JSON.
+
+    Every codec produces the same representation: no whitespace between
+    tokens and non-ASCII characters written as UTF-8 rather than ``\\u``
+    escapes.
+
+    Args:
+        obj (Any): JSON-serializable object.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+
+    Raises:
+        TypeError: If the object cannot be serialized.
+    """
+    return _dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parses a JSON document.
+
+    Args:
+        data (Union[bytes, str]): UTF-8 encoded or text JSON document.
+
+    Returns:
+        Any: The parsed value.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+    return _loads(data)
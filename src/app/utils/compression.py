@@ -0,0 +1,214 @@
+import gzip
+import zlib
+from types import ModuleType
+from typing import Any, BinaryIO, Iterator, Optional
+
+
+def _import_zstandard() -> Optional[ModuleType]:
+    try:
+        import zstandard
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return zstandard
+
+
+zstandard = _import_zstandard()
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_ENCODINGS = {"gzip": GZIP, "x-gzip": GZIP, "zstd": ZSTD}
+_SUFFIXES = {".gz": GZIP, ".gzip": GZIP, ".zst": ZSTD, ".zstd": ZSTD}
+
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+class LineTooLongError(ValueError):
+    """
+    Raised by :func:`iter_lines` when a line exceeds its size limit.
+    """
+
+
+class _PeekableStream:
+    """
+    Read-only stream wrapper that replays bytes consumed by :meth:`peek`.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        self._stream = stream
+        self._head = b""
+
+    def peek(self, size: int) -> bytes:
+        while len(self._head) < size:
+            chunk = self._stream.read(size - len(self._head))
+            if not chunk:
+                break
+            self._head += chunk
+        return self._head[:size]
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            return self._stream.read(size)
+
+        if size is None or size < 0:
+            data = self._head + self._stream.read()
+            self._head = b""
+            return data
+
+        data, self._head = self._head[:size], self._head[size:]
+        if len(data) < size:
+            data += self._stream.read(size - len(data))
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            close()
+
+
+def strip_compression_suffix(key: str) -> str:
+    """
+    Removes a trailing compression suffix such as ``.gz`` from a key.
+
+    Args:
+        key (str): Key (path) to an object.
+
+    Returns:
+        str: The key without its compression suffix.
+
+    Example:
+        >>> strip_compression_suffix("exports/day.jsonl.gz")
+        'exports/day.jsonl'
+    """
+    lowered = key.lower()
+    for suffix in _SUFFIXES:
+        if lowered.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+def detect_compression(
+    content_encoding: Optional[str],
+    key: str,
+    head: bytes = b""
+) -> Optional[str]:
+    """
+    Detects the compression of an object.
+
+    The ``Content-Encoding`` metadata wins, then the key suffix, then the
+    magic bytes at the start of the content.
+
+    Args:
+        content_encoding (Optional[str]): ``ContentEncoding`` of the object.
+        key (str): Key (path) to the object.
+        head (bytes): First bytes of the object content.
+
+    Returns:
+        Optional[str]: ``"gzip"``, ``"zstd"`` or None for plain content.
+    """
+    if content_encoding:
+        encoding = _ENCODINGS.get(content_encoding.strip().lower())
+        if encoding:
+            return encoding
+
+    lowered = key.lower()
+    for suffix, encoding in _SUFFIXES.items():
+        if lowered.endswith(suffix):
+            return encoding
+
+    if head.startswith(GZIP_MAGIC):
+        return GZIP
+    if head.startswith(ZSTD_MAGIC):
+        return ZSTD
+    return None
+
+
+def open_decompressed(
+    stream: Any,
+    content_encoding: Optional[str] = None,
+    key: str = ""
+) -> BinaryIO:
+    """
+    Wraps a readable stream so that it yields decompressed bytes.
+
+    Decompression is incremental: bytes are pulled from ``stream`` only as
+    the returned object is read, so the compressed content is never buffered
+    as a whole.
+
+    Args:
+        stream (Any): Object with a ``read(size)`` method, such as a botocore
+            ``StreamingBody``.
+        content_encoding (Optional[str]): ``ContentEncoding`` of the object.
+        key (str): Key (path) to the object.
+
+    Returns:
+        BinaryIO: A readable stream of decompressed content.
+
+    Raises:
+        ValueError: If the content is zstd-compressed and the optional
+            ``zstandard`` package is not installed.
+    """
+    peekable = _PeekableStream(stream)
+    encoding = detect_compression(
+        content_encoding,
+        key,
+        peekable.peek(len(ZSTD_MAGIC))
+    )
+
+    if encoding == GZIP:
+        return gzip.GzipFile(fileobj=peekable, mode="rb")  # type: ignore
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise ValueError(
+                "zstd-compressed content requires the 'zstandard' package"
+            )
+        return zstandard.ZstdDecompressor().stream_reader(peekable)
+    return peekable  # type: ignore[return-value]
+
+
+def iter_lines(
+    stream: Any,
+    chunk_size: int,
+    max_line_bytes: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Yields the lines of a stream without their line terminator.
+
+    Args:
+        stream (Any): Object with a ``read(size)`` method.
+        chunk_size (int): Number of bytes read per call.
+        max_line_bytes (Optional[int]): Longest line accepted; the
+            incomplete line buffered while reading never grows past it.
+            None accepts lines of any length.
+
+    Yields:
+        bytes: One line at a time, including a final unterminated line.
+
+    Raises:
+        LineTooLongError: If a line is longer than ``max_line_bytes``.
+    """
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if max_line_bytes is not None and len(line) > max_line_bytes:
+                raise LineTooLongError(
+                    f"Line longer than {max_line_bytes} bytes"
+                )
+            yield line.rstrip(b"\r")
+        if max_line_bytes is not None and len(pending) > max_line_bytes:
+            raise LineTooLongError(f"Line longer than {max_line_bytes} bytes")
+    if pending:
+        yield pending.rstrip(b"\r")
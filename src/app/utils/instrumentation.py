@@ -0,0 +1,234 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+DEFAULT_NAMESPACE = "Lynza"
+SERVICE = "lynza"
+EMF_MAX_METRICS = 100
+EMF_MAX_VALUES = 100
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_metrics: Any = None
+_recorder: Any = None
+_lock = threading.Lock()
+_pending: Dict[str, Tuple[str, List[float]]] = {}
+
+
+def get_metrics() -> Any:
+    """
+    Returns the powertools EMF metrics, creating them on first use.
+
+    The namespace is read from ``POWERTOOLS_METRICS_NAMESPACE`` and defaults
+    to ``Lynza``; every metric carries the ``service`` dimension.
+
+    Returns:
+        Any: An ``aws_lambda_powertools.Metrics`` instance.
+    """
+    global _metrics
+    if _metrics is None:
+        with _lock:
+            if _metrics is None:
+                from aws_lambda_powertools import Metrics
+
+                _metrics = Metrics(
+                    namespace=os.getenv(
+                        "POWERTOOLS_METRICS_NAMESPACE", DEFAULT_NAMESPACE
+                    ),
+                    service=SERVICE
+                )
+    return _metrics
+
+
+def get_recorder() -> Any:
+    """
+    Returns the X-Ray recorder when tracing is enabled and available.
+
+    Returns:
+        Any: ``aws_xray_sdk.core.xray_recorder``, or None when
+            ``TRACING_ENABLED`` is off or ``aws-xray-sdk`` is not installed.
+    """
+    global _recorder
+    if not TRACING_ENABLED:
+        return None
+    if _recorder is None:
+        try:
+            from aws_xray_sdk.core import xray_recorder
+        except ImportError:  # pragma: no cover - optional dependency
+            return None
+        _recorder = xray_recorder
+    return _recorder
+
+
+def add_metric(name: str, value: float, unit: str = "Count") -> None:
+    """
+    Records one value of a metric for the current invocation.
+
+    Values are buffered in memory and only serialized by
+    :func:`flush_metrics`, since ``Metrics.add_metric`` validates and formats
+    a debug message on every call, which would cost more than the stages
+    being timed. Values of the same metric are published as one EMF array,
+    except ``Count`` metrics, which are summed into one value per flush so
+    that per-line counters of large NDJSON objects take constant memory.
+    Safe to call from worker threads.
+
+    Args:
+        name (str): Metric name, such as ``"Records"``.
+        value (float): The value to record.
+        unit (str): CloudWatch unit, such as ``"Count"`` or
+            ``"Milliseconds"``.
+    """
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        entry = _pending.get(name)
+        if entry is None:
+            _pending[name] = (unit, [value])
+        elif unit == "Count":
+            entry[1][0] += value
+        else:
+            entry[1].append(value)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times a pipeline stage and records it as ``<name>Latency``.
+
+    The latency is recorded in milliseconds even when the stage raises.
+    With tracing enabled, the stage also runs in an X-Ray subsegment of the
+    same name. When both metrics and tracing are off the only cost is one
+    flag check.
+
+    Args:
+        name (str): Stage name, such as ``"S3Get"``.
+
+    Example:
+        >>> with stage("Classify"):  # doctest: +SKIP
+        ...     sentiment = classify_sentiment(text)
+    """
+    recorder = get_recorder()
+    if not METRICS_ENABLED and recorder is None:
+        yield
+        return
+
+    subsegment = recorder.in_subsegment(name) if recorder else None
+    start = time.perf_counter()
+    try:
+        if subsegment is not None:
+            with subsegment:
+                yield
+        else:
+            yield
+    finally:
+        add_metric(
+            f"{name}Latency",
+            (time.perf_counter() - start) * 1000,
+            "Milliseconds"
+        )
+
+
+def record_sentiment(payload: Dict[str, Any]) -> None:
+    """
+    Counts an enriched transcript under ``Sentiment<Label>``.
+
+    Args:
+        payload (Dict[str, Any]): The enriched payload.
+    """
+    sentiment = payload.get("analysis", {}).get("sentiment")
+    if sentiment:
+        add_metric(f"Sentiment{sentiment.title()}", 1)
+
+
+def flush_metrics() -> None:
+    """
+    Writes the recorded metrics to stdout as one EMF document.
+
+    In Lambda, CloudWatch Logs turns the document into metrics; locally it
+    is a plain JSON line. Does nothing when no metric was recorded.
+    EMF allows 100 metrics per document and 100 values per metric, so
+    larger sets are split over several documents.
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not METRICS_ENABLED:
+        return
+
+    metrics = get_metrics()
+    while pending:
+        metric_set = {}
+        for name in list(pending)[:EMF_MAX_METRICS]:
+            unit, values = pending[name]
+            metric_set[name] = {
+                "Unit": unit,
+                "StorageResolution": 60,
+                "Value": values[:EMF_MAX_VALUES],
+            }
+            if len(values) > EMF_MAX_VALUES:
+                pending[name] = (unit, values[EMF_MAX_VALUES:])
+            else:
+                del pending[name]
+        document = metrics.serialize_metric_set(metrics=metric_set)
+        print(json.dumps(document, separators=(",", ":")))
+
+
+def clear_metrics() -> None:
+    """
+    Drops the metrics recorded since the last flush.
+    """
+    with _lock:
+        _pending.clear()
+
+
+def log_metrics(handler: F) -> F:
+    """
+    Decorates a Lambda entrypoint so that its metrics are flushed on return.
+
+    Metrics are flushed even when the handler raises, so failed invocations
+    are measured too.
+
+    Args:
+        handler (F): The Lambda handler.
+
+    Returns:
+        F: The wrapped handler.
+    """
+    @functools.wraps(handler)
+    def wrapper(event: Any, context: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return handler(event, context, *args, **kwargs)
+        finally:
+            flush_metrics()
+
+    return wrapper  # type: ignore[return-value]
+
+
+def metric_values(document: Dict[str, Any]) -> Dict[str, List[float]]:
+    """
+    Extracts the metric values of an EMF document printed by
+    :func:`flush_metrics`.
+
+    Meant for tests and local tooling that read the metrics back.
+
+    Args:
+        document (Dict[str, Any]): A parsed EMF document.
+
+    Returns:
+        Dict[str, List[float]]: The values recorded per metric name.
+    """
+    values = {}
+    for directive in document["_aws"]["CloudWatchMetrics"]:
+        for metric in directive["Metrics"]:
+            value = document[metric["Name"]]
+            values[metric["Name"]] = (
+                value if isinstance(value, list) else [value]
+            )
+    return values
@@ -1,4 +1,20 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+
+class S3ObjectRef(NamedTuple):
+    """
+    Location of a single object referenced by an S3 event record.
+
+    Attributes:
+        bucket (str): Name of the S3 bucket.
+        key (str): Key (path) to the object in the bucket.
+        etag (Optional[str]): ETag of the uploaded version, when the event
+            carries one.
+    """
+
+    bucket: str
+    key: str
+    etag: Optional[str] = None
 
 
 def get_s3_object_location(event: Dict[str, Any]) -> Tuple[str, str]:
@@ -34,3 +50,50 @@ def get_s3_object_location(event: Dict[str, Any]) -> Tuple[str, str]:
 
     except (IndexError, KeyError, TypeError) as e:
         raise KeyError("Invalid S3 event structure") from e
+
+
+def get_s3_object_locations(event: Dict[str, Any]) -> List[S3ObjectRef]:
+    """
+    Extracts the bucket name and object key of every record in an S3 event.
+
+    S3 may batch several uploads into a single notification, so every entry
+    in ``Records`` is returned, preserving the original order.
+
+    Args:
+        event (Dict[str, Any]): The AWS S3 event payload.
+
+    Returns:
+        List[S3ObjectRef]: One location per record in the event.
+
+    Raises:
+        KeyError: If the event has no records or any record is missing
+            expected fields.
+
+    Example:
+        >>> locations = get_s3_object_locations({
+        ...     "Records": [
+        ...         {"s3": {"bucket": {"name": "b"}, "object": {"key": "1.json"}}},
+        ...         {"s3": {"bucket": {"name": "b"}, "object": {"key": "2.json"}}},
+        ...     ]
+        ... })
+        >>> for location in locations:
+        ...     print(location)
+        S3ObjectRef(bucket='b', key='1.json', etag=None)
+        S3ObjectRef(bucket='b', key='2.json', etag=None)
+    """
+    try:
+        records = event["Records"]
+        if not records:
+            raise IndexError("No records in event")
+
+        return [
+            S3ObjectRef(
+                bucket=record["s3"]["bucket"]["name"],
+                key=record["s3"]["object"]["key"],
+                etag=record["s3"]["object"].get("eTag"),
+            )
+            for record in records
+        ]
+
+    except (IndexError, KeyError, TypeError) as e:
+        raise KeyError("Invalid S3 event structure") from e
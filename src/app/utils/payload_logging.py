@@ -0,0 +1,126 @@
+import itertools
+import logging
+import os
+from typing import Any, Dict, Optional
+
+DEFAULT_SAMPLE_RATE = 1
+DEFAULT_MAX_CHARS = 1024
+
+REDACTED_FIELDS = ("transcript",)
+
+LOG_PAYLOAD_SAMPLE_RATE = int(
+    os.getenv("LOG_PAYLOAD_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+)
+LOG_PAYLOAD_MAX_CHARS = int(
+    os.getenv("LOG_PAYLOAD_MAX_CHARS", DEFAULT_MAX_CHARS)
+)
+LOG_PAYLOAD_REDACT = os.getenv("LOG_PAYLOAD_REDACT", "false").lower() == "true"
+
+_counter = itertools.count()
+
+
+def should_sample(sample_rate: int) -> bool:
+    """
+    Decides whether the current payload is one of the sampled 1-in-N.
+
+    Sampling is deterministic: a shared counter is advanced on every call,
+    so exactly one payload in ``sample_rate`` is selected. ``next`` on an
+    ``itertools.count`` is atomic, so the function is safe to call from
+    worker threads.
+
+    Args:
+        sample_rate (int): Log one payload in this many; 0 or less disables
+            payload logging.
+
+    Returns:
+        bool: True if the payload should be logged.
+    """
+    if sample_rate <= 0:
+        return False
+    return next(_counter) % sample_rate == 0
+
+
+def summarize_payload(
+    payload: Dict[str, Any],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    redact: bool = False
+) -> Dict[str, Any]:
+    """
+    Builds a bounded copy of a payload that is safe to log.
+
+    Top-level strings longer than ``max_chars`` are truncated, and with
+    ``redact`` the transcript is replaced by its length, so the log record
+    never carries the customer's words.
+
+    Args:
+        payload (Dict[str, Any]): The payload to log.
+        max_chars (int): Longest string kept in full; 0 or less keeps every
+            string whole.
+        redact (bool): Whether to hide the transcript.
+
+    Returns:
+        Dict[str, Any]: A shallow copy of the payload with long or
+            sensitive strings shortened.
+
+    Example:
+        >>> summarize_payload({"transcript": "hola mundo"}, max_chars=4)
+        {'transcript': 'hola... <6 more chars>'}
+        >>> summarize_payload({"transcript": "hola"}, redact=True)
+        {'transcript': '<redacted 4 chars>'}
+    """
+    summary: Dict[str, Any] = {}
+    for field, value in payload.items():
+        if isinstance(value, str):
+            if redact and field in REDACTED_FIELDS:
+                value = f"<redacted {len(value)} chars>"
+            elif 0 < max_chars < len(value):
+                value = (
+                    f"{value[:max_chars]}... "
+                    f"<{len(value) - max_chars} more chars>"
+                )
+        summary[field] = value
+    return summary
+
+
+def log_payload(
+    logger: Any,
+    message: str,
+    payload: Any,
+    field: str = "data",
+    sample_rate: Optional[int] = None
+) -> bool:
+    """
+    Logs a payload at debug level only when it is cheap to skip.
+
+    The level is checked first, so when debug logging is off no ``extra``
+    dict is built and nothing is serialized. Otherwise only one payload in
+    ``LOG_PAYLOAD_SAMPLE_RATE`` is logged, truncated to
+    ``LOG_PAYLOAD_MAX_CHARS`` characters per string and with the transcript
+    hidden when ``LOG_PAYLOAD_REDACT`` is ``"true"``.
+
+    Args:
+        logger (Any): A powertools or standard library logger.
+        message (str): The log message.
+        payload (Any): The payload; dicts are summarized, other values are
+            logged as they are.
+        field (str): Name of the log record field that holds the payload.
+        sample_rate (Optional[int]): Overrides ``LOG_PAYLOAD_SAMPLE_RATE``.
+
+    Returns:
+        bool: True if a record was emitted.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    if sample_rate is None:
+        sample_rate = LOG_PAYLOAD_SAMPLE_RATE
+    if not should_sample(sample_rate):
+        return False
+
+    if isinstance(payload, dict):
+        payload = summarize_payload(
+            payload,
+            max_chars=LOG_PAYLOAD_MAX_CHARS,
+            redact=LOG_PAYLOAD_REDACT
+        )
+    logger.debug(message, extra={field: payload})
+    return True
@@ -1,4 +1,5 @@
 import os
+from types import SimpleNamespace
 import boto3
 import pytest
 
@@ -54,3 +55,94 @@ def _clean_env(monkeypatch):
     Prevents leak of environment state between tests.
     """
     monkeypatch.delenv("SQS_QUEUE_URL", raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _reset_guards(monkeypatch):
+    """
+    Gives every test fresh AWS call guards, so that a circuit breaker opened
+    by one test cannot reject the calls of the next.
+    """
+    from app.adapters import resilience
+
+    monkeypatch.setattr(resilience, "_guards", {})
+
+
+class FakeClock:
+    """
+    Clock that only moves when a test advances it.
+
+    Calling the clock returns :attr:`now` in seconds, and :meth:`sleep`
+    advances it instead of blocking, so it can stand in for both
+    ``time.time`` or ``time.monotonic`` and ``time.sleep``.
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """
+    Provides a fake clock starting at zero.
+
+    Returns:
+        FakeClock: A callable returning the current fake seconds.
+    """
+    return FakeClock()
+
+
+@pytest.fixture
+def lambda_context():
+    """
+    Provides a minimal AWS Lambda context object.
+
+    The powertools ``inject_lambda_context`` decorator reads these attributes
+    to enrich log records, so a plain dict cannot be used.
+
+    Returns:
+        SimpleNamespace: An object exposing the Lambda context attributes.
+    """
+    return SimpleNamespace(
+        function_name="lynza-test",
+        function_version="$LATEST",
+        invoked_function_arn=(
+            "arn:aws:lambda:us-east-1:000000000000:function:lynza-test"
+        ),
+        memory_limit_in_mb=128,
+        aws_request_id="test-request-id",
+        log_group_name="/aws/lambda/lynza-test",
+        log_stream_name="test-stream",
+    )
+
+
+@pytest.fixture
+def moto_aws(monkeypatch, mocker):
+    """
+    Runs the test against in-process moto S3 and SQS backends.
+
+    Points the application at the default AWS endpoints with fake
+    credentials and resets the cached clients, so that new clients are
+    created inside the mock.
+
+    Yields:
+        None
+    """
+    from moto import mock_aws
+
+    monkeypatch.setenv("AWS_ENDPOINT_URL", "")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    mocker.patch("app.adapters.aws_clients._session", None)
+    mocker.patch("app.adapters.storage.s3", None)
+    mocker.patch("app.adapters.message_bus.sqs", None)
+
+    with mock_aws():
+        yield
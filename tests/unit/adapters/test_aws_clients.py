@@ -0,0 +1,68 @@
+import pytest
+from botocore.config import Config
+from app.adapters import aws_clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(mocker, monkeypatch):
+    """
+    Resets the shared session and provides offline credentials.
+    """
+    mocker.patch.object(aws_clients, "_session", None)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+
+def test_create_client_applies_tuned_defaults():
+    """
+    Should build clients with a larger pool, keepalive, bounded timeouts
+    and standard retries.
+    """
+    config = aws_clients.create_client("s3").meta.config
+
+    assert config.max_pool_connections == 32
+    assert config.tcp_keepalive is True
+    assert config.connect_timeout == 2.0
+    assert config.read_timeout == 10.0
+    assert config.retries == {"mode": "standard", "total_max_attempts": 3}
+
+
+def test_create_client_reads_settings_from_environment(monkeypatch):
+    """
+    Should honour the pool, keepalive, timeout and retry variables.
+    """
+    monkeypatch.setenv("AWS_MAX_POOL_CONNECTIONS", "64")
+    monkeypatch.setenv("AWS_TCP_KEEPALIVE", "false")
+    monkeypatch.setenv("AWS_CONNECT_TIMEOUT", "0.5")
+    monkeypatch.setenv("AWS_READ_TIMEOUT", "3")
+    monkeypatch.setenv("AWS_RETRY_MODE", "adaptive")
+    monkeypatch.setenv("AWS_MAX_ATTEMPTS", "5")
+
+    config = aws_clients.create_client("sqs").meta.config
+
+    assert config.max_pool_connections == 64
+    assert config.tcp_keepalive is False
+    assert config.connect_timeout == 0.5
+    assert config.read_timeout == 3.0
+    assert config.retries == {"mode": "adaptive", "total_max_attempts": 5}
+
+
+def test_create_client_merges_overrides():
+    """
+    Should let callers override individual settings.
+    """
+    client = aws_clients.create_client("s3", Config(read_timeout=30))
+
+    assert client.meta.config.read_timeout == 30
+    assert client.meta.config.max_pool_connections == 32
+
+
+def test_clients_share_one_session():
+    """
+    Should build every client from the same boto3 session.
+    """
+    aws_clients.create_client("s3")
+    session = aws_clients.get_session()
+    aws_clients.create_client("sqs")
+
+    assert aws_clients.get_session() is session
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import boto3
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from app.adapters.claim_check import (
+    is_claim_check,
+    offload_if_needed,
+    read_message_body,
+)
+from app.adapters.message_bus import SqsBatchPublisher, send_message_to_queue
+
+BUCKET = "claim-check-bucket"
+
+
+@pytest.fixture
+def claim_check(moto_aws, monkeypatch):
+    """
+    Configures a claim-check bucket and a queue in moto with a 1 KB
+    threshold.
+
+    Returns:
+        dict: The boto3 S3 and SQS clients and the queue URL.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName="out")["QueueUrl"]
+
+    monkeypatch.setenv("CLAIM_CHECK_BUCKET", BUCKET)
+    monkeypatch.setenv("CLAIM_CHECK_THRESHOLD_BYTES", "1024")
+    monkeypatch.setenv("SQS_QUEUE_URL", queue_url)
+    return {"s3": s3, "sqs": sqs, "queue_url": queue_url}
+
+
+def _receive_body(claim_check):
+    response = claim_check["sqs"].receive_message(
+        QueueUrl=claim_check["queue_url"]
+    )
+    return response["Messages"][0]["Body"]
+
+
+def test_small_messages_stay_inline(claim_check):
+    """
+    Should send payloads under the threshold as-is, without touching S3.
+    """
+    payload = {"transcript": "corto"}
+
+    send_message_to_queue(payload)
+
+    assert json.loads(_receive_body(claim_check)) == payload
+    assert "Contents" not in claim_check["s3"].list_objects_v2(Bucket=BUCKET)
+
+
+def test_large_messages_are_offloaded_and_resolved(claim_check):
+    """
+    Should store oversized payloads in S3, send a pointer with the content
+    hash, and resolve it back to the payload with the reader helper.
+    """
+    payload = {"transcript": "ñ" * 5000}
+
+    send_message_to_queue(payload)
+
+    body = _receive_body(claim_check)
+    pointer = json.loads(body)["claim_check"]
+    stored = claim_check["s3"].get_object(Bucket=BUCKET, Key=pointer["key"])
+    content = stored["Body"].read()
+    assert is_claim_check(json.loads(body))
+    assert pointer["sha256"] == hashlib.sha256(content).hexdigest()
+    assert pointer["size"] == len(content)
+    assert read_message_body(body) == payload
+
+
+def test_batch_publisher_offloads_large_entries(claim_check):
+    """
+    Should offload oversized entries instead of rejecting them.
+    """
+    with SqsBatchPublisher() as publisher:
+        publisher.add({"transcript": "x" * 300 * 1024})
+
+    assert publisher.failed == {}
+    assert read_message_body(_receive_body(claim_check)) == {
+        "transcript": "x" * 300 * 1024
+    }
+
+
+def test_read_message_body_rejects_tampered_payload(claim_check):
+    """
+    Should raise ValueError when the stored body does not match its hash.
+    """
+    pointer = offload_if_needed(b'{"transcript": "' + b"a" * 2000 + b'"}')
+    key = json.loads(pointer)["claim_check"]["key"]
+    claim_check["s3"].put_object(Bucket=BUCKET, Key=key, Body=b"{}")
+
+    with pytest.raises(ValueError, match="does not match its digest"):
+        read_message_body(pointer)
+
+
+def test_offload_is_disabled_without_bucket(claim_check, monkeypatch):
+    """
+    Should leave bodies untouched when no claim-check bucket is configured.
+    """
+    monkeypatch.delenv("CLAIM_CHECK_BUCKET")
+    body = b"x" * 4096
+
+    assert offload_if_needed(body) is body
+
+
+def test_offload_connection_errors_raise_value_error(monkeypatch, mocker):
+    """
+    Should report an S3 endpoint that cannot be reached as a ValueError, so
+    the message fails instead of the invocation.
+    """
+    monkeypatch.setenv("CLAIM_CHECK_BUCKET", BUCKET)
+    monkeypatch.setenv("CLAIM_CHECK_THRESHOLD_BYTES", "10")
+    monkeypatch.setenv("AWS_GUARD_MAX_ATTEMPTS", "1")
+    s3 = mocker.patch("app.adapters.claim_check.get_s3_client").return_value
+    s3.put_object.side_effect = EndpointConnectionError(
+        endpoint_url="https://s3.local"
+    )
+
+    with pytest.raises(ValueError, match="Failed to store claim-check body"):
+        offload_if_needed(b"x" * 100)
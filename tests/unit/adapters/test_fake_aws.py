@@ -0,0 +1,183 @@
+import json
+import pytest
+from botocore.exceptions import ClientError
+from app.adapters import message_bus, storage
+from app.adapters.fake_aws import (
+    FakeS3Client,
+    FakeSqsClient,
+    FaultInjector,
+    Latency,
+    install_fake_aws,
+)
+from app.adapters.message_bus import SqsBatchPublisher
+from app.adapters.resilience import get_guard
+from app.adapters.storage import read_object_bytes
+from app.handler import handler
+
+BUCKET = "input-bucket"
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    """
+    Installs fake S3 and SQS clients with a bucket and an output queue,
+    restoring the real clients afterwards.
+
+    Returns:
+        tuple: The S3 fake, the SQS fake and the queue URL.
+    """
+    monkeypatch.setattr(storage, "s3", None)
+    monkeypatch.setattr(message_bus, "sqs", None)
+    monkeypatch.setenv("AWS_GUARD_BASE_DELAY", "0")
+    s3, sqs = install_fake_aws()
+    s3.create_bucket(Bucket=BUCKET)
+    queue_url = sqs.create_queue(QueueName="out")["QueueUrl"]
+    monkeypatch.setenv("SQS_QUEUE_URL", queue_url)
+    return s3, sqs, queue_url
+
+
+def test_handler_runs_against_the_fakes(fakes, lambda_context):
+    """
+    Should read, classify and publish every object without any network.
+    """
+    s3, sqs, queue_url = fakes
+    keys = []
+    for index, transcript in enumerate(["no funciona", "gracias", "hola"]):
+        keys.append(f"in/{index}.json")
+        s3.put_object(Bucket=BUCKET, Key=keys[-1], Body=json.dumps({
+            "interaction_id": f"CHAT-{index}",
+            "customer_id": "CUST-1",
+            "transcript": transcript,
+        }))
+    event = {"Records": [
+        {"s3": {"bucket": {"name": BUCKET}, "object": {"key": key}}}
+        for key in keys
+    ]}
+
+    result = handler(event, lambda_context)
+
+    assert result["statusCode"] == 200
+    bodies = [json.loads(m["Body"]) for m in sqs.messages(queue_url)]
+    assert {b["interaction_id"]: b["analysis"]["sentiment"] for b in bodies} == {
+        "CHAT-0": "NEGATIVE",
+        "CHAT-1": "POSITIVE",
+        "CHAT-2": "NEUTRAL",
+    }
+
+
+def test_calls_over_capacity_are_throttled_and_retried(fakes):
+    """
+    Should throttle calls beyond the capacity of the current second with the
+    S3 error code, which the guard retries until its attempts run out.
+    """
+    s3, _, _ = fakes
+    s3.put_object(Bucket=BUCKET, Key="a.json", Body=b"{}")
+    s3.injector = FaultInjector(max_rps=1, clock=lambda: 0.0)
+
+    assert read_object_bytes(BUCKET, "a.json") == b"{}"
+    with pytest.raises(RuntimeError, match="SlowDown"):
+        read_object_bytes(BUCKET, "a.json")
+
+    assert s3.injector.stats()["throttled"] == 3
+    assert get_guard("s3").retries == 2
+
+
+def test_latency_is_injected_before_every_call():
+    sleeps = []
+    s3 = FakeS3Client(
+        FaultInjector(Latency.parse("fixed:5"), sleep=sleeps.append)
+    )
+    s3.create_bucket(Bucket=BUCKET)
+    s3.list_objects_v2(Bucket=BUCKET)
+
+    assert sleeps == [0.005, 0.005]
+    assert s3.injector.stats()["delay_s"] == pytest.approx(0.01)
+
+
+def test_injected_failures_replay_for_a_seed():
+    """
+    Should fail the same calls on every run with the same seed.
+    """
+    def failures(seed):
+        injector = FaultInjector(error_rate=0.2, seed=seed)
+        outcomes = []
+        for _ in range(200):
+            try:
+                injector.before_call("sqs", "SendMessageBatch")
+                outcomes.append(False)
+            except ClientError as e:
+                assert e.response["Error"]["Code"] == "InternalError"
+                outcomes.append(True)
+        return outcomes
+
+    assert failures(1) == failures(1)
+    assert failures(1) != failures(2)
+    assert 20 < sum(failures(1)) < 60
+
+
+@pytest.mark.parametrize("spec, kind, a, b", [
+    ("none", "none", 0.0, 0.0),
+    ("fixed:5", "fixed", 0.005, 0.0),
+    ("uniform:2:10", "uniform", 0.002, 0.01),
+    ("lognormal:20:0.5", "lognormal", 0.02, 0.5),
+])
+def test_latency_specifications_are_parsed(spec, kind, a, b):
+    latency = Latency.parse(spec)
+
+    assert (latency.kind, latency.a, latency.b) == (kind, a, pytest.approx(b))
+
+
+@pytest.mark.parametrize("spec", ["fixed", "uniform:2", "gamma:1:2", "fixed:x"])
+def test_invalid_latency_specifications_are_rejected(spec):
+    with pytest.raises(ValueError, match="latency specification"):
+        Latency.parse(spec)
+
+
+def test_sqs_fake_enforces_batch_limits():
+    sqs = FakeSqsClient()
+    queue_url = sqs.create_queue(QueueName="out")["QueueUrl"]
+    entries = [{"Id": str(i), "MessageBody": "x"} for i in range(11)]
+
+    with pytest.raises(ClientError, match="TooManyEntriesInBatchRequest"):
+        sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+    with pytest.raises(ClientError, match="BatchRequestTooLong"):
+        sqs.send_message_batch(QueueUrl=queue_url, Entries=[
+            {"Id": str(i), "MessageBody": "x" * 100_000} for i in range(3)
+        ])
+    with pytest.raises(ClientError, match="NonExistentQueue"):
+        sqs.send_message(QueueUrl=queue_url + "-missing", MessageBody="x")
+
+
+def test_failed_batch_entries_reach_the_publisher(fakes):
+    """
+    Should report entries listed in the ``Failed`` part of a response.
+    """
+    _, sqs, queue_url = fakes
+    sqs.injector = FaultInjector()
+    sqs.entry_failure_rate = 1.0
+
+    with SqsBatchPublisher(max_attempts=1) as publisher:
+        publisher.add({"a": 1}, entry_id="a")
+
+    assert publisher.sent == 0
+    assert "InternalError" in publisher.failed["a"]
+    assert sqs.messages(queue_url) == []
+
+
+def test_s3_fake_lists_keys_in_pages():
+    s3 = FakeS3Client()
+    s3.create_bucket(Bucket=BUCKET)
+    for key in ["p/a", "p/b", "p/c", "q/d"]:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"1")
+
+    pages = list(
+        s3.get_paginator("list_objects_v2").paginate(
+            Bucket=BUCKET, Prefix="p/", MaxKeys=2
+        )
+    )
+
+    assert [[o["Key"] for o in page["Contents"]] for page in pages] == [
+        ["p/a", "p/b"], ["p/c"]
+    ]
+    with pytest.raises(ClientError, match="NoSuchKey"):
+        s3.get_object(Bucket=BUCKET, Key="p/missing")
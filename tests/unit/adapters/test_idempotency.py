@@ -0,0 +1,202 @@
+import boto3
+import pytest
+
+from app.adapters.idempotency import (
+    DynamoDbIdempotencyStore,
+    IdempotencyCache,
+    SqliteIdempotencyStore,
+    create_store,
+    get_idempotency_cache,
+    interaction_key,
+    object_key,
+)
+from app.utils.parse_event import S3ObjectRef
+
+
+def test_cache_remembers_keys_until_ttl(clock):
+    """
+    Should report a recorded key as duplicate until its TTL elapses.
+    """
+    cache = IdempotencyCache(ttl_seconds=60, clock=clock)
+    cache.add("k")
+
+    assert cache.contains("k")
+    clock.now += 61
+    assert not cache.contains("k")
+
+
+def test_cache_evicts_least_recently_used(clock):
+    """
+    Should drop the least recently used key once the LRU is full.
+    """
+    cache = IdempotencyCache(max_entries=2, clock=clock)
+    cache.add("a")
+    cache.add("b")
+    cache.contains("a")
+    cache.add("c")
+
+    assert cache.contains("a")
+    assert not cache.contains("b")
+    assert cache.contains("c")
+
+
+def test_cache_falls_through_to_store(clock):
+    """
+    Should find keys recorded by another container in the persistent store.
+    """
+    store = SqliteIdempotencyStore(":memory:")
+    IdempotencyCache(store=store, clock=clock).add("k")
+
+    cache = IdempotencyCache(store=store, clock=clock)
+
+    assert cache.contains("k")
+    assert cache.stats() == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+def test_cache_ignores_expired_store_entries(clock):
+    """
+    Should treat keys past their expiry in the store as absent.
+    """
+    store = SqliteIdempotencyStore(":memory:")
+    store.put("k", clock.now - 1)
+
+    cache = IdempotencyCache(store=store, clock=clock)
+
+    assert not cache.contains("k")
+    assert cache.stats()["hit_rate"] == 0.0
+
+
+def test_only_one_container_claims_a_key(clock):
+    """
+    Should let exactly one of two containers sharing a store claim a key,
+    and let a retry claim it again once the claim was released.
+    """
+    store = SqliteIdempotencyStore(":memory:")
+    first = IdempotencyCache(store=store, clock=clock)
+    second = IdempotencyCache(store=store, clock=clock)
+
+    assert first.claim("k")
+    assert not second.claim("k")
+
+    first.release("k")
+    assert second.claim("k")
+
+
+def test_claims_expire_unless_the_work_is_recorded(clock):
+    """
+    Should free an abandoned claim after ``claim_seconds``, but keep a
+    recorded key for the whole TTL.
+    """
+    store = SqliteIdempotencyStore(":memory:")
+    cache = IdempotencyCache(
+        store=store, ttl_seconds=600, claim_seconds=60, clock=clock
+    )
+    cache.claim("abandoned")
+    cache.claim("done")
+    cache.add("done")
+    clock.now += 61
+
+    other = IdempotencyCache(store=store, clock=clock)
+    assert other.claim("abandoned")
+    assert not other.claim("done")
+
+
+def test_sqlite_store_persists_to_file(tmp_path):
+    """
+    Should keep keys across store instances sharing a file.
+    """
+    path = str(tmp_path / "idempotency.db")
+    SqliteIdempotencyStore(path).put("k", 2000.0)
+
+    assert SqliteIdempotencyStore(path).get("k") == 2000.0
+    assert SqliteIdempotencyStore(path).get("other") is None
+
+
+def test_dynamodb_store_round_trip(moto_aws):
+    """
+    Should store and read expiry times from a DynamoDB table.
+    """
+    boto3.client("dynamodb").create_table(
+        TableName="idempotency",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    store = DynamoDbIdempotencyStore("idempotency")
+
+    store.put("k", 2000.5)
+
+    assert store.get("k") == 2000.0
+    assert store.get("other") is None
+
+
+def test_dynamodb_store_claims_keys_conditionally(moto_aws):
+    """
+    Should claim a key with a conditional write that fails while an
+    unexpired entry exists.
+    """
+    boto3.client("dynamodb").create_table(
+        TableName="idempotency",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    store = DynamoDbIdempotencyStore("idempotency")
+
+    assert store.claim("k", 2000.0, now=1000.0)
+    assert not store.claim("k", 2500.0, now=1500.0)
+    assert store.claim("k", 3000.0, now=2000.0)
+    store.release("k")
+    assert store.get("k") is None
+
+
+def test_dynamodb_store_wraps_client_errors(moto_aws):
+    """
+    Should raise RuntimeError when the table cannot be reached.
+    """
+    store = DynamoDbIdempotencyStore("missing")
+
+    with pytest.raises(RuntimeError, match="Failed to read idempotency key"):
+        store.get("k")
+
+
+def test_object_key_requires_etag():
+    """
+    Should only build object keys for events carrying an ETag.
+    """
+    assert object_key(S3ObjectRef("b", "a.json")) is None
+    assert object_key(S3ObjectRef("b", "a.json", "e1")) == (
+        "s3://b/a.json?etag=e1"
+    )
+
+
+def test_interaction_key():
+    """
+    Should key payloads on their interaction id when present.
+    """
+    assert interaction_key({"interaction_id": "X"}) == "interaction:X"
+    assert interaction_key({}) is None
+
+
+def test_create_store_rejects_unknown_specs():
+    """
+    Should raise ValueError for unsupported store specifications.
+    """
+    assert create_store("memory") is None
+    with pytest.raises(ValueError, match="Unsupported IDEMPOTENCY_STORE"):
+        create_store("redis:localhost")
+
+
+def test_get_idempotency_cache_is_disabled_by_default(mocker, monkeypatch):
+    """
+    Should return None unless IDEMPOTENCY_STORE is set.
+    """
+    mocker.patch("app.adapters.idempotency._cache", None)
+    monkeypatch.delenv("IDEMPOTENCY_STORE", raising=False)
+
+    assert get_idempotency_cache() is None
+
+    monkeypatch.setenv("IDEMPOTENCY_STORE", "memory")
+    cache = get_idempotency_cache()
+    assert cache is get_idempotency_cache()
+    assert cache.store is None
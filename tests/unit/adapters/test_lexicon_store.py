@@ -0,0 +1,211 @@
+import json
+import os
+
+import boto3
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from app.adapters import lexicon_store
+from app.adapters.lexicon_store import LexiconStore, get_lexicon_store
+from app.domain.sentiment_analysis import classify_sentiment
+
+BUCKET = "lexicon-bucket"
+
+
+def _write_lexicon(path, negative, positive=("gracias",)):
+    path.write_text(
+        json.dumps({"negative": list(negative), "positive": list(positive)})
+    )
+
+
+@pytest.fixture
+def lexicon_file(tmp_path):
+    path = tmp_path / "lexicon.json"
+    _write_lexicon(path, ["demora"])
+    return path
+
+
+def test_store_loads_a_local_lexicon(lexicon_file, tmp_path):
+    """
+    Should compile the lexicon of a local file and use its MD5 as version.
+    """
+    store = LexiconStore(str(lexicon_file), cache_dir=str(tmp_path / "cache"))
+
+    lexicon = store.get()
+
+    assert lexicon.negative == {"demora"}
+    assert lexicon.positive == {"gracias"}
+    assert len(lexicon.version) == 32
+    assert classify_sentiment("Hubo una DEMORA", lexicon=lexicon) == "NEGATIVE"
+
+
+def test_store_checks_for_changes_at_most_every_refresh_interval(
+    lexicon_file, tmp_path, clock
+):
+    """
+    Should keep serving the loaded lexicon until the refresh interval has
+    passed, then reload it only when its content changed.
+    """
+    store = LexiconStore(
+        str(lexicon_file),
+        refresh_seconds=60,
+        cache_dir=str(tmp_path / "cache"),
+        clock=clock
+    )
+    first = store.get()
+
+    _write_lexicon(lexicon_file, ["reclamo"])
+    clock.now = 59
+    assert store.get() is first
+
+    clock.now = 60
+    assert store.get().negative == {"reclamo"}
+    assert store.reloads == 2
+
+    clock.now = 120
+    store.get()
+    assert store.reloads == 2
+
+
+def test_store_reuses_the_compiled_lexicon_from_the_cache(
+    lexicon_file, tmp_path, mocker
+):
+    """
+    Should load a lexicon compiled by another container from the cache
+    directory instead of compiling it again.
+    """
+    cache_dir = str(tmp_path / "cache")
+    LexiconStore(str(lexicon_file), cache_dir=cache_dir).get()
+    assert len(os.listdir(cache_dir)) == 1
+
+    compile_lexicon = mocker.patch(
+        "app.adapters.lexicon_store.Lexicon.from_document"
+    )
+    store = LexiconStore(str(lexicon_file), cache_dir=cache_dir)
+
+    assert store.get().negative == {"demora"}
+    assert store.cache_hits == 1
+    compile_lexicon.assert_not_called()
+
+
+def test_store_ignores_a_corrupt_cache_entry(lexicon_file, tmp_path):
+    """
+    Should compile the lexicon again when its cache entry cannot be read.
+    """
+    cache_dir = tmp_path / "cache"
+    store = LexiconStore(str(lexicon_file), cache_dir=str(cache_dir))
+    version = store.get().version
+    (cache_dir / f"{version}-{lexicon_store.CACHE_FORMAT}.pickle").write_bytes(
+        b"garbage"
+    )
+
+    fresh = LexiconStore(str(lexicon_file), cache_dir=str(cache_dir))
+
+    assert fresh.get().negative == {"demora"}
+    assert fresh.cache_hits == 0
+
+
+def test_store_keeps_the_current_lexicon_when_a_refresh_fails(
+    lexicon_file, tmp_path, clock
+):
+    """
+    Should keep using the loaded lexicon when the file becomes invalid, but
+    fail when no lexicon was ever loaded.
+    """
+    store = LexiconStore(
+        str(lexicon_file), refresh_seconds=1, cache_dir=None, clock=clock
+    )
+    first = store.get()
+
+    lexicon_file.write_text('{"negative": "not a list"}')
+    clock.now = 5
+    assert store.get() is first
+
+    broken = LexiconStore(str(lexicon_file), cache_dir=None)
+    with pytest.raises(RuntimeError, match="Failed to load lexicon"):
+        broken.get()
+
+
+def test_store_reloads_an_s3_lexicon_when_its_etag_changes(
+    moto_aws, tmp_path, clock
+):
+    """
+    Should check the ETag of an S3 lexicon with HEAD and only download it
+    again when it changed.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="lexicon.json",
+        Body=json.dumps({"negative": ["demora"], "positive": []})
+    )
+    store = LexiconStore(
+        f"s3://{BUCKET}/lexicon.json",
+        refresh_seconds=10,
+        cache_dir=str(tmp_path),
+        clock=clock
+    )
+    assert store.get().negative == {"demora"}
+
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="lexicon.json",
+        Body=json.dumps({"negative": ["reclamo"], "positive": []})
+    )
+    clock.now = 10
+
+    assert store.get().negative == {"reclamo"}
+    assert store.reloads == 2
+
+
+def test_store_keeps_an_s3_lexicon_when_s3_is_unreachable(
+    moto_aws, mocker, clock
+):
+    """
+    Should keep the loaded lexicon when its ETag cannot be checked.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="lexicon.json",
+        Body=json.dumps({"negative": ["demora"], "positive": []})
+    )
+    store = LexiconStore(
+        f"s3://{BUCKET}/lexicon.json",
+        refresh_seconds=10,
+        cache_dir=None,
+        clock=clock
+    )
+    first = store.get()
+
+    mocker.patch.object(store, "_get_s3").return_value.head_object.side_effect = (
+        EndpointConnectionError(endpoint_url="https://s3.local")
+    )
+    clock.now = 10
+
+    assert store.get() is first
+
+
+def test_classification_uses_the_configured_lexicon(
+    lexicon_file, tmp_path, monkeypatch, mocker
+):
+    """
+    Should classify with the lexicon named by LEXICON_SOURCE instead of the
+    built-in keywords.
+    """
+    mocker.patch("app.adapters.lexicon_store._store", None)
+    monkeypatch.setenv("LEXICON_SOURCE", str(lexicon_file))
+    monkeypatch.setenv("LEXICON_CACHE_DIR", str(tmp_path / "cache"))
+
+    assert classify_sentiment("hubo una demora") == "NEGATIVE"
+    assert classify_sentiment("tengo un problema") == "NEUTRAL"
+    assert get_lexicon_store() is get_lexicon_store()
+
+
+def test_invalid_s3_source_is_rejected():
+    """
+    Should reject an S3 source without a key.
+    """
+    with pytest.raises(ValueError, match="Invalid lexicon source"):
+        LexiconStore("s3://bucket-only")
@@ -1,7 +1,12 @@
 import json
 import pytest
-from botocore.exceptions import ClientError
-from app.adapters.message_bus import send_message_to_queue
+from botocore.exceptions import ClientError, EndpointConnectionError
+from app.adapters.message_bus import (
+    SQS_MAX_BATCH_BYTES,
+    SqsBatchPublisher,
+    get_sqs_client,
+    send_message_to_queue,
+)
 
 
 @pytest.fixture
@@ -77,3 +82,210 @@ def test_send_message_to_queue_raises_value_error_on_unserializable_input():
 
     with pytest.raises(ValueError, match="Failed to send message to SQS"):
         send_message_to_queue({"invalid": NotSerializable()})
+
+
+@pytest.fixture
+def publisher(mock_sqs_client, monkeypatch):
+    """
+    Provides a batch publisher bound to the mocked SQS client.
+
+    Every entry is accepted unless a test overrides the client behaviour.
+    Backoff sleeps are recorded instead of performed.
+
+    Returns:
+        SqsBatchPublisher: The publisher under test.
+    """
+    monkeypatch.setenv("SQS_QUEUE_URL", "https://sqs.local/queue")
+    mock_sqs_client.send_message_batch.side_effect = _accept_all
+    sleeps = []
+    instance = SqsBatchPublisher(sleep=sleeps.append)
+    instance.sleeps = sleeps
+    return instance
+
+
+def _accept_all(QueueUrl, Entries):
+    return {
+        "Successful": [{"Id": entry["Id"]} for entry in Entries],
+        "Failed": [],
+    }
+
+
+def test_batch_publisher_packs_up_to_ten_entries(publisher, mock_sqs_client):
+    """
+    Should send 25 payloads in three send_message_batch requests.
+    """
+    with publisher:
+        for i in range(25):
+            publisher.add({"n": i})
+
+    calls = mock_sqs_client.send_message_batch.call_args_list
+    assert [len(c.kwargs["Entries"]) for c in calls] == [10, 10, 5]
+    assert publisher.sent == 25
+    assert publisher.requests == 3
+    assert publisher.failed == {}
+    mock_sqs_client.send_message.assert_not_called()
+
+
+def test_batch_publisher_respects_total_request_size(
+    publisher, mock_sqs_client
+):
+    """
+    Should flush early so no request exceeds the 256 KB batch limit.
+    """
+    large = "x" * (100 * 1024)
+
+    with publisher:
+        for _ in range(5):
+            publisher.add({"transcript": large})
+
+    calls = mock_sqs_client.send_message_batch.call_args_list
+    for call in calls:
+        total = sum(
+            len(entry["MessageBody"].encode()) for entry in call.kwargs["Entries"]
+        )
+        assert total <= SQS_MAX_BATCH_BYTES
+    assert [len(c.kwargs["Entries"]) for c in calls] == [2, 2, 1]
+
+
+def test_batch_publisher_retries_only_failed_entries(
+    publisher, mock_sqs_client
+):
+    """
+    Should resend only the entries listed in the Failed response, after a
+    backoff delay.
+    """
+    mock_sqs_client.send_message_batch.side_effect = [
+        {
+            "Successful": [{"Id": "a"}],
+            "Failed": [{"Id": "b", "SenderFault": False, "Code": "Internal"}],
+        },
+        {"Successful": [{"Id": "b"}], "Failed": []},
+    ]
+
+    publisher.add({"n": 1}, entry_id="a")
+    publisher.add({"n": 2}, entry_id="b")
+    publisher.flush()
+
+    second = mock_sqs_client.send_message_batch.call_args_list[1]
+    assert [e["Id"] for e in second.kwargs["Entries"]] == ["b"]
+    assert publisher.sleeps == [0.1]
+    assert publisher.sent == 2
+    assert publisher.failed == {}
+
+
+def test_batch_publisher_records_exhausted_and_sender_faults(
+    publisher, mock_sqs_client
+):
+    """
+    Should record entries that keep failing or fail because of the sender,
+    without retrying sender faults.
+    """
+    mock_sqs_client.send_message_batch.side_effect = lambda QueueUrl, Entries: {
+        "Successful": [],
+        "Failed": [
+            {
+                "Id": entry["Id"],
+                "SenderFault": entry["Id"] == "bad",
+                "Code": "Oops",
+            }
+            for entry in Entries
+        ],
+    }
+
+    publisher.add({"n": 1}, entry_id="bad")
+    publisher.add({"n": 2}, entry_id="flaky")
+    publisher.flush()
+
+    assert set(publisher.failed) == {"bad", "flaky"}
+    assert publisher.requests == 3
+    assert publisher.sleeps == [0.1, 0.2]
+
+
+@pytest.mark.parametrize("code, calls", [
+    ("ThrottlingException", 3),
+    ("AWS.SimpleQueueService.NonExistentQueue", 1),
+])
+def test_batch_publisher_leaves_request_retries_to_the_guard(
+    publisher, mock_sqs_client, monkeypatch, code, calls
+):
+    """
+    Should not resend a batch whose request failed as a whole: the guard
+    retries retryable errors, and other errors are not retried at all.
+    """
+    monkeypatch.setenv("AWS_GUARD_BASE_DELAY", "0")
+    mock_sqs_client.send_message_batch.side_effect = ClientError(
+        {"Error": {"Code": code, "Message": "failed"}}, "SendMessageBatch"
+    )
+
+    with publisher:
+        publisher.add({"n": 1}, entry_id="a")
+
+    assert mock_sqs_client.send_message_batch.call_count == calls
+    assert publisher.requests == 1
+    assert publisher.sleeps == []
+    assert code in publisher.failed["a"]
+
+
+def test_batch_publisher_records_connection_errors(
+    publisher, mock_sqs_client, monkeypatch
+):
+    """
+    Should record every entry of a batch whose request could not reach SQS,
+    rather than raise.
+    """
+    monkeypatch.setenv("AWS_GUARD_MAX_ATTEMPTS", "1")
+    mock_sqs_client.send_message_batch.side_effect = EndpointConnectionError(
+        endpoint_url="https://sqs.local"
+    )
+
+    with publisher:
+        publisher.add({"n": 1}, entry_id="a")
+        publisher.add({"n": 2}, entry_id="b")
+
+    assert set(publisher.failed) == {"a", "b"}
+    assert "Could not connect" in publisher.failed["a"]
+    assert publisher.sent == 0
+
+
+def test_batch_publisher_records_unserializable_payload(
+    publisher, mock_sqs_client
+):
+    """
+    Should record a payload that cannot be serialized without sending it.
+    """
+
+    class NotSerializable:
+        pass
+
+    entry_id = publisher.add({"invalid": NotSerializable()})
+    publisher.flush()
+
+    assert "Failed to send message to SQS" in publisher.failed[entry_id]
+    mock_sqs_client.send_message_batch.assert_not_called()
+
+
+def test_batch_publisher_preserves_non_ascii_characters(
+    publisher, mock_sqs_client
+):
+    """
+    Should send non-ASCII characters as-is rather than \\u escaped.
+    """
+    publisher.add({"transcript": "¿Dónde está mi pedido?"})
+    publisher.flush()
+
+    entry = mock_sqs_client.send_message_batch.call_args.kwargs["Entries"][0]
+    assert "¿Dónde está mi pedido?" in entry["MessageBody"]
+    assert json.loads(entry["MessageBody"]) == {
+        "transcript": "¿Dónde está mi pedido?"
+    }
+
+
+def test_get_sqs_client_is_created_lazily_once(mocker):
+    """
+    Should create the SQS client on first use only and reuse it afterwards.
+    """
+    mocker.patch("app.adapters.message_bus.sqs", None)
+    create_client = mocker.patch("app.adapters.message_bus.create_client")
+
+    assert get_sqs_client() is get_sqs_client()
+    create_client.assert_called_once_with("sqs")
@@ -0,0 +1,137 @@
+import json
+import os
+
+import boto3
+import pytest
+from app.adapters.claim_check import read_message_body
+from app.adapters.message_bus import (
+    SqsBatchPublisher,
+    encode_message,
+    send_message_to_queue,
+)
+from app.adapters.message_compression import (
+    compress_body,
+    decompress_body,
+    get_content_encoding,
+)
+
+PAYLOAD = {
+    "interaction_id": "CHAT-1",
+    "transcript": "Hola, mi pedido llegó tarde y no funciona. " * 200,
+}
+
+
+@pytest.fixture
+def queue(moto_aws, monkeypatch):
+    """
+    Creates the output queue in moto and sets SQS_QUEUE_URL.
+
+    Returns:
+        dict: The boto3 SQS client and the queue URL.
+    """
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName="out")["QueueUrl"]
+    monkeypatch.setenv("SQS_QUEUE_URL", queue_url)
+    return {"sqs": sqs, "queue_url": queue_url}
+
+
+def _receive(queue):
+    response = queue["sqs"].receive_message(
+        QueueUrl=queue["queue_url"],
+        MaxNumberOfMessages=10,
+        MessageAttributeNames=["All"]
+    )
+    return response["Messages"]
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def test_large_bodies_are_compressed_and_decoded(queue, monkeypatch, encoding):
+    """
+    Should send bodies above the threshold compressed, marked with the
+    content-encoding attribute, and decode them with the reader helper.
+    """
+    monkeypatch.setenv("SQS_COMPRESSION", encoding)
+
+    send_message_to_queue(PAYLOAD)
+
+    message = _receive(queue)[0]
+    assert get_content_encoding(message) == encoding
+    assert len(message["Body"]) < len(json.dumps(PAYLOAD)) / 4
+    assert read_message_body(
+        message["Body"], get_content_encoding(message)
+    ) == PAYLOAD
+
+
+def test_batch_publisher_marks_compressed_entries_only(queue, monkeypatch):
+    """
+    Should compress only the entries above the threshold in a batch.
+    """
+    monkeypatch.setenv("SQS_COMPRESSION", "gzip")
+
+    with SqsBatchPublisher() as publisher:
+        publisher.add(PAYLOAD)
+        publisher.add({"interaction_id": "CHAT-2", "transcript": "gracias"})
+
+    messages = _receive(queue)
+    encodings = sorted(str(get_content_encoding(m)) for m in messages)
+    assert publisher.failed == {}
+    assert encodings == ["None", "gzip"]
+    assert [
+        read_message_body(m["Body"], get_content_encoding(m))["interaction_id"]
+        for m in sorted(messages, key=lambda m: len(m["Body"]))
+    ] == ["CHAT-2", "CHAT-1"]
+
+
+def test_small_or_incompressible_bodies_are_left_as_is(monkeypatch):
+    """
+    Should skip compression when it is off, under the threshold, or would
+    not make the body smaller.
+    """
+    body = json.dumps(PAYLOAD).encode()
+    noise = os.urandom(8 * 1024)
+
+    assert compress_body(body) == (body, None)
+    monkeypatch.setenv("SQS_COMPRESSION", "gzip")
+    assert compress_body(b'{"transcript": "corto"}')[1] is None
+    assert compress_body(noise) == (noise, None)
+    assert compress_body(body)[1] == "gzip"
+
+
+def test_compressed_bodies_under_the_claim_check_threshold_stay_inline(
+    moto_aws, monkeypatch
+):
+    """
+    Should only offload bodies that are still too large once compressed.
+    """
+    monkeypatch.setenv("SQS_COMPRESSION", "gzip")
+    monkeypatch.setenv("CLAIM_CHECK_BUCKET", "claim-check-bucket")
+    monkeypatch.setenv("CLAIM_CHECK_THRESHOLD_BYTES", "1024")
+
+    message = encode_message(PAYLOAD)
+
+    assert message.content_encoding == "gzip"
+    assert message.size == len(message.body) + len("content-encodingStringgzip")
+
+
+@pytest.mark.parametrize(
+    "body, encoding",
+    [("not base64!", "gzip"), ("aGVsbG8=", "gzip"), ("aGVsbG8=", "br")],
+)
+def test_undecodable_bodies_raise_value_error(body, encoding):
+    """
+    Should raise ValueError for corrupt bodies and unknown encodings.
+    """
+    with pytest.raises(ValueError):
+        decompress_body(body, encoding)
+
+
+def test_invalid_compression_setting_fails_the_message(monkeypatch):
+    """
+    Should record an unsupported SQS_COMPRESSION as a failed entry.
+    """
+    monkeypatch.setenv("SQS_COMPRESSION", "brotli")
+
+    publisher = SqsBatchPublisher(queue_url="https://queue")
+    entry_id = publisher.add(PAYLOAD)
+
+    assert "Unsupported SQS_COMPRESSION" in publisher.failed[entry_id]
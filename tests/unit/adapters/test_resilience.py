@@ -0,0 +1,273 @@
+import asyncio
+import json
+import random
+from collections import Counter
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from app.adapters import resilience
+from app.adapters.message_bus import SqsBatchPublisher
+from app.adapters.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ServiceGuard,
+    TokenBucket,
+)
+from app.adapters.storage import read_object_bytes
+from app.handler import handler
+
+BUCKET = "transcripts"
+
+
+class FaultyClient:
+    """
+    Wraps a boto3 client and fails chosen calls with injected errors.
+
+    Args:
+        client: The client whose methods are called when no fault is due.
+        faults (dict): Per operation, the error code of each successive
+            call; None lets that call through.
+    """
+
+    def __init__(self, client, faults):
+        self._client = client
+        self.faults = {name: list(codes) for name, codes in faults.items()}
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def call(**kwargs):
+            self.calls[name] += 1
+            codes = self.faults.get(name)
+            code = codes.pop(0) if codes else None
+            if code is not None:
+                raise ClientError(
+                    {
+                        "Error": {"Code": code, "Message": "injected fault"},
+                        "ResponseMetadata": {
+                            "HTTPStatusCode": 503 if code == "SlowDown" else 400
+                        },
+                    },
+                    name
+                )
+            return method(**kwargs)
+
+        return call
+
+
+@pytest.fixture
+def aws(moto_aws, monkeypatch):
+    """
+    Creates a bucket with one transcript and the output queue in moto.
+
+    Returns:
+        dict: The boto3 S3 and SQS clients and the queue URL.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="chat.json",
+        Body=json.dumps({
+            "interaction_id": "CHAT-1",
+            "customer_id": "CUST-1",
+            "transcript": "gracias",
+        })
+    )
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName="out")["QueueUrl"]
+    monkeypatch.setenv("SQS_QUEUE_URL", queue_url)
+    return {"s3": s3, "sqs": sqs, "queue_url": queue_url}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Installs S3 and SQS guards that record their backoff instead of
+    sleeping.
+
+    Returns:
+        list: The backoff delays, in seconds.
+    """
+    delays = []
+    monkeypatch.setattr(resilience, "_guards", {
+        service: ServiceGuard(
+            service,
+            breaker=CircuitBreaker(failure_threshold=5),
+            sleep=delays.append,
+            rng=random.Random(7)
+        )
+        for service in ("s3", "sqs")
+    })
+    return delays
+
+
+def test_throttled_get_object_is_retried_with_jittered_backoff(
+    aws, sleeps, mocker
+):
+    """
+    Should retry a throttled GetObject until it succeeds, backing off by a
+    random delay under an exponentially growing bound.
+    """
+    s3 = FaultyClient(aws["s3"], {"get_object": ["SlowDown", "SlowDown"]})
+    mocker.patch("app.adapters.storage.s3", s3)
+
+    assert b"CHAT-1" in read_object_bytes(BUCKET, "chat.json")
+
+    assert s3.calls["get_object"] == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.05 and 0 <= sleeps[1] <= 0.1
+
+
+def test_async_calls_are_retried_by_the_same_guard(mocker):
+    """
+    Should retry a throttled call of an async client and count it with the
+    synchronous calls of the service.
+    """
+    guard = ServiceGuard("sqs", base_delay=0, breaker=CircuitBreaker())
+    throttled = ClientError(
+        {"Error": {"Code": "Throttling", "Message": "slow down"}},
+        "SendMessageBatch"
+    )
+    send = mocker.AsyncMock(side_effect=[throttled, {"Successful": []}])
+
+    result = asyncio.run(guard.call_async(send, QueueUrl="q", Entries=[]))
+
+    assert result == {"Successful": []}
+    assert send.await_count == 2
+    assert guard.calls == 2 and guard.retries == 1
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_throttled_publish_does_not_repeat_the_s3_read(
+    aws, sleeps, mocker, lambda_context
+):
+    """
+    Should only repeat the throttled SendMessageBatch, not the GetObject
+    that already succeeded, and still report the record as processed.
+    """
+    s3 = FaultyClient(aws["s3"], {})
+    sqs = FaultyClient(
+        aws["sqs"], {"send_message_batch": ["ThrottlingException"]}
+    )
+    mocker.patch("app.adapters.storage.s3", s3)
+    mocker.patch("app.adapters.message_bus.sqs", sqs)
+    event = {"Records": [{
+        "s3": {"bucket": {"name": BUCKET}, "object": {"key": "chat.json"}}
+    }]}
+
+    response = handler(event, lambda_context)
+
+    assert response["statusCode"] == 200
+    assert s3.calls["get_object"] == 1
+    assert sqs.calls["send_message_batch"] == 2
+    received = aws["sqs"].receive_message(QueueUrl=aws["queue_url"])
+    assert len(received["Messages"]) == 1
+
+
+def test_non_retryable_errors_are_raised_at_once(aws, sleeps, mocker):
+    """
+    Should not retry errors that repeating cannot fix.
+    """
+    s3 = FaultyClient(aws["s3"], {"get_object": ["AccessDenied"]})
+    mocker.patch("app.adapters.storage.s3", s3)
+
+    with pytest.raises(RuntimeError, match="AccessDenied"):
+        read_object_bytes(BUCKET, "chat.json")
+
+    assert s3.calls["get_object"] == 1
+    assert sleeps == []
+
+
+def test_circuit_breaker_fails_fast_and_recovers(aws, mocker, clock):
+    """
+    Should stop calling a service after consecutive failures, let one trial
+    call through once the reset time passed, and close again when it
+    succeeds.
+    """
+    guard = ServiceGuard(
+        "s3",
+        breaker=CircuitBreaker(failure_threshold=2, reset_seconds=10,
+                               clock=clock),
+        max_attempts=2,
+        sleep=clock.sleep
+    )
+    mocker.patch.dict(resilience._guards, {"s3": guard})
+    s3 = FaultyClient(aws["s3"], {"get_object": ["SlowDown", "SlowDown"]})
+    mocker.patch("app.adapters.storage.s3", s3)
+
+    with pytest.raises(RuntimeError, match="SlowDown"):
+        read_object_bytes(BUCKET, "chat.json")
+    with pytest.raises(CircuitOpenError):
+        read_object_bytes(BUCKET, "chat.json")
+    assert s3.calls["get_object"] == 2
+    assert guard.rejected == 1
+
+    clock.now += 10
+    assert b"CHAT-1" in read_object_bytes(BUCKET, "chat.json")
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_call_reopens_the_circuit(clock):
+    """
+    Should open the circuit again when the trial call of a half-open
+    circuit fails, and reject other calls while it is in flight.
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_batch_publisher_fails_entries_while_the_circuit_is_open(
+    aws, mocker
+):
+    """
+    Should record the entries of a rejected batch as failed instead of
+    raising.
+    """
+    guard = ServiceGuard(
+        "sqs", breaker=CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    )
+    guard.breaker.record_failure()
+    mocker.patch.dict(resilience._guards, {"sqs": guard})
+
+    with SqsBatchPublisher(max_attempts=1) as publisher:
+        entry_id = publisher.add({"interaction_id": "CHAT-1"})
+
+    assert "Circuit breaker for sqs is open" in publisher.failed[entry_id]
+
+
+def test_token_bucket_spaces_calls_beyond_the_burst(clock):
+    """
+    Should let a burst through and then wait one interval per call.
+    """
+    bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits == pytest.approx([0, 0, 0.1, 0.1])
+
+
+def test_guards_are_configured_from_the_environment(monkeypatch):
+    """
+    Should build one guard per service from the environment.
+    """
+    monkeypatch.setenv("SQS_MAX_RPS", "50")
+    monkeypatch.setenv("CIRCUIT_FAILURE_THRESHOLD", "0")
+    monkeypatch.setenv("AWS_GUARD_MAX_ATTEMPTS", "1")
+
+    guard = resilience.get_guard("sqs")
+
+    assert guard is resilience.get_guard("sqs")
+    assert guard.limiter.rate == 50
+    assert guard.breaker is None
+    assert guard.max_attempts == 1
+    assert resilience.get_guard("s3").limiter is None
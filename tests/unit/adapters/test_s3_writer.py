@@ -0,0 +1,194 @@
+import gzip
+import io
+import json
+import boto3
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from app.adapters.message_bus import SqsBatchPublisher
+from app.adapters.output_sink import OutputSink, create_output_sink
+from app.adapters.s3_writer import S3BatchWriter
+
+BUCKET = "output-bucket"
+# 2024-05-01T12:00:00Z
+NOW = 1714564800.0
+
+
+def _payload(interaction_id, sentiment="NEGATIVE"):
+    return {
+        "interaction_id": interaction_id,
+        "transcript": "el servicio no funciona",
+        "analysis": {"sentiment": sentiment},
+    }
+
+
+@pytest.fixture
+def clock(clock):
+    """
+    Starts the fake clock on 2024-05-01, the date of the partitions.
+
+    Returns:
+        FakeClock: The clock set to ``NOW``.
+    """
+    clock.now = NOW
+    return clock
+
+
+@pytest.fixture
+def s3(moto_aws):
+    """
+    Creates the output bucket in moto.
+
+    Returns:
+        The boto3 S3 client.
+    """
+    client = boto3.client("s3", region_name="us-east-1")
+    client.create_bucket(Bucket=BUCKET)
+    return client
+
+
+def _objects(s3, prefix=""):
+    response = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix)
+    return {
+        item["Key"]: s3.get_object(Bucket=BUCKET, Key=item["Key"])["Body"].read()
+        for item in response.get("Contents", [])
+    }
+
+
+def _lines(body):
+    return [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+
+def test_records_are_partitioned_by_date_and_sentiment(s3, clock):
+    """
+    Should write one gzip NDJSON file per date and sentiment on flush.
+    """
+    with S3BatchWriter(BUCKET, "out", clock=clock) as writer:
+        writer.add(_payload("1"))
+        writer.add(_payload("2", "POSITIVE"))
+        writer.add(_payload("3"))
+
+    objects = _objects(s3)
+    assert writer.sent == 3
+    assert writer.requests == 2
+    assert writer.failed == {}
+    assert sorted(key.rsplit("/", 1)[0] for key in objects) == [
+        "out/date=2024-05-01/sentiment=NEGATIVE",
+        "out/date=2024-05-01/sentiment=POSITIVE",
+    ]
+    assert all(key.endswith(".ndjson.gz") for key in objects)
+    negative = next(
+        body for key, body in objects.items() if "NEGATIVE" in key
+    )
+    assert [r["interaction_id"] for r in _lines(negative)] == ["1", "3"]
+
+
+def test_full_partitions_are_written_before_the_flush(s3, clock):
+    """
+    Should write a partition as soon as it reaches the record limit.
+    """
+    writer = S3BatchWriter(BUCKET, max_records=2, clock=clock)
+    for interaction_id in "12345":
+        writer.add(_payload(interaction_id))
+
+    assert writer.sent == 4
+    assert len(_objects(s3)) == 2
+
+    writer.flush()
+    assert writer.sent == 5
+    assert len(_objects(s3)) == 3
+
+
+def test_old_partitions_are_written_on_the_next_add(s3, clock):
+    """
+    Should write every partition whose oldest record reached the age limit,
+    keeping younger ones buffered.
+    """
+    writer = S3BatchWriter(BUCKET, max_age_seconds=60, clock=clock)
+    writer.add(_payload("1"))
+    clock.now += 30
+    writer.add(_payload("2", "POSITIVE"))
+    clock.now += 30
+    writer.add(_payload("3", "NEUTRAL"))
+
+    assert writer.sent == 1
+    assert [key.split("/")[1] for key in writer.keys] == ["sentiment=NEGATIVE"]
+
+
+def test_parquet_files_round_trip(s3):
+    """
+    Should write Parquet files readable with pyarrow.
+    """
+    parquet = pytest.importorskip("pyarrow.parquet")
+
+    with S3BatchWriter(BUCKET, file_format="parquet") as writer:
+        writer.add(_payload("1"))
+        writer.add(_payload("2"))
+
+    [(key, body)] = _objects(s3).items()
+    table = parquet.read_table(io.BytesIO(body))
+    assert key.endswith(".parquet")
+    assert table.to_pylist() == [_payload("1"), _payload("2")]
+
+
+def test_failed_writes_fail_every_record_of_the_file(moto_aws):
+    """
+    Should report the records of a file that could not be written, without
+    raising.
+    """
+    with S3BatchWriter("missing-bucket") as writer:
+        writer.add(_payload("1"), entry_id="a")
+        writer.add(_payload("2"), entry_id="b")
+
+    assert writer.sent == 0
+    assert set(writer.failed) == {"a", "b"}
+    assert "Failed to write records to s3://missing-bucket/" in (
+        writer.failed["a"]
+    )
+
+
+def test_connection_errors_fail_the_records_of_the_file(mocker, monkeypatch):
+    """
+    Should report the records of a file when S3 cannot be reached.
+    """
+    monkeypatch.setenv("AWS_GUARD_MAX_ATTEMPTS", "1")
+    client = mocker.patch("app.adapters.s3_writer.get_s3_client").return_value
+    client.put_object.side_effect = EndpointConnectionError(
+        endpoint_url="https://s3.local"
+    )
+
+    with S3BatchWriter(BUCKET) as writer:
+        writer.add(_payload("1"), entry_id="a")
+
+    assert "Could not connect" in writer.failed["a"]
+
+
+def test_sinks_without_flush_cannot_be_created():
+    class AddOnlySink(OutputSink):
+        def add(self, payload, entry_id=None):
+            return entry_id or "0"
+
+    with pytest.raises(TypeError, match="flush"):
+        AddOnlySink()
+
+
+@pytest.mark.parametrize("spec", ["kafka", "s3://", "s3:/bucket"])
+def test_unknown_output_sinks_are_rejected(spec):
+    with pytest.raises(ValueError, match="Unsupported OUTPUT_SINK"):
+        create_output_sink(spec)
+
+
+def test_output_sink_is_read_from_the_environment(monkeypatch):
+    """
+    Should build an SQS publisher by default and an S3 writer configured
+    from the environment otherwise.
+    """
+    monkeypatch.setenv("SQS_QUEUE_URL", "https://queue")
+    assert isinstance(create_output_sink(), SqsBatchPublisher)
+
+    monkeypatch.setenv("OUTPUT_SINK", "s3://bucket/a/b")
+    monkeypatch.setenv("OUTPUT_MAX_RECORDS", "10")
+    sink = create_output_sink()
+    assert isinstance(sink, S3BatchWriter)
+    assert (sink.bucket, sink.prefix, sink.max_records) == (
+        "bucket", "a/b/", 10
+    )
@@ -1,8 +1,20 @@
+import gzip
 import json
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import pytest
+import zstandard
 from botocore.exceptions import ClientError
-from app.adapters.storage import read_json_from_s3
+from botocore.response import StreamingBody
+from app.adapters.storage import (
+    JsonLine,
+    ObjectTooLargeError,
+    get_s3_client,
+    is_ndjson_key,
+    iter_json_lines_from_s3,
+    read_json_from_s3,
+    read_object_bytes,
+)
 
 
 @pytest.fixture
@@ -110,3 +122,209 @@ def test_read_json_s3_client_error(mock_s3):
 
     with pytest.raises(ClientError, match="Failed to retrieve object"):
         read_json_from_s3("my-bucket", "missing.json")
+
+
+def _streaming_body(data: bytes) -> StreamingBody:
+    return StreamingBody(BytesIO(data), len(data))
+
+
+def test_iter_json_lines_parses_each_line(mock_s3):
+    """
+    Should yield one parsed object per non-blank line, with its line number.
+    """
+    mock_s3.get_object.return_value = {
+        "Body": _streaming_body(b'{"a": 1}\n\n{"a": 2}\n')
+    }
+
+    lines = list(iter_json_lines_from_s3("my-bucket", "data.jsonl"))
+
+    assert lines == [
+        JsonLine(1, {"a": 1}, None),
+        JsonLine(3, {"a": 2}, None),
+    ]
+
+
+def test_iter_json_lines_reports_malformed_lines_and_continues(mock_s3):
+    """
+    Should report invalid and non-object lines by line number without
+    stopping the stream.
+    """
+    mock_s3.get_object.return_value = {
+        "Body": _streaming_body(b'{"a": 1}\n{oops\n[1, 2]\n{"a": 4}')
+    }
+
+    lines = list(iter_json_lines_from_s3("my-bucket", "data.ndjson"))
+
+    assert [line.line_number for line in lines] == [1, 2, 3, 4]
+    assert lines[1].error == "Line contains invalid JSON"
+    assert lines[2].error == "Expected a JSON object, got list"
+    assert lines[3].data == {"a": 4}
+
+
+def test_iter_json_lines_handles_lines_spanning_chunks(mock_s3, mocker):
+    """
+    Should reassemble lines that are split across read chunks.
+    """
+    mocker.patch("app.adapters.storage.LINE_CHUNK_BYTES", 4)
+    payload = json.dumps({"transcript": "x" * 50}).encode()
+    mock_s3.get_object.return_value = {
+        "Body": _streaming_body(payload + b"\n" + payload)
+    }
+
+    lines = list(iter_json_lines_from_s3("my-bucket", "data.jsonl"))
+
+    assert [line.data for line in lines] == [{"transcript": "x" * 50}] * 2
+
+
+def test_iter_json_lines_wraps_client_error(mock_s3):
+    """
+    Should raise RuntimeError when the object cannot be retrieved.
+    """
+    mock_s3.get_object.side_effect = ClientError(
+        {"Error": {"Code": "NoSuchKey", "Message": "Object not found"}},
+        "GetObject"
+    )
+
+    with pytest.raises(RuntimeError, match="Failed to retrieve object"):
+        list(iter_json_lines_from_s3("my-bucket", "missing.jsonl"))
+
+
+@pytest.mark.parametrize(
+    "key, expected",
+    [
+        ("dump.jsonl", True),
+        ("dump.NDJSON", True),
+        ("dump.json", False),
+    ],
+)
+def test_is_ndjson_key(key, expected):
+    """
+    Should recognise line-delimited JSON keys by suffix.
+    """
+    assert is_ndjson_key(key) is expected
+
+
+@pytest.mark.parametrize(
+    "compress, content_encoding, key",
+    [
+        (gzip.compress, "gzip", "data.json"),
+        (gzip.compress, None, "data.json.gz"),
+        (zstandard.ZstdCompressor().compress, None, "data.json"),
+    ],
+)
+def test_read_json_decompresses_content(
+    mock_s3, compress, content_encoding, key
+):
+    """
+    Should transparently decompress gzip and zstd objects.
+    """
+    expected = {"transcript": "¿Dónde está mi pedido?"}
+    response = {"Body": BytesIO(compress(json.dumps(expected).encode()))}
+    if content_encoding:
+        response["ContentEncoding"] = content_encoding
+    mock_s3.get_object.return_value = response
+
+    assert read_json_from_s3("my-bucket", key) == expected
+
+
+def test_read_json_rejects_corrupt_compressed_content(mock_s3):
+    """
+    Should raise ValueError when compressed content cannot be decoded.
+    """
+    mock_s3.get_object.return_value = {
+        "Body": BytesIO(gzip.compress(b'{"a": 1}')[:-6]),
+    }
+
+    with pytest.raises(ValueError, match="could not be decompressed"):
+        read_json_from_s3("my-bucket", "data.json.gz")
+
+
+def test_iter_json_lines_decompresses_content(mock_s3):
+    """
+    Should stream lines out of a gzip-compressed NDJSON object.
+    """
+    data = gzip.compress(b'{"a": 1}\n{"a": 2}\n')
+    mock_s3.get_object.return_value = {"Body": _streaming_body(data)}
+
+    lines = list(iter_json_lines_from_s3("my-bucket", "dump.jsonl.gz"))
+
+    assert [line.data for line in lines] == [{"a": 1}, {"a": 2}]
+    assert is_ndjson_key("dump.jsonl.gz")
+
+
+def test_read_object_bytes_rejects_objects_over_the_limit(mock_s3, mocker):
+    """
+    Should reject an object from its ContentLength before reading it.
+    """
+    mocker.patch("app.adapters.storage.MAX_OBJECT_BYTES", 10)
+    body = BytesIO(b'{"transcript": "too long"}')
+    mock_s3.get_object.return_value = {"Body": body, "ContentLength": 26}
+
+    with pytest.raises(ObjectTooLargeError, match="26 bytes"):
+        read_object_bytes("my-bucket", "big.json")
+    assert body.closed
+
+
+def test_read_object_bytes_rejects_content_expanding_past_the_limit(
+    mock_s3, mocker
+):
+    """
+    Should stop reading compressed content once it decompresses past the
+    limit.
+    """
+    mocker.patch("app.adapters.storage.MAX_OBJECT_BYTES", 1000)
+    data = gzip.compress(b" " * 100000)
+    mock_s3.get_object.return_value = {
+        "Body": BytesIO(data),
+        "ContentLength": len(data),
+    }
+
+    with pytest.raises(ObjectTooLargeError, match="decompresses"):
+        read_object_bytes("my-bucket", "bomb.json.gz")
+
+
+def test_read_object_bytes_limit_can_be_disabled(mock_s3, mocker):
+    """
+    Should read objects of any size when MAX_OBJECT_BYTES is 0.
+    """
+    mocker.patch("app.adapters.storage.MAX_OBJECT_BYTES", 0)
+    mock_s3.get_object.return_value = {
+        "Body": BytesIO(b"x" * 100),
+        "ContentLength": 100,
+    }
+
+    assert read_object_bytes("my-bucket", "data.json") == b"x" * 100
+
+
+def test_iter_json_lines_applies_the_limit_per_line(mock_s3, mocker):
+    """
+    Should stream NDJSON objects larger than the limit, but reject a line
+    that is larger than it.
+    """
+    mocker.patch("app.adapters.storage.MAX_OBJECT_BYTES", 20)
+    data = b'{"a": 1}\n' * 10 + b'{"a": "' + b"x" * 50 + b'"}\n'
+    mock_s3.get_object.return_value = {
+        "Body": _streaming_body(data),
+        "ContentLength": len(data),
+    }
+
+    lines = iter_json_lines_from_s3("my-bucket", "dump.jsonl")
+
+    assert [next(lines).data for _ in range(10)] == [{"a": 1}] * 10
+    with pytest.raises(ObjectTooLargeError, match="line longer"):
+        next(lines)
+
+
+def test_get_s3_client_is_created_lazily_once(mocker):
+    """
+    Should create the S3 client on first use only and reuse it afterwards,
+    even when first requested from several threads at once.
+    """
+    mocker.patch("app.adapters.storage.s3", None)
+    create_client = mocker.patch("app.adapters.storage.create_client")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: get_s3_client(), range(32)))
+
+    create_client.assert_called_once_with("s3")
+    assert all(client is create_client.return_value for client in clients)
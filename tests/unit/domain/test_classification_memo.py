@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.domain import classification_memo
+from app.domain.classification_memo import (
+    ClassificationMemo,
+    get_classification_memo,
+    memo_key,
+)
+from app.domain.lexicon import Lexicon
+from app.domain.sentiment_analysis import classify_sentiment
+
+
+@pytest.fixture
+def memo(mocker):
+    """
+    Installs a classification memo of two entries for the test.
+    """
+    memo = ClassificationMemo(max_entries=2)
+    mocker.patch.object(classification_memo, "_memo", memo)
+    mocker.patch.object(classification_memo, "_memo_configured", True)
+    return memo
+
+
+def test_memo_evicts_the_least_recently_used_entry():
+    """
+    Should keep the most recently used results and count hits, misses and
+    evictions.
+    """
+    memo = ClassificationMemo(max_entries=2)
+    memo.get_or_compute("a", lambda: "NEGATIVE")
+    memo.get_or_compute("b", lambda: "POSITIVE")
+    memo.get_or_compute("a", lambda: "unused")
+    memo.get_or_compute("c", lambda: "NEUTRAL")
+
+    assert memo.get_or_compute("b", lambda: "NEUTRAL") == "NEUTRAL"
+    assert memo.stats() == {
+        "hits": 1,
+        "shared_hits": 0,
+        "misses": 4,
+        "evictions": 2,
+        "entries": 2,
+        "hit_rate": 0.2,
+    }
+
+
+def test_memo_key_depends_on_the_lexicon_version_and_matching_mode():
+    """
+    Should give a different key per lexicon version and matching mode.
+    """
+    keys = {
+        memo_key("gracias", "v1", False),
+        memo_key("gracias", "v2", False),
+        memo_key("gracias", "v1", True),
+        memo_key("gracias.", "v1", False),
+    }
+
+    assert len(keys) == 4
+    assert memo_key("gracias", "v1", False) == memo_key("gracias", "v1", False)
+
+
+def test_classify_sentiment_reuses_results_until_the_lexicon_changes(memo):
+    """
+    Should scan a text only once per lexicon version, including texts that
+    only differ in case.
+    """
+    first = Lexicon(["demora"], ["gracias"], version="v1")
+    second = Lexicon(["gracias"], [], version="v2")
+
+    assert classify_sentiment("Gracias", lexicon=first) == "POSITIVE"
+    assert classify_sentiment("GRACIAS", lexicon=first) == "POSITIVE"
+    assert classify_sentiment("gracias", lexicon=second) == "NEGATIVE"
+    assert memo.hits == 1
+    assert memo.misses == 2
+
+
+def test_memo_reads_and_fills_the_shared_mapping():
+    """
+    Should reuse results computed by another memo through the shared
+    mapping, and stop adding to it once it is full.
+    """
+    shared = {}
+    ClassificationMemo(10, shared=shared).get_or_compute("a", lambda: "X")
+    other = ClassificationMemo(10, shared=shared, max_shared_entries=1)
+
+    assert other.get_or_compute("a", lambda: "unused") == "X"
+    other.get_or_compute("b", lambda: "Y")
+
+    assert other.stats()["shared_hits"] == 1
+    assert shared == {"a": "X"}
+
+
+def test_memo_counts_every_lookup_across_threads():
+    """
+    Should not lose counter updates when threads share the memo.
+    """
+    memo = ClassificationMemo(8, shared={"shared": "X"})
+    keys = ["shared"] * 2000 + [f"k{n % 16}" for n in range(2000)]
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda key: memo.get_or_compute(key, str), keys * 4))
+
+    stats = memo.stats()
+    assert stats["hits"] + stats["shared_hits"] + stats["misses"] == 16000
+
+
+def test_memo_is_disabled_unless_sized(mocker, monkeypatch):
+    """
+    Should only create the memo when CLASSIFICATION_MEMO_SIZE is positive.
+    """
+    mocker.patch.object(classification_memo, "_memo_configured", False)
+    assert get_classification_memo() is None
+
+    mocker.patch.object(classification_memo, "_memo_configured", False)
+    monkeypatch.setenv("CLASSIFICATION_MEMO_SIZE", "100")
+    memo = get_classification_memo()
+
+    assert memo.max_entries == 100
+    assert get_classification_memo() is memo
@@ -0,0 +1,95 @@
+import random
+import pytest
+from app.domain.keyword_matcher import KeywordMatcher
+
+
+def test_find_all_matches_overlapping_and_nested_keywords():
+    """
+    Should report keywords that overlap or are contained in one another.
+    """
+    matcher = KeywordMatcher(["he", "she", "his", "hers"])
+
+    assert matcher.find_all("ushers") == {"she", "he", "hers"}
+
+
+def test_find_all_matches_multi_word_keywords():
+    """
+    Should match keywords that contain spaces.
+    """
+    matcher = KeywordMatcher(["no funciona", "problema"])
+
+    assert matcher.find_all("el equipo no funciona") == {"no funciona"}
+
+
+def test_iter_matches_yields_every_occurrence():
+    """
+    Should yield a keyword once per occurrence, in order of match end.
+    """
+    matcher = KeywordMatcher(["ab", "b"])
+
+    assert list(matcher.iter_matches("abab")) == ["ab", "b", "ab", "b"]
+
+
+@pytest.mark.parametrize("automaton", [False, True])
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("llegó tarde", {"tarde"}),
+        ("tarde.", {"tarde"}),
+        ("una tardecita", set()),
+        ("atarde", set()),
+        ("sí, no funciona!", {"no funciona"}),
+    ],
+)
+def test_word_boundary_matching(text, expected, automaton):
+    """
+    Should only match whole words when word_boundary is enabled, with both
+    the substring and the automaton strategies.
+    """
+    matcher = KeywordMatcher(["tarde", "no funciona"], word_boundary=True)
+
+    if automaton:
+        assert set(matcher.iter_matches(text)) == expected
+    else:
+        assert matcher.find_all(text) == expected
+
+
+def test_find_all_agrees_with_substring_search():
+    """
+    Should find exactly the keywords that a naive substring search finds.
+    """
+    rng = random.Random(42)
+    keywords = {
+        "".join(rng.choice("ab c") for _ in range(rng.randint(1, 5)))
+        for _ in range(40)
+    }
+    keywords.discard("")
+    matcher = KeywordMatcher(keywords)
+
+    for _ in range(200):
+        text = "".join(rng.choice("ab cd") for _ in range(rng.randint(0, 30)))
+        expected = {k for k in keywords if k in text}
+        assert matcher.find_all(text) == expected
+        assert set(matcher.iter_matches(text)) == expected
+
+
+def test_find_all_uses_automaton_for_large_lexicons():
+    """
+    Should return the same matches once the lexicon is large enough to be
+    scanned with the automaton.
+    """
+    keywords = [f"palabra{i}" for i in range(1000)] + ["no funciona"]
+    matcher = KeywordMatcher(keywords)
+
+    assert len(matcher.keywords) > KeywordMatcher.SUBSTRING_SCAN_MAX_KEYWORDS
+    assert matcher.find_all("x palabra7 y no funciona") == {
+        "palabra7",
+        "no funciona",
+    }
+
+
+def test_empty_keywords_never_match():
+    """
+    Should ignore empty keywords and match nothing when none are given.
+    """
+    assert KeywordMatcher([""]).find_all("anything") == set()
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+from app.domain.lexicon import Lexicon
+
+
+def test_lexicon_lowercases_keywords_and_shares_the_automaton():
+    """
+    Should lowercase keywords and reuse one automaton for both matching
+    modes.
+    """
+    lexicon = Lexicon(["No Funciona"], ["Gracias"], version="v1")
+
+    strict = lexicon.get_matcher(word_boundary=True)
+
+    assert lexicon.negative == {"no funciona"}
+    assert strict.word_boundary and not lexicon.get_matcher().word_boundary
+    assert strict._goto is lexicon.matcher._goto
+    assert lexicon.get_matcher(word_boundary=True) is strict
+
+
+def test_lexicon_survives_pickling():
+    """
+    Should match the same keywords after a pickle round trip, as done by the
+    compiled lexicon cache.
+    """
+    lexicon = Lexicon(["tarde"], ["gracias"], version="v1")
+
+    restored = pickle.loads(pickle.dumps(lexicon))
+
+    assert restored.version == "v1"
+    assert restored.get_matcher().find_all("gracias, tarde") == {
+        "gracias",
+        "tarde",
+    }
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        [],
+        {"negative": ["tarde"]},
+        {"negative": ["tarde"], "positive": "gracias"},
+        {"negative": [1], "positive": []},
+    ],
+)
+def test_from_document_rejects_invalid_lexicons(document):
+    """
+    Should raise ValueError unless both keyword lists hold strings.
+    """
+    with pytest.raises(ValueError):
+        Lexicon.from_document(document, version="v1")
@@ -1,5 +1,13 @@
+import json
 import pytest
-from app.domain.sentiment_analysis import process_transcript
+from app.domain.sentiment_analysis import (
+    LOWER_CHUNK_CHARS,
+    MalformedDocumentError,
+    classify_sentiment,
+    lower_text,
+    process_transcript,
+    process_transcript_json,
+)
 
 
 def test_process_transcript_detects_negative_sentiment():
@@ -60,3 +68,89 @@ def test_process_transcript_raises_value_error_with_invalid_input():
 
     with pytest.raises(ValueError, match="Invalid input data"):
         process_transcript(invalid_data)
+
+
+def test_process_transcript_matches_multi_word_keyword():
+    """
+    Should detect multi-word negative keywords such as 'no funciona'.
+    """
+    data = {
+        "interaction_id": "CHAT-5",
+        "customer_id": "CUST-5",
+        "transcript": "Gracias, pero la app NO FUNCIONA",
+    }
+
+    result = process_transcript(data)
+
+    assert result["analysis"]["sentiment"] == "NEGATIVE"
+
+
+def test_classify_sentiment_word_boundary_skips_partial_words():
+    """
+    Should not match 'tarde' inside 'tardecita' when word boundaries are
+    enforced, while substring matching still does.
+    """
+    text = "Nos vemos esta tardecita, gracias"
+
+    assert classify_sentiment(text) == "NEGATIVE"
+    assert classify_sentiment(text, word_boundary=True) == "POSITIVE"
+
+
+@pytest.mark.parametrize("use_msgspec", [True, False])
+def test_process_transcript_json_matches_dict_path(use_msgspec, mocker):
+    """
+    Should produce the same output from raw bytes as from the parsed dict,
+    with and without the msgspec decoder.
+    """
+    if not use_msgspec:
+        mocker.patch(
+            "app.domain.sentiment_analysis.get_transcript_decoder",
+            return_value=None
+        )
+    data = {
+        "interaction_id": "CHAT-6",
+        "customer_id": "CUST-6",
+        "transcript": "Llegó tarde, pero gracias por la atención",
+        "channel": "chat",
+    }
+
+    raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    assert process_transcript_json(raw) == process_transcript(data)
+
+
+def test_process_transcript_json_keeps_validation_message():
+    """
+    Should raise the same ValueError as the dict path for invalid fields.
+    """
+    data = {"interaction_id": "CHAT-7", "transcript": 42}
+
+    with pytest.raises(ValueError) as from_dict:
+        process_transcript(data)
+    with pytest.raises(ValueError) as from_bytes:
+        process_transcript_json(json.dumps(data).encode())
+
+    assert not isinstance(from_bytes.value, MalformedDocumentError)
+    assert str(from_bytes.value) == str(from_dict.value)
+
+
+@pytest.mark.parametrize("raw", [b"", b"{oops", b"[1, 2]", b'"text"'])
+def test_process_transcript_json_flags_malformed_documents(raw):
+    """
+    Should raise MalformedDocumentError when the input is not a JSON object.
+    """
+    with pytest.raises(MalformedDocumentError):
+        process_transcript_json(raw)
+
+
+def test_lower_text_matches_str_lower_on_long_texts():
+    """
+    Should lowercase long non-ASCII texts in chunks with the same result as
+    str.lower, including context-dependent mappings such as the Greek final
+    sigma.
+    """
+    text = "ÑANDÚ ΟΔΟΣ Qué PROBLEMA " * (3 * LOWER_CHUNK_CHARS // 20)
+
+    assert len(text) > LOWER_CHUNK_CHARS
+    assert lower_text(text) == text.lower()
+    assert classify_sentiment(text) == "NEGATIVE"
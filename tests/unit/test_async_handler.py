@@ -0,0 +1,280 @@
+import asyncio
+import gzip
+import json
+import boto3
+import pytest
+from botocore.exceptions import EndpointConnectionError, ParamValidationError
+from moto.server import ThreadedMotoServer
+from app.adapters.idempotency import IdempotencyCache
+from app.adapters.message_bus import encode_body
+from app.adapters.resilience import get_guard
+from app.async_handler import (
+    AsyncBatchSender,
+    close_async_clients,
+    get_async_clients,
+    handler,
+    process_locations_async,
+    read_object_bytes_async,
+    run_async,
+)
+from app.utils.parse_event import S3ObjectRef
+
+pytest.importorskip("aiobotocore")
+
+BUCKET = "async-bucket"
+
+
+@pytest.fixture(scope="module")
+def moto_server():
+    """
+    Runs a moto server, since aiobotocore bypasses moto's in-process mock.
+
+    Yields:
+        str: The server endpoint URL.
+    """
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def aws(moto_server, monkeypatch, mocker):
+    """
+    Creates a bucket and a fresh queue on the moto server and points the
+    application at them.
+
+    Closes the cached async clients afterwards.
+
+    Yields:
+        dict: The boto3 S3 and SQS clients and the queue URL.
+    """
+    monkeypatch.setenv("AWS_ENDPOINT_URL", moto_server)
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    mocker.patch("app.adapters.aws_clients._session", None)
+    mocker.patch("app.adapters.storage.s3", None)
+    mocker.patch("app.adapters.message_bus.sqs", None)
+
+    s3 = boto3.client("s3", endpoint_url=moto_server, region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    sqs = boto3.client("sqs", endpoint_url=moto_server, region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName=f"async-{id(s3)}")["QueueUrl"]
+    monkeypatch.setenv("SQS_QUEUE_URL", queue_url)
+    yield {"s3": s3, "sqs": sqs, "queue_url": queue_url}
+    run_async(close_async_clients())
+
+
+def _put(aws, key, body):
+    aws["s3"].put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def _drain(aws):
+    bodies = []
+    while True:
+        response = aws["sqs"].receive_message(
+            QueueUrl=aws["queue_url"], MaxNumberOfMessages=10
+        )
+        messages = response.get("Messages", [])
+        if not messages:
+            return bodies
+        bodies.extend(json.loads(m["Body"]) for m in messages)
+        aws["sqs"].delete_message_batch(
+            QueueUrl=aws["queue_url"],
+            Entries=[
+                {"Id": str(i), "ReceiptHandle": m["ReceiptHandle"]}
+                for i, m in enumerate(messages)
+            ],
+        )
+
+
+def test_process_locations_async_publishes_every_object(aws):
+    """
+    Should fetch, classify and publish every object with bounded
+    concurrency, and report failures per object.
+    """
+    locations = []
+    for i in range(25):
+        key = f"t-{i}.json"
+        _put(aws, key, json.dumps({
+            "interaction_id": f"CHAT-{i}",
+            "customer_id": "CUST",
+            "transcript": "gracias" if i % 2 else "tengo un problema",
+        }))
+        locations.append(S3ObjectRef(BUCKET, key))
+    _put(aws, "bad.json", b"{oops")
+    locations.append(S3ObjectRef(BUCKET, "bad.json"))
+
+    results, errors = run_async(
+        process_locations_async(locations, max_concurrency=4)
+    )
+
+    assert list(errors) == [25]
+    assert "contains invalid JSON" in results[25]["error"]
+    assert all(r["status"] == "SUCCEEDED" for r in results[:25])
+    messages = _drain(aws)
+    assert sorted(m["interaction_id"] for m in messages) == sorted(
+        f"CHAT-{i}" for i in range(25)
+    )
+    assert {m["analysis"]["sentiment"] for m in messages} == {
+        "POSITIVE",
+        "NEGATIVE",
+    }
+
+
+def test_async_handler_matches_sync_response(aws, lambda_context):
+    """
+    Should return the same response shape as the synchronous handler.
+    """
+    _put(aws, "one.json", json.dumps({
+        "interaction_id": "CHAT-1",
+        "customer_id": "CUST-1",
+        "transcript": "Excelente servicio",
+    }))
+    event = {
+        "Records": [
+            {"s3": {"bucket": {"name": BUCKET}, "object": {"key": "one.json"}}}
+        ]
+    }
+
+    result = handler(event, lambda_context)
+
+    assert result == {
+        "statusCode": 200,
+        "body": "Processed successfully",
+        "results": [
+            {"bucket": BUCKET, "key": "one.json", "status": "SUCCEEDED"}
+        ],
+    }
+    assert _drain(aws)[0]["analysis"]["sentiment"] == "POSITIVE"
+
+
+def test_async_clients_are_reused_across_invocations(aws, lambda_context):
+    """
+    Should create the aiobotocore clients once and reuse them while the
+    container's event loop is alive.
+    """
+    _put(aws, "one.json", json.dumps({
+        "interaction_id": "CHAT-1",
+        "customer_id": "CUST-1",
+        "transcript": "hola",
+    }))
+    event = {
+        "Records": [
+            {"s3": {"bucket": {"name": BUCKET}, "object": {"key": "one.json"}}}
+        ]
+    }
+
+    handler(event, lambda_context)
+    first = run_async(get_async_clients())
+    handler(event, lambda_context)
+
+    assert run_async(get_async_clients()) == first
+    assert len(_drain(aws)) == 2
+
+
+def test_async_handler_skips_processed_objects(aws, lambda_context, mocker):
+    """
+    Should skip object versions and interactions already published.
+    """
+    cache = IdempotencyCache()
+    mocker.patch(
+        "app.async_handler.get_idempotency_cache",
+        return_value=cache
+    )
+    _put(aws, "one.json", json.dumps({
+        "interaction_id": "CHAT-1",
+        "customer_id": "CUST-1",
+        "transcript": "hola",
+    }))
+
+    def event(etag):
+        return {"Records": [{"s3": {
+            "bucket": {"name": BUCKET},
+            "object": {"key": "one.json", "eTag": etag},
+        }}]}
+
+    handler(event("etag-1"), lambda_context)
+    same_version = handler(event("etag-1"), lambda_context)
+    new_version = handler(event("etag-2"), lambda_context)
+
+    assert same_version["results"][0]["status"] == "SKIPPED"
+    assert new_version["results"][0]["status"] == "SKIPPED"
+    assert len(_drain(aws)) == 1
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.parametrize("error, calls", [
+    (EndpointConnectionError(endpoint_url="https://sqs.local"), 3),
+    (ParamValidationError(report="bad entries"), 1),
+])
+def test_async_sender_records_request_errors_per_entry(
+    mocker, monkeypatch, error, calls
+):
+    """
+    Should mark the entries of a batch as failed instead of raising, and
+    leave the retries of the request to the SQS guard, which only retries
+    the errors that can succeed on a retry.
+    """
+    monkeypatch.setenv("AWS_GUARD_BASE_DELAY", "0")
+    sqs = mocker.Mock()
+    sqs.send_message_batch = mocker.AsyncMock(side_effect=error)
+    sender = AsyncBatchSender(sqs, "https://queue", 1, backoff_base=0)
+
+    async def publish():
+        await sender.add("a", encode_body(b"{}"))
+        await sender.flush()
+
+    asyncio.run(publish())
+
+    assert sender.requests == 1
+    assert get_guard("sqs").calls == calls
+    assert sender.failed["a"].startswith("Failed to send message to SQS")
+
+
+class ChunkedBody:
+    """
+    Async S3 body that returns at most ``chunk`` bytes per read, like
+    aiohttp, and records the sizes asked for.
+    """
+
+    def __init__(self, data, chunk):
+        self.data = data
+        self.chunk = chunk
+        self.reads = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def read(self, size=-1):
+        self.reads.append(size)
+        size = self.chunk if size is None or size < 0 else min(size, self.chunk)
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+def test_async_reads_decompress_while_streaming(mocker):
+    """
+    Should decompress the body chunk by chunk instead of reading it whole,
+    and fetch it through the S3 guard.
+    """
+    content = json.dumps({"transcript": "gracias " * 5000}).encode()
+    body = ChunkedBody(gzip.compress(content), chunk=512)
+    s3 = mocker.Mock()
+    s3.get_object = mocker.AsyncMock(
+        return_value={"Body": body, "ContentEncoding": "gzip"}
+    )
+
+    data = asyncio.run(
+        read_object_bytes_async(s3, S3ObjectRef(BUCKET, "chat.json"))
+    )
+
+    assert data == content
+    assert len(body.reads) > 1
+    assert all(size is not None and size >= 0 for size in body.reads)
+    assert get_guard("s3").calls == 1
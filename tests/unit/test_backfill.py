@@ -0,0 +1,265 @@
+import json
+
+import boto3
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from app.backfill import Backfill, Checkpoint, fetch_object, main
+
+BUCKET = "transcripts"
+
+
+@pytest.fixture
+def backfill_env(moto_aws, monkeypatch):
+    """
+    Creates a bucket with five transcripts, an invalid object and an NDJSON
+    object in moto, and an output queue.
+
+    Returns:
+        dict: The boto3 SQS client and the queue URL.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+    for index in range(5):
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=f"2024/{index:02d}.json",
+            Body=json.dumps({
+                "interaction_id": f"CHAT-{index}",
+                "customer_id": "CUST-1",
+                "transcript": "gracias por todo",
+            })
+        )
+    s3.put_object(Bucket=BUCKET, Key="2024/05-broken.json", Body=b"{nope")
+    s3.put_object(
+        Bucket=BUCKET,
+        Key="2024/06.jsonl",
+        Body=(
+            b'{"interaction_id": "L1", "customer_id": "C", '
+            b'"transcript": "tengo un problema"}\n[1]\n'
+        )
+    )
+    s3.put_object(Bucket=BUCKET, Key="other/ignored.json", Body=b"{}")
+
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName="out")["QueueUrl"]
+    monkeypatch.setenv("SQS_QUEUE_URL", queue_url)
+    return {"sqs": sqs, "queue_url": queue_url}
+
+
+def _messages(backfill_env):
+    bodies = []
+    while True:
+        response = backfill_env["sqs"].receive_message(
+            QueueUrl=backfill_env["queue_url"], MaxNumberOfMessages=10
+        )
+        if not response.get("Messages"):
+            return bodies
+        bodies.extend(json.loads(m["Body"]) for m in response["Messages"])
+
+
+def test_backfill_publishes_every_transcript_under_the_prefix(
+    backfill_env, tmp_path
+):
+    """
+    Should classify and publish every valid transcript under the prefix,
+    record the failed objects and mark the checkpoint complete.
+    """
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    failures_path = tmp_path / "failures.jsonl"
+    checkpoint = Checkpoint.load(checkpoint_path, BUCKET, "2024/")
+
+    Backfill(
+        BUCKET,
+        "2024/",
+        checkpoint,
+        chunk_size=3,
+        failures_path=str(failures_path)
+    ).run()
+
+    messages = _messages(backfill_env)
+    assert sorted(m["interaction_id"] for m in messages) == [
+        "CHAT-0", "CHAT-1", "CHAT-2", "CHAT-3", "CHAT-4", "L1"
+    ]
+    assert {m["analysis"]["sentiment"] for m in messages} == {
+        "POSITIVE", "NEGATIVE"
+    }
+    saved = json.loads(open(checkpoint_path).read())
+    assert saved["complete"] is True
+    assert saved["objects"] == 7
+    assert saved["published"] == 6
+    assert saved["failed"] == 2
+    failures = [
+        json.loads(line) for line in failures_path.read_text().splitlines()
+    ]
+    assert [f["key"] for f in failures] == [
+        "2024/05-broken.json", "2024/06.jsonl"
+    ]
+    assert "invalid JSON" in failures[0]["error"]
+
+
+def test_backfill_resumes_after_the_checkpoint(backfill_env, tmp_path):
+    """
+    Should only process the keys listed after the last checkpointed key.
+    """
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"), BUCKET, "2024/")
+    checkpoint.last_key = "2024/02.json"
+    checkpoint.objects = 3
+    checkpoint.save()
+
+    resumed = Checkpoint.load(checkpoint.path, BUCKET, "2024/")
+    Backfill(BUCKET, "2024/", resumed).run()
+
+    messages = _messages(backfill_env)
+    assert sorted(m["interaction_id"] for m in messages) == [
+        "CHAT-3", "CHAT-4", "L1"
+    ]
+    assert resumed.objects == 7
+
+
+def test_large_ndjson_objects_are_streamed_in_parts(backfill_env, tmp_path):
+    """
+    Should read an NDJSON object in parts of at most ``chunk_size`` lines,
+    and only checkpoint it once its last part was published.
+    """
+    lines = b"".join(
+        json.dumps({
+            "interaction_id": f"BULK-{n}",
+            "customer_id": "C",
+            "transcript": "gracias",
+        }).encode() + b"\n"
+        for n in range(7)
+    )
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket=BUCKET, Key="2024/07-bulk.jsonl", Body=lines
+    )
+
+    parts = list(fetch_object(BUCKET, "2024/07-bulk.jsonl", part_lines=3))
+    assert [len(part.documents) for part in parts] == [3, 3, 1]
+    assert [part.complete for part in parts] == [False, False, True]
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"), BUCKET, "2024/")
+    Backfill(BUCKET, "2024/", checkpoint, chunk_size=3).run()
+
+    bulk = [
+        m for m in _messages(backfill_env)
+        if m["interaction_id"].startswith("BULK-")
+    ]
+    assert len(bulk) == 7
+    assert checkpoint.objects == 8
+    assert checkpoint.last_key == "2024/07-bulk.jsonl"
+
+
+def test_backfill_keeps_one_sink_per_publish_worker(
+    backfill_env, monkeypatch
+):
+    """
+    Should reuse the output sinks across chunks, so a partitioned S3 sink
+    writes one file per partition between checkpoints.
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="enriched")
+    monkeypatch.setenv("OUTPUT_SINK", "s3://enriched/out")
+    monkeypatch.delenv("SQS_QUEUE_URL")
+
+    checkpoint = Checkpoint(None, BUCKET, "2024/")
+    Backfill(
+        BUCKET, "2024/", checkpoint, chunk_size=2, publish_workers=1
+    ).run()
+
+    keys = [
+        item["Key"]
+        for item in s3.list_objects_v2(Bucket="enriched")["Contents"]
+    ]
+    assert sorted(key.split("/")[2] for key in keys) == [
+        "sentiment=NEGATIVE", "sentiment=POSITIVE"
+    ]
+    assert checkpoint.published == 6
+    assert checkpoint.objects == 7
+
+
+@pytest.mark.parametrize("key, reader", [
+    ("a.json", "read_object_bytes"),
+    ("a.jsonl", "iter_json_lines_from_s3"),
+])
+def test_connection_errors_are_reported_per_object(mocker, key, reader):
+    """
+    Should report an object that S3 cannot serve instead of raising.
+    """
+    mocker.patch(
+        f"app.adapters.storage.{reader}",
+        side_effect=EndpointConnectionError(endpoint_url="https://s3.local")
+    )
+
+    [part] = list(fetch_object(BUCKET, key))
+
+    assert part.documents == []
+    assert "Could not connect" in part.error
+
+
+def test_backfill_classifies_on_a_process_pool(backfill_env):
+    """
+    Should give the same results when classifying in worker processes.
+    """
+    checkpoint = Checkpoint(None, BUCKET, "2024/")
+
+    Backfill(BUCKET, "2024/", checkpoint, processes=2, chunk_size=2).run()
+
+    assert checkpoint.published == 6
+    assert len(_messages(backfill_env)) == 6
+
+
+def test_backfill_shares_the_classification_memo(backfill_env):
+    """
+    Should memoize classifications in the workers and report their
+    counters, sharing results between processes.
+    """
+    checkpoint = Checkpoint(None, BUCKET, "2024/")
+    backfill = Backfill(
+        BUCKET,
+        "2024/",
+        checkpoint,
+        processes=2,
+        chunk_size=2,
+        memo_size=10,
+        share_memo=True
+    )
+
+    backfill.run()
+
+    totals = backfill.memo_totals()
+    assert checkpoint.published == 6
+    assert totals["hits"] + totals["shared_hits"] + totals["misses"] == 6
+    assert 2 <= totals["misses"] <= 3
+
+
+def test_checkpoint_of_another_prefix_is_rejected(tmp_path):
+    """
+    Should refuse to resume from the checkpoint of another prefix.
+    """
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"), BUCKET, "2023/")
+    checkpoint.save()
+
+    with pytest.raises(ValueError, match="not s3://transcripts/2024/"):
+        Checkpoint.load(checkpoint.path, BUCKET, "2024/")
+
+
+def test_main_skips_completed_runs_and_reports_failures(
+    backfill_env, tmp_path, capsys
+):
+    """
+    Should exit with 1 when objects failed and do nothing on a second run
+    unless asked to restart.
+    """
+    arguments = [
+        "--bucket", BUCKET,
+        "--prefix", "2024/",
+        "--checkpoint", str(tmp_path / "checkpoint.json"),
+        "--failures", str(tmp_path / "failures.jsonl"),
+        "--processes", "0",
+    ]
+
+    assert main(arguments) == 1
+    assert "objects/s=" in capsys.readouterr().err
+    assert main(arguments) == 0
+    assert "already backfilled" in capsys.readouterr().out
+    assert len(_messages(backfill_env)) == 6
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+
+def test_importing_handler_creates_no_aws_clients():
+    """
+    Should not import boto3 or create AWS clients when the handler module is
+    imported, keeping cold starts cheap.
+    """
+    script = (
+        "import sys\n"
+        "import app.handler\n"
+        "from app.adapters import storage, message_bus\n"
+        "assert storage.s3 is None and message_bus.sqs is None\n"
+        "assert 'boto3' not in sys.modules, 'boto3 imported eagerly'\n"
+    )
+
+    subprocess.run([sys.executable, "-c", script], check=True)
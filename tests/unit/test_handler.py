@@ -1,77 +1,507 @@
+import json
 import pytest
-from app.handler import handler
+from botocore.exceptions import EndpointConnectionError
+from app.adapters.idempotency import IdempotencyCache
+from app.adapters.storage import JsonLine
+from app.domain.sentiment_analysis import TranscriptPayload
+from app.handler import handler, sqs_handler, transform_object
+from app.utils.instrumentation import clear_metrics, metric_values
+from app.utils.parse_event import S3ObjectRef
+
+
+TRANSFORMED = {
+    "interaction_id": "CHAT-001",
+    "customer_id": "CUST-001",
+    "transcript": "Gracias por su ayuda, excelente servicio",
+    "analysis": {"sentiment": "POSITIVE"},
+}
+
+
+def _s3_event(*keys):
+    return {
+        "Records": [
+            {
+                "s3": {
+                    "bucket": {"name": "bucket-name"},
+                    "object": {"key": key},
+                }
+            }
+            for key in keys
+        ]
+    }
 
 
 @pytest.fixture
-def mock_dependencies(mocker):
+def mock_dependencies(mocker, monkeypatch):
     """
     Fixture to patch and return all external dependencies used by the handler.
 
+    The SQS client accepts every entry of each ``send_message_batch`` call.
+
     Returns:
         dict: A dictionary with all mocked dependencies.
     """
+    monkeypatch.setenv("SQS_QUEUE_URL", "https://sqs.local/queue")
+    mock_sqs = mocker.patch("app.adapters.message_bus.sqs")
+    mock_sqs.send_message_batch.side_effect = lambda QueueUrl, Entries: {
+        "Successful": [{"Id": entry["Id"]} for entry in Entries],
+        "Failed": [],
+    }
     return {
-        "get_s3_object_location": mocker.patch(
-            "app.handler.get_s3_object_location",
-            return_value=("bucket-name", "file.json"),
-        ),
-        "read_json_from_s3": mocker.patch(
-            "app.handler.read_json_from_s3",
-            return_value={
+        "read_object_bytes": mocker.patch(
+            "app.handler.read_object_bytes",
+            return_value=json.dumps({
                 "interaction_id": "CHAT-001",
                 "customer_id": "CUST-001",
                 "transcript": "Gracias por su ayuda, excelente servicio",
-            },
+            }).encode(),
         ),
         "process_transcript": mocker.patch(
             "app.handler.process_transcript",
-            return_value={
-                "interaction_id": "CHAT-001",
-                "customer_id": "CUST-001",
-                "transcript": "Gracias por su ayuda, excelente servicio",
-                "analysis": {"sentiment": "POSITIVE"},
-            },
+            return_value=TRANSFORMED,
         ),
-        "send_message_to_queue": mocker.patch(
-            "app.handler.send_message_to_queue"
+        "parse_transcript_json": mocker.patch(
+            "app.handler.parse_transcript_json",
+            return_value=TranscriptPayload(**TRANSFORMED),
         ),
+        "enrich": mocker.patch("app.handler.enrich", return_value=TRANSFORMED),
+        "sqs": mock_sqs,
     }
 
 
-def test_handler_success(mock_dependencies):
+def test_handler_success(mock_dependencies, lambda_context):
     """
     Test successful execution of the Lambda handler.
 
     Verifies that:
     - S3 object location is extracted from the event.
     - JSON is read from S3 and passed through validation/transformation.
-    - Final data is sent to SQS.
+    - Final data is sent to SQS in a batch.
     - A 200 response is returned.
 
     Raises:
         AssertionError: If any of the dependencies are not called as expected,
         or the response is incorrect.
     """
-    mock_event = {
-        "Records": [
+    mock_event = _s3_event("file.json")
+
+    result = handler(mock_event, lambda_context)
+
+    assert result == {
+        "statusCode": 200,
+        "body": "Processed successfully",
+        "results": [
+            {"bucket": "bucket-name", "key": "file.json", "status": "SUCCEEDED"}
+        ],
+    }
+
+    mock_dependencies["read_object_bytes"].assert_called_once_with(
+        "bucket-name", "file.json"
+    )
+    mock_dependencies["parse_transcript_json"].assert_called_once()
+    mock_dependencies["sqs"].send_message_batch.assert_called_once()
+
+
+def test_handler_processes_every_record(mock_dependencies, lambda_context):
+    """
+    Should fetch, transform and publish every record in a batched S3 event,
+    not only the first one.
+    """
+    keys = [f"file-{i}.json" for i in range(5)]
+
+    result = handler(_s3_event(*keys), lambda_context)
+
+    assert result["statusCode"] == 200
+    assert [r["key"] for r in result["results"]] == keys
+    fetched = {
+        call.args for call in mock_dependencies["read_object_bytes"].call_args_list
+    }
+    assert fetched == {("bucket-name", key) for key in keys}
+    sqs = mock_dependencies["sqs"]
+    sqs.send_message_batch.assert_called_once()
+    entries = sqs.send_message_batch.call_args.kwargs["Entries"]
+    assert len(entries) == len(keys)
+
+
+def test_handler_reports_partial_failures(mock_dependencies, lambda_context):
+    """
+    Should report a failing record without failing the rest of the batch.
+    """
+
+    def read(bucket, key):
+        if key == "bad.json":
+            raise ValueError("S3 object 'bad.json' contains invalid JSON")
+        return b'{"interaction_id": "X", "customer_id": "Y", "transcript": "Z"}'
+
+    mock_dependencies["read_object_bytes"].side_effect = read
+
+    result = handler(_s3_event("ok.json", "bad.json"), lambda_context)
+
+    assert result["statusCode"] == 207
+    assert result["results"][0]["status"] == "SUCCEEDED"
+    assert result["results"][1] == {
+        "bucket": "bucket-name",
+        "key": "bad.json",
+        "status": "FAILED",
+        "error": "S3 object 'bad.json' contains invalid JSON",
+    }
+    entries = mock_dependencies["sqs"].send_message_batch.call_args.kwargs[
+        "Entries"
+    ]
+    assert len(entries) == 1
+
+
+def test_handler_raises_when_every_record_fails(
+    mock_dependencies, lambda_context
+):
+    """
+    Should raise the first error when no record succeeds, so that Lambda can
+    retry the invocation.
+    """
+    mock_dependencies["read_object_bytes"].side_effect = ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        handler(_s3_event("a.json", "b.json"), lambda_context)
+
+
+def test_handler_raises_key_error_on_malformed_event(lambda_context):
+    """
+    Should raise KeyError when the event carries no S3 records.
+    """
+    with pytest.raises(KeyError, match="Invalid S3 event structure"):
+        handler({"Records": []}, lambda_context)
+
+
+
+def test_handler_reports_publish_failures(mock_dependencies, lambda_context):
+    """
+    Should mark a record as failed when SQS rejects its message.
+    """
+    mock_dependencies["sqs"].send_message_batch.side_effect = None
+    mock_dependencies["sqs"].send_message_batch.return_value = {
+        "Successful": [{"Id": "0"}],
+        "Failed": [
             {
-                "s3": {
-                    "bucket": {"name": "bucket-name"},
-                    "object": {"key": "file.json"},
-                }
+                "Id": "1",
+                "SenderFault": True,
+                "Code": "InvalidMessageContents",
+                "Message": "bad",
             }
+        ],
+    }
+
+    result = handler(_s3_event("a.json", "b.json"), lambda_context)
+
+    assert result["statusCode"] == 207
+    assert [r["status"] for r in result["results"]] == ["SUCCEEDED", "FAILED"]
+    assert "InvalidMessageContents" in result["results"][1]["error"]
+
+
+def test_handler_streams_ndjson_objects(
+    mock_dependencies, mocker, lambda_context
+):
+    """
+    Should publish every valid line of an NDJSON object in batches and report
+    invalid lines by number without failing the object.
+    """
+    lines = [
+        JsonLine(
+            n,
+            {"interaction_id": f"C{n}", "customer_id": "X", "transcript": "t"},
+            None
+        )
+        for n in range(1, 13)
+    ]
+    lines.insert(3, JsonLine(99, None, "Line contains invalid JSON"))
+    mocker.patch("app.handler.iter_json_lines_from_s3", return_value=lines)
+    mock_dependencies["process_transcript"].side_effect = lambda data: data
+
+    result = handler(_s3_event("bulk.jsonl"), lambda_context)
+
+    assert result["statusCode"] == 207
+    assert result["results"][0] == {
+        "bucket": "bucket-name",
+        "key": "bulk.jsonl",
+        "status": "PARTIAL",
+        "lines_processed": 12,
+        "lines_failed": 1,
+        "failed_lines": [{"line": 99, "error": "Line contains invalid JSON"}],
+        "requests": 2,
+    }
+    calls = mock_dependencies["sqs"].send_message_batch.call_args_list
+    assert [len(c.kwargs["Entries"]) for c in calls] == [10, 2]
+    mock_dependencies["read_object_bytes"].assert_not_called()
+
+
+def test_handler_counts_ndjson_messages_as_published(
+    mock_dependencies, mocker, lambda_context, capsys
+):
+    """
+    Should include the messages sent by NDJSON objects in
+    ``MessagesPublished``.
+    """
+    lines = [
+        JsonLine(
+            n,
+            {"interaction_id": f"C{n}", "customer_id": "X", "transcript": "t"},
+            None
+        )
+        for n in range(1, 13)
+    ]
+    mocker.patch("app.handler.iter_json_lines_from_s3", return_value=lines)
+    mock_dependencies["process_transcript"].side_effect = lambda data: data
+    clear_metrics()
+
+    handler(_s3_event("bulk.jsonl", "a.json"), lambda_context)
+
+    [document] = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if '"_aws"' in line
+    ]
+    assert metric_values(document)["MessagesPublished"] == [13.0]
+
+
+def test_handler_writes_to_the_configured_s3_sink(
+    mock_dependencies, mocker, monkeypatch, lambda_context
+):
+    """
+    Should hand every record to the S3 writer instead of SQS when
+    ``OUTPUT_SINK`` names a bucket.
+    """
+    monkeypatch.setenv("OUTPUT_SINK", "s3://out-bucket/enriched")
+    mock_s3 = mocker.patch("app.adapters.s3_writer.get_s3_client")
+
+    result = handler(_s3_event("a.json", "b.json"), lambda_context)
+
+    assert result["statusCode"] == 200
+    mock_dependencies["sqs"].send_message_batch.assert_not_called()
+    put = mock_s3.return_value.put_object
+    put.assert_called_once()
+    assert put.call_args.kwargs["Bucket"] == "out-bucket"
+    assert put.call_args.kwargs["Key"].startswith("enriched/date=")
+    assert "/sentiment=POSITIVE/" in put.call_args.kwargs["Key"]
+
+
+def _sqs_record(message_id, body):
+    return {"messageId": message_id, "body": body}
+
+
+def test_sqs_handler_processes_every_wrapped_notification(
+    mock_dependencies, lambda_context
+):
+    """
+    Should unwrap the S3 notifications of every SQS message and process all
+    of their records in one invocation.
+    """
+    event = {
+        "Records": [
+            _sqs_record("m1", json.dumps(_s3_event("a.json", "b.json"))),
+            _sqs_record("m2", json.dumps(_s3_event("c.json"))),
         ]
     }
 
-    result = handler(mock_event, context={})  # context is unused
+    result = sqs_handler(event, lambda_context)
 
-    assert result == {"statusCode": 200, "body": "Processed successfully"}
+    assert result == {"batchItemFailures": []}
+    fetched = {
+        call.args[1]
+        for call in mock_dependencies["read_object_bytes"].call_args_list
+    }
+    assert fetched == {"a.json", "b.json", "c.json"}
+    entries = mock_dependencies["sqs"].send_message_batch.call_args.kwargs[
+        "Entries"
+    ]
+    assert len(entries) == 3
 
-    mock_dependencies["get_s3_object_location"].assert_called_once_with(
-        mock_event
-    )
-    mock_dependencies["read_json_from_s3"].assert_called_once_with(
-        "bucket-name", "file.json"
+
+def test_sqs_handler_reports_only_failed_messages(
+    mock_dependencies, lambda_context
+):
+    """
+    Should report the messages with a failed record or a malformed body,
+    and skip S3 test events.
+    """
+
+    def read(bucket, key):
+        if key == "bad.json":
+            raise RuntimeError("Failed to retrieve object 'bad.json'")
+        return b'{"interaction_id": "X", "customer_id": "Y", "transcript": "Z"}'
+
+    mock_dependencies["read_object_bytes"].side_effect = read
+    event = {
+        "Records": [
+            _sqs_record("ok", json.dumps(_s3_event("a.json"))),
+            _sqs_record("retry", json.dumps(_s3_event("b.json", "bad.json"))),
+            _sqs_record("garbage", "{not json"),
+            _sqs_record("test", json.dumps({"Event": "s3:TestEvent"})),
+        ]
+    }
+
+    result = sqs_handler(event, lambda_context)
+
+    assert result == {
+        "batchItemFailures": [
+            {"itemIdentifier": "garbage"},
+            {"itemIdentifier": "retry"},
+        ]
+    }
+
+
+@pytest.fixture
+def idempotency(mocker, monkeypatch):
+    """
+    Enables an in-memory idempotency cache for the test.
+
+    Returns:
+        IdempotencyCache: The cache used by the handler.
+    """
+    cache = IdempotencyCache()
+    monkeypatch.setenv("IDEMPOTENCY_STORE", "memory")
+    mocker.patch("app.adapters.idempotency._cache", cache)
+    return cache
+
+
+def _s3_event_with_etag(key, etag):
+    event = _s3_event(key)
+    event["Records"][0]["s3"]["object"]["eTag"] = etag
+    return event
+
+
+def test_handler_skips_retried_object_before_download(
+    mock_dependencies, idempotency, lambda_context
+):
+    """
+    Should skip an object version already processed without downloading it.
+    """
+    event = _s3_event_with_etag("a.json", "etag-1")
+
+    first = handler(event, lambda_context)
+    second = handler(event, lambda_context)
+
+    assert first["results"][0]["status"] == "SUCCEEDED"
+    assert second["statusCode"] == 200
+    assert second["results"][0]["status"] == "SKIPPED"
+    mock_dependencies["read_object_bytes"].assert_called_once()
+    assert mock_dependencies["sqs"].send_message_batch.call_count == 1
+    assert idempotency.stats()["hits"] == 1
+
+
+def test_handler_emits_idempotency_metrics(
+    mock_dependencies, idempotency, lambda_context, capsys
+):
+    """
+    Should emit the idempotency hits and misses of each invocation.
+    """
+    event = _s3_event_with_etag("a.json", "etag-1")
+    handler(event, lambda_context)
+    clear_metrics()
+    capsys.readouterr()
+
+    handler(event, lambda_context)
+
+    [document] = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if '"_aws"' in line
+    ]
+    values = metric_values(document)
+    assert values["IdempotencyHits"] == [1.0]
+    assert values["IdempotencyMisses"] == [0.0]
+
+
+def test_handler_fails_open_when_the_store_is_unreachable(
+    mock_dependencies, mocker, lambda_context
+):
+    """
+    Should process an object when the idempotency store cannot be reached.
+    """
+    store = mocker.Mock()
+    error = EndpointConnectionError(endpoint_url="https://ddb")
+    store.claim.side_effect = store.put.side_effect = error
+    mocker.patch(
+        "app.handler.get_idempotency_cache",
+        return_value=IdempotencyCache(store)
     )
-    mock_dependencies["process_transcript"].assert_called_once()
-    mock_dependencies["send_message_to_queue"].assert_called_once()
+
+    result = handler(_s3_event_with_etag("a.json", "etag-1"), lambda_context)
+
+    assert result["results"][0]["status"] == "SUCCEEDED"
+    mock_dependencies["read_object_bytes"].assert_called_once()
+
+
+def test_handler_reprocesses_new_object_version(
+    mock_dependencies, idempotency, lambda_context
+):
+    """
+    Should download an overwritten object but not republish its interaction.
+    """
+    handler(_s3_event_with_etag("a.json", "etag-1"), lambda_context)
+    result = handler(_s3_event_with_etag("a.json", "etag-2"), lambda_context)
+
+    assert mock_dependencies["read_object_bytes"].call_count == 2
+    assert result["results"][0]["status"] == "SKIPPED"
+    assert mock_dependencies["sqs"].send_message_batch.call_count == 1
+
+
+def test_handler_does_not_record_failed_objects(
+    mock_dependencies, idempotency, lambda_context
+):
+    """
+    Should process a retried object again if its first attempt failed.
+    """
+    mock_dependencies["read_object_bytes"].side_effect = [
+        RuntimeError("Failed to retrieve object"),
+        mock_dependencies["read_object_bytes"].return_value,
+    ]
+    event = _s3_event_with_etag("a.json", "etag-1")
+
+    with pytest.raises(RuntimeError):
+        handler(event, lambda_context)
+    result = handler(event, lambda_context)
+
+    assert result["results"][0]["status"] == "SUCCEEDED"
+
+
+@pytest.mark.parametrize(
+    "raw, message",
+    [
+        (b"", "S3 object 'a.json' in bucket 'bucket-name' is empty"),
+        (b"{oops", "S3 object 'a.json' contains invalid JSON"),
+        (b"[1, 2]", "Expected a JSON object, got list"),
+    ],
+)
+def test_transform_object_keeps_document_error_messages(raw, message):
+    """
+    Should report malformed documents with the messages of
+    ``read_json_from_s3``.
+    """
+    with pytest.raises(ValueError) as error:
+        transform_object(raw, S3ObjectRef("bucket-name", "a.json"))
+
+    assert str(error.value) == message
+
+
+def test_handler_emits_stage_metrics(mock_dependencies, lambda_context, capsys):
+    """
+    Should print one EMF document with the stage latencies and counters of
+    the invocation.
+    """
+    clear_metrics()
+
+    handler(_s3_event("a.json", "b.json"), lambda_context)
+
+    documents = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if '"_aws"' in line
+    ]
+    assert len(documents) == 1
+    values = metric_values(documents[0])
+    assert len(values["S3GetLatency"]) == 2
+    assert len(values["ParseLatency"]) == 2
+    assert len(values["ClassifyLatency"]) == 2
+    assert len(values["SqsPublishLatency"]) == 1
+    assert values["Records"] == [2.0]
+    assert values["MessagesPublished"] == [2.0]
+    assert values["SentimentPositive"] == [2.0]
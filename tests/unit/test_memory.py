@@ -0,0 +1,81 @@
+import tracemalloc
+from io import BytesIO
+from unittest.mock import Mock
+
+import pytest
+
+from app.adapters import storage
+from app.adapters.message_bus import encode_message
+from app.adapters.storage import ObjectTooLargeError, read_object_bytes
+from app.domain.sentiment_analysis import process_transcript_json
+from app.utils import codec
+
+INPUT_BYTES = 1024 * 1024
+MAX_PEAK_KB_PER_INPUT_KB = 6
+
+PHRASES = {
+    "ascii": "hola, tengo un problema con mi pedido, gracias",
+    "non-ascii": "¿dónde está mi pedido? llegó tarde, qué decepción",
+}
+
+
+def _document(phrase: str) -> bytes:
+    transcript = " ".join([phrase] * (INPUT_BYTES // len(phrase.encode())))
+    return codec.dumps({
+        "interaction_id": "CHAT-MEM",
+        "customer_id": "CUST-1",
+        "transcript": transcript,
+    })
+
+
+def _peak(function) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("text", sorted(PHRASES))
+def test_peak_memory_per_kb_of_input_is_bounded(mocker, text):
+    """
+    Should read, classify and encode a 1 MB object with a peak of at most
+    ``MAX_PEAK_KB_PER_INPUT_KB`` KB per KB of input, so that the size limit
+    translates into a predictable memory budget.
+    """
+    raw = _document(PHRASES[text])
+    s3 = mocker.patch("app.adapters.storage.s3")
+    s3.get_object.side_effect = lambda **kwargs: {
+        "Body": BytesIO(raw),
+        "ContentLength": len(raw),
+    }
+
+    def process():
+        data = read_object_bytes("my-bucket", "big.json")
+        return encode_message(process_transcript_json(data))
+
+    process()
+    peak = _peak(process)
+
+    assert peak / len(raw) <= MAX_PEAK_KB_PER_INPUT_KB
+
+
+def test_oversized_object_is_rejected_before_its_body_is_read(mocker):
+    """
+    Should reject an object from its ContentLength without buffering it.
+    """
+    body = Mock()
+    s3 = mocker.patch("app.adapters.storage.s3")
+    s3.get_object.return_value = {
+        "Body": body,
+        "ContentLength": 100 * storage.MAX_OBJECT_BYTES,
+    }
+
+    def read():
+        with pytest.raises(ObjectTooLargeError):
+            read_object_bytes("my-bucket", "huge.json")
+
+    assert _peak(read) < 64 * 1024
+    body.read.assert_not_called()
+    body.close.assert_called_once()
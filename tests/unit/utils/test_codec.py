@@ -0,0 +1,89 @@
+import json
+import pytest
+from app.utils import codec
+
+
+def _available_codecs():
+    names = []
+    for name in codec.CODECS:
+        try:
+            codec.load_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+PAYLOAD = {
+    "interaction_id": "CHAT-1",
+    "transcript": "¿Dónde está mi pedido? Llegó tarde 😞",
+    "analysis": {"sentiment": "NEGATIVE", "score": 0.5, "tags": [1, None, True]},
+}
+
+
+@pytest.fixture(params=_available_codecs())
+def json_codec(request):
+    """
+    Provides the name, dumps and loads functions of each installed codec.
+    """
+    return codec.load_codec(request.param)
+
+
+def test_dumps_output_is_identical_across_codecs(json_codec):
+    """
+    Should produce the same compact UTF-8 bytes as the stdlib fallback.
+    """
+    _, dumps, _ = json_codec
+    _, stdlib_dumps, _ = codec.load_codec("json")
+
+    assert dumps(PAYLOAD) == stdlib_dumps(PAYLOAD)
+
+
+def test_dumps_preserves_non_ascii_characters(json_codec):
+    """
+    Should write non-ASCII characters as UTF-8 instead of \\u escapes.
+    """
+    _, dumps, _ = json_codec
+
+    encoded = dumps(PAYLOAD)
+
+    assert "¿Dónde está".encode("utf-8") in encoded
+    assert b"\\u" not in encoded
+
+
+def test_loads_round_trips(json_codec):
+    """
+    Should parse both bytes and text back into the original object.
+    """
+    _, dumps, loads = json_codec
+
+    assert loads(dumps(PAYLOAD)) == PAYLOAD
+    assert loads(json.dumps(PAYLOAD)) == PAYLOAD
+
+
+def test_loads_raises_value_error_on_invalid_json(json_codec):
+    """
+    Should raise ValueError for malformed documents.
+    """
+    _, _, loads = json_codec
+
+    with pytest.raises(ValueError):
+        loads(b"{invalid json}")
+
+
+def test_dumps_raises_type_error_on_unserializable_input(json_codec):
+    """
+    Should raise TypeError for objects that are not JSON-serializable.
+    """
+    _, dumps, _ = json_codec
+
+    with pytest.raises(TypeError):
+        dumps({"invalid": object()})
+
+
+def test_load_codec_rejects_unknown_names():
+    """
+    Should raise ValueError when the codec name is unknown.
+    """
+    with pytest.raises(ValueError, match="Unknown JSON codec"):
+        codec.load_codec("yaml")
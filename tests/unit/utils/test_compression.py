@@ -0,0 +1,117 @@
+import gzip
+from io import BytesIO
+import pytest
+import zstandard
+from app.utils.compression import (
+    LineTooLongError,
+    detect_compression,
+    iter_lines,
+    open_decompressed,
+    strip_compression_suffix,
+)
+
+
+class ChunkedStream:
+    """
+    Stream that records every read size, to check incremental consumption.
+    """
+
+    def __init__(self, data: bytes):
+        self._buffer = BytesIO(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return self._buffer.read(size)
+
+
+@pytest.mark.parametrize(
+    "encoding, key, head, expected",
+    [
+        ("gzip", "a.json", b"", "gzip"),
+        ("x-gzip", "a.json", b"", "gzip"),
+        ("zstd", "a.json", b"", "zstd"),
+        (None, "a.json.gz", b"", "gzip"),
+        (None, "a.jsonl.ZST", b"", "zstd"),
+        (None, "a.json", b"\x1f\x8b\x08\x00", "gzip"),
+        (None, "a.json", b"\x28\xb5\x2f\xfd", "zstd"),
+        (None, "a.json", b'{"a"', None),
+        ("identity", "a.json", b"{}", None),
+    ],
+)
+def test_detect_compression(encoding, key, head, expected):
+    """
+    Should detect compression from content encoding, suffix or magic bytes.
+    """
+    assert detect_compression(encoding, key, head) == expected
+
+
+def test_strip_compression_suffix():
+    """
+    Should remove a trailing compression suffix and keep other keys intact.
+    """
+    assert strip_compression_suffix("a/b.jsonl.gz") == "a/b.jsonl"
+    assert strip_compression_suffix("a/b.ndjson.zstd") == "a/b.ndjson"
+    assert strip_compression_suffix("a/b.json") == "a/b.json"
+
+
+@pytest.mark.parametrize(
+    "compress",
+    [gzip.compress, zstandard.ZstdCompressor().compress],
+    ids=["gzip", "zstd"],
+)
+def test_open_decompressed_sniffs_magic_bytes(compress):
+    """
+    Should decompress content identified only by its magic bytes.
+    """
+    payload = b'{"transcript": "hola"}'
+    stream = open_decompressed(BytesIO(compress(payload)), None, "data.json")
+
+    assert stream.read() == payload
+
+
+def test_open_decompressed_passes_plain_content_through():
+    """
+    Should return plain content unchanged, including the peeked head.
+    """
+    stream = open_decompressed(BytesIO(b'{"a": 1}'), None, "data.json")
+
+    assert stream.read(3) == b'{"a'
+    assert stream.read() == b'": 1}'
+
+
+def test_open_decompressed_reads_incrementally():
+    """
+    Should pull compressed bytes in bounded reads rather than all at once.
+    """
+    payload = b"\n".join(b'{"n": %d}' % i for i in range(5000))
+    source = ChunkedStream(gzip.compress(payload))
+
+    lines = list(iter_lines(open_decompressed(source, "gzip"), 1024))
+
+    assert len(lines) == 5000
+    assert -1 not in source.reads
+    assert None not in source.reads
+
+
+def test_iter_lines_handles_crlf_and_unterminated_last_line():
+    """
+    Should strip line terminators and yield a final line without newline.
+    """
+    assert list(iter_lines(BytesIO(b"a\r\nbb\n\nc"), 2)) == [
+        b"a",
+        b"bb",
+        b"",
+        b"c",
+    ]
+
+
+def test_iter_lines_rejects_lines_longer_than_the_limit():
+    """
+    Should raise LineTooLongError instead of buffering an endless line.
+    """
+    lines = iter_lines(BytesIO(b"ok\n" + b"x" * 100), 8, max_line_bytes=16)
+
+    assert next(lines) == b"ok"
+    with pytest.raises(LineTooLongError):
+        next(lines)
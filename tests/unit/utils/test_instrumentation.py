@@ -0,0 +1,133 @@
+import json
+import pytest
+from app.utils import instrumentation
+from app.utils.instrumentation import (
+    add_metric,
+    clear_metrics,
+    flush_metrics,
+    log_metrics,
+    metric_values,
+    record_sentiment,
+    stage,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """
+    Starts every test with an empty metric set.
+    """
+    clear_metrics()
+    yield
+    clear_metrics()
+
+
+def _emitted(capsys):
+    lines = capsys.readouterr().out.splitlines()
+    return [json.loads(line) for line in lines if '"_aws"' in line]
+
+
+def test_stage_records_latency_even_on_error(capsys):
+    """
+    Should record the stage latency in milliseconds when the stage raises.
+    """
+    with pytest.raises(RuntimeError):
+        with stage("S3Get"):
+            raise RuntimeError("boom")
+    flush_metrics()
+
+    [document] = _emitted(capsys)
+    assert document["_aws"]["CloudWatchMetrics"][0]["Namespace"] == "Lynza"
+    assert document["service"] == "lynza"
+    [latency] = metric_values(document)["S3GetLatency"]
+    assert latency >= 0
+
+
+def test_metrics_of_one_invocation_share_a_document(capsys):
+    """
+    Should publish repeated values of a metric as one EMF array, summing
+    counts into one value.
+    """
+    for sentiment in ("NEGATIVE", "NEGATIVE", "POSITIVE"):
+        record_sentiment({"analysis": {"sentiment": sentiment}})
+    add_metric("PayloadBytes", 120, "Bytes")
+    add_metric("PayloadBytes", 80, "Bytes")
+    flush_metrics()
+
+    [document] = _emitted(capsys)
+    assert metric_values(document) == {
+        "SentimentNegative": [2.0],
+        "SentimentPositive": [1.0],
+        "PayloadBytes": [120.0, 80.0],
+    }
+
+
+def test_log_metrics_flushes_once_per_invocation(capsys):
+    """
+    Should emit the metrics recorded during the handler call when it returns.
+    """
+
+    @log_metrics
+    def handler(event, context):
+        add_metric("Records", 2)
+        return "ok"
+
+    assert handler({}, None) == "ok"
+    assert len(_emitted(capsys)) == 1
+    handler({}, None)
+    assert len(_emitted(capsys)) == 1
+
+
+def test_disabled_metrics_emit_nothing(capsys, mocker):
+    """
+    Should neither record nor print metrics when METRICS_ENABLED is off.
+    """
+    mocker.patch.object(instrumentation, "METRICS_ENABLED", False)
+
+    with stage("Classify"):
+        pass
+    add_metric("Records", 1)
+    flush_metrics()
+
+    assert not instrumentation._pending
+    assert _emitted(capsys) == []
+
+
+def test_stage_opens_xray_subsegment_when_tracing(mocker):
+    """
+    Should wrap the stage in an X-Ray subsegment of the same name.
+    """
+    recorder = mocker.MagicMock()
+    mocker.patch.object(instrumentation, "TRACING_ENABLED", True)
+    mocker.patch.object(instrumentation, "_recorder", recorder)
+
+    with stage("SqsPublish"):
+        pass
+
+    recorder.in_subsegment.assert_called_once_with("SqsPublish")
+
+
+def test_flush_splits_values_over_emf_limits(capsys):
+    """
+    Should spread more than 100 values of a metric over several documents.
+    """
+    for _ in range(250):
+        add_metric("ParseLatency", 1.0, "Milliseconds")
+    flush_metrics()
+
+    documents = _emitted(capsys)
+    assert [len(metric_values(d)["ParseLatency"]) for d in documents] == [
+        100, 100, 50
+    ]
+
+
+def test_counts_of_large_objects_take_one_value(capsys):
+    """
+    Should keep one value per count metric however many lines were counted.
+    """
+    for _ in range(5000):
+        record_sentiment({"analysis": {"sentiment": "POSITIVE"}})
+    flush_metrics()
+
+    [document] = _emitted(capsys)
+    assert metric_values(document) == {"SentimentPositive": [5000.0]}
@@ -0,0 +1,61 @@
+import pytest
+from app.utils.parse_event import (
+    S3ObjectRef,
+    get_s3_object_location,
+    get_s3_object_locations,
+)
+
+
+def _record(key):
+    return {"s3": {"bucket": {"name": "bucket"}, "object": {"key": key}}}
+
+
+def test_get_s3_object_locations_returns_every_record():
+    """
+    Should return one location per record, in event order.
+    """
+    event = {"Records": [_record("a.json"), _record("b.json")]}
+
+    assert get_s3_object_locations(event) == [
+        S3ObjectRef("bucket", "a.json"),
+        S3ObjectRef("bucket", "b.json"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "event",
+    [{}, {"Records": []}, {"Records": [{"s3": {}}]}, {"Records": None}],
+)
+def test_get_s3_object_locations_rejects_malformed_events(event):
+    """
+    Should raise KeyError when the event has no usable records.
+    """
+    with pytest.raises(KeyError, match="Invalid S3 event structure"):
+        get_s3_object_locations(event)
+
+
+def test_get_s3_object_location_returns_first_record():
+    """
+    Should keep returning only the first record's location.
+    """
+    event = {"Records": [_record("a.json"), _record("b.json")]}
+
+    assert get_s3_object_location(event) == ("bucket", "a.json")
+
+
+def test_get_s3_object_locations_reads_etag():
+    """
+    Should carry the object ETag when the record has one.
+    """
+    event = {
+        "Records": [
+            {
+                "s3": {
+                    "bucket": {"name": "bucket"},
+                    "object": {"key": "a.json", "eTag": "abc123"},
+                }
+            }
+        ]
+    }
+
+    assert get_s3_object_locations(event)[0].etag == "abc123"
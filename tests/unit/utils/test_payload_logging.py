@@ -0,0 +1,96 @@
+import logging
+import pytest
+from app.utils import payload_logging
+from app.utils.payload_logging import log_payload, summarize_payload
+
+PAYLOAD = {
+    "interaction_id": "CHAT-1",
+    "customer_id": "CUST-1",
+    "transcript": "Hola, tengo un problema con mi pedido",
+    "analysis": {"sentiment": "NEGATIVE"},
+}
+
+
+@pytest.fixture
+def debug_logger(caplog):
+    """
+    Provides a standard library logger with debug records captured.
+
+    Returns:
+        logging.Logger: The logger.
+    """
+    caplog.set_level(logging.DEBUG, logger="lynza-test")
+    return logging.getLogger("lynza-test")
+
+
+def test_summarize_payload_truncates_long_strings():
+    """
+    Should cut strings above the limit and report how much was dropped.
+    """
+    summary = summarize_payload(PAYLOAD, max_chars=4)
+
+    assert summary["transcript"] == "Hola... <33 more chars>"
+    assert summary["interaction_id"] == "CHAT... <2 more chars>"
+    assert summary["analysis"] == {"sentiment": "NEGATIVE"}
+    assert PAYLOAD["transcript"] == "Hola, tengo un problema con mi pedido"
+
+
+def test_summarize_payload_redacts_transcript():
+    """
+    Should replace the transcript with its length and keep other fields.
+    """
+    summary = summarize_payload(PAYLOAD, max_chars=0, redact=True)
+
+    assert summary["transcript"] == "<redacted 37 chars>"
+    assert summary["customer_id"] == "CUST-1"
+
+
+def test_log_payload_skips_work_when_debug_is_off(caplog, mocker):
+    """
+    Should not summarize nor emit anything when debug logging is disabled.
+    """
+    caplog.set_level(logging.INFO, logger="lynza-test")
+    summarize = mocker.patch("app.utils.payload_logging.summarize_payload")
+
+    emitted = log_payload(logging.getLogger("lynza-test"), "Data", PAYLOAD)
+
+    assert emitted is False
+    summarize.assert_not_called()
+    assert not caplog.records
+
+
+def test_log_payload_logs_one_in_n(debug_logger, caplog, mocker):
+    """
+    Should emit exactly one record per ``sample_rate`` calls.
+    """
+    mocker.patch.object(payload_logging, "_counter", iter(range(100)))
+
+    emitted = [
+        log_payload(debug_logger, "Data", PAYLOAD, sample_rate=10)
+        for _ in range(30)
+    ]
+
+    assert sum(emitted) == 3
+    assert len(caplog.records) == 3
+
+
+def test_log_payload_disabled_with_zero_rate(debug_logger, caplog):
+    """
+    Should never log when the sample rate is zero.
+    """
+    assert log_payload(debug_logger, "Data", PAYLOAD, sample_rate=0) is False
+    assert not caplog.records
+
+
+def test_log_payload_applies_configured_redaction(debug_logger, caplog, mocker):
+    """
+    Should attach the redacted, truncated payload under the given field.
+    """
+    mocker.patch.object(payload_logging, "LOG_PAYLOAD_REDACT", True)
+    mocker.patch.object(payload_logging, "LOG_PAYLOAD_MAX_CHARS", 5)
+
+    log_payload(debug_logger, "Transformed", PAYLOAD, "transformed", 1)
+
+    record = caplog.records[0]
+    assert record.transformed["transcript"] == "<redacted 37 chars>"
+    assert record.transformed["interaction_id"] == "CHAT-... <1 more chars>"